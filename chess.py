@@ -284,12 +284,37 @@ def check_game_over(board: Board, whites_turn: bool) -> bool:
     
     return False            
          
-def main():
-    """Entry point to gameplay"""  
+def main(engine_depth: Optional[int] = None, ponder: bool = False,
+         mcts_seconds: Optional[float] = None) -> None:
+    """Entry point to gameplay
+
+    Parameters:
+        engine_depth (int | None): If given, the engine plays black, searching
+            this many plies deep. Otherwise both sides are played by humans.
+        ponder (bool): If True, the engine searches in the background while
+            the human is thinking.
+        mcts_seconds (float | None): If given, the MCTS player plays black,
+            searching for this many seconds a move.
+    """
     board = initial_state()
     i = 0
     whites_turn = True
 
+    #Engine opponent (imported here as chess_engine builds on this module)
+    engine = ponderer = mcts = None
+    if mcts_seconds is not None:
+        import os
+        from chess_mcts import MCTSPlayer
+        from chess_positions import move_name
+        mcts = MCTSPlayer(os.cpu_count() or 1)
+    elif engine_depth is not None:
+        from chess_engine import Engine, Ponderer
+        from chess_positions import move_name
+        engine = Engine()
+        if ponder:
+            ponderer = Ponderer(engine, engine_depth)
+    human_move = None
+
     #Game Play
     while True:
         print_board(board)
@@ -297,6 +322,34 @@ def main():
         if check_game_over(board, whites_turn): 
             break
 
+        #MCTS player's move
+        if mcts is not None and not whites_turn:
+            result = mcts.choose_move(board, whites_turn,
+                                      seconds=mcts_seconds)
+            print(f"\nBlack's move: {move_name(result.move)} "
+                  f"({result.playouts} playouts, win rate "
+                  f"{result.win_rate:.2f}, {result.seconds:.2f}s)")
+            board = update_board(board, result.move)
+            i += 1
+            whites_turn = True
+            continue
+
+        #Engine's move
+        if engine is not None and not whites_turn:
+            if ponderer is not None and human_move is not None:
+                result = ponderer.think(board, whites_turn, human_move)
+            else:
+                result = engine.search(board, whites_turn, engine_depth)
+            print(f"\nBlack's move: {move_name(result.move)} "
+                  f"({result.depth} plies, {result.nodes} nodes, "
+                  f"{result.seconds:.2f}s)")
+            board = update_board(board, result.move)
+            i += 1
+            whites_turn = True
+            if ponderer is not None:
+                ponderer.start(board, whites_turn)
+            continue
+
         #Current Player
         if whites_turn:
             user_input = input("\nWhite's move: ")
@@ -322,15 +375,34 @@ def main():
             
         #Normal valid move
         else:  
-            board = update_board(board, process_move(user_input))
+            human_move = process_move(user_input)
+            board = update_board(board, human_move)
             i += 1
             if i % 2 == 0:
                 whites_turn = True
             else:
                 whites_turn = False
+
+    if ponderer is not None:
+        ponderer.cancel()
+        print(ponderer.summary())
+    if mcts is not None:
+        mcts.close()
             
 if __name__ == "__main__":
-    main()
-
-lineone \
-        or linetwo
+    import sys
+    if sys.argv[1:] == ["uci"]:
+        #python chess.py uci: line-based protocol mode
+        from chess_uci import run
+        run()
+    elif sys.argv[1:2] == ["mcts"]:
+        #python chess.py mcts [SECONDS]: play black against the MCTS player
+        seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+        if not seconds > 0:
+            sys.exit("The MCTS player's SECONDS must be positive")
+        main(mcts_seconds=seconds)
+    elif len(sys.argv) > 1:
+        #python chess.py DEPTH [ponder]: play black against the engine
+        main(int(sys.argv[1]), "ponder" in sys.argv[2:])
+    else:
+        main()
@@ -0,0 +1,466 @@
+"""
+Alpha-beta search engine for the chess game, with background pondering.
+
+Engine searches a position by iterative deepening negamax with a
+transposition table keyed by Zobrist hash. Ponderer runs an Engine in a
+background thread while the human thinks, searching the position after the
+human's most likely reply, so that the engine's own search on its next turn
+starts from a warm transposition table (or is answered outright).
+"""
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from chess_support import *
+from chess import initial_state, update_board
+from chess_positions import legal_moves, move_name, position_hash, update_hash
+
+PIECE_VALUES = {
+    WHITE_PAWN: 100, BLACK_PAWN: 100,
+    WHITE_KNIGHT: 320, BLACK_KNIGHT: 320,
+    WHITE_BISHOP: 330, BLACK_BISHOP: 330,
+    WHITE_ROOK: 500, BLACK_ROOK: 500,
+    WHITE_QUEEN: 900, BLACK_QUEEN: 900,
+    WHITE_KING: 0, BLACK_KING: 0,
+}
+CENTRE_BONUS = (0, 2, 5, 8, 8, 5, 2, 0)
+PAWN_ADVANCE_BONUS = 4
+MATE_SCORE = 100000
+INFINITY = MATE_SCORE + 1
+MAX_PLY = 1000
+MATE_THRESHOLD = MATE_SCORE - MAX_PLY
+DEFAULT_TABLE_SIZE = 1 << 20
+
+# Transposition table bound types
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class SearchResult(NamedTuple):
+    """The outcome of a search: the best move found (None if the position is
+    terminal), its score for the side to move and the search effort."""
+    move: Optional[Move]
+    score: int
+    depth: int
+    nodes: int
+    seconds: float
+
+
+class TableEntry(NamedTuple):
+    """A transposition table entry. Mate scores are counted from the entry's
+    own position (see score_to_table)."""
+    depth: int
+    score: int
+    bound: int
+    move: Optional[Move]
+
+
+class SearchStopped(Exception):
+    """Raised inside the search when it is asked to stop."""
+
+
+def score_to_table(score: int, ply: int) -> int:
+    """Returns a score found ply plies from the root as it is stored in the
+    transposition table.
+
+    Mate scores are counted from the root (-MATE_SCORE + ply for a mate ply
+    plies in), but the table outlives the root: the same position can be
+    reached at another ply, or in a later search from another root. So they
+    are stored counted from the position itself, and score_from_table
+    counts them from the root again when they are read.
+    """
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_table(score: int, ply: int) -> int:
+    """Returns a table score read ply plies from the root, counted from the
+    root (the inverse of score_to_table)."""
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+def evaluate(board: Board, whites_turn: bool) -> int:
+    """Returns a static evaluation of board from the side to move's view.
+
+    Parameters:
+        board (Board): The board state.
+        whites_turn (bool): True iff it's white's turn.
+
+    Returns:
+        (int): The score in centipawns; positive favours the side to move.
+    """
+    score = 0
+    for row, row_str in enumerate(board):
+        for col, piece in enumerate(row_str):
+            if piece == EMPTY:
+                continue
+            value = PIECE_VALUES[piece] + CENTRE_BONUS[row] + CENTRE_BONUS[col]
+            if piece == WHITE_PAWN:
+                value += (6 - row) * PAWN_ADVANCE_BONUS
+            elif piece == BLACK_PAWN:
+                value += (row - 1) * PAWN_ADVANCE_BONUS
+            score += value if piece in WHITE_PIECES else -value
+    return score if whites_turn else -score
+
+
+class Engine:
+    """An iterative deepening alpha-beta searcher.
+
+    The transposition table persists between searches, which is what lets a
+    ponder search carry over into the next real search.
+    """
+
+    def __init__(self, table_size: int = DEFAULT_TABLE_SIZE) -> None:
+        """
+        Parameters:
+            table_size (int): The number of transposition table entries kept
+                before the table is cleared.
+        """
+        self._table: Dict[int, TableEntry] = {}
+        self._table_size = table_size
+        self._nodes = 0
+        self._stop: Optional[threading.Event] = None
+        self._deadline: Optional[float] = None
+
+    def get_nodes(self) -> int:
+        """(int): Return the number of nodes visited by the current (or last)
+        search."""
+        return self._nodes
+
+    def get_table(self) -> Dict[int, TableEntry]:
+        """(dict): Return the transposition table."""
+        return self._table
+
+    def principal_variation(self, board: Board, whites_turn: bool,
+                            length: int) -> List[Move]:
+        """Returns up to length moves following the best moves stored in the
+            transposition table from the given position.
+        """
+        line = []
+        key = position_hash(board, whites_turn)
+        seen = set()
+        while len(line) < length and key not in seen:
+            seen.add(key)
+            entry = self._table.get(key)
+            if entry is None or entry.move is None:
+                break
+            line.append(entry.move)
+            key = update_hash(key, board, entry.move)
+            board = update_board(board, entry.move)
+            whites_turn = not whites_turn
+        return line
+
+    def search(self, board: Board, whites_turn: bool, max_depth: int,
+               time_limit: Optional[float] = None,
+               stop: Optional[threading.Event] = None,
+               info: Optional[Callable[[SearchResult], None]] = None
+               ) -> SearchResult:
+        """Searches board by iterative deepening and returns the best move.
+
+        The search ends once max_depth is completed, time_limit seconds have
+        passed or stop is set, whichever comes first. The result of the
+        deepest completed iteration is returned.
+
+        Parameters:
+            board (Board): The board state.
+            whites_turn (bool): True iff it's white's turn.
+            max_depth (int): The deepest iteration to search, in plies.
+            time_limit (float | None): The number of seconds to search for.
+            stop (threading.Event | None): An event that cancels the search.
+            info (callable | None): Called with the result of each completed
+                iteration.
+
+        Returns:
+            (SearchResult): The best move found and the search statistics.
+        """
+        start = time.perf_counter()
+        self._nodes = 0
+        self._stop = stop
+        self._deadline = None if time_limit is None else start + time_limit
+        if len(self._table) > self._table_size:
+            self._table.clear()
+
+        key = position_hash(board, whites_turn)
+        result = SearchResult(None, 0, 0, 0, 0.0)
+        for depth in range(1, max_depth + 1):
+            try:
+                score = self._negamax(board, whites_turn, key, depth,
+                                      -INFINITY, INFINITY, 0)
+            except SearchStopped:
+                break
+            entry = self._table.get(key)
+            result = SearchResult(entry.move if entry else None, score, depth,
+                                  self._nodes, time.perf_counter() - start)
+            if info is not None:
+                info(result)
+            if result.move is None or abs(score) >= MATE_SCORE - max_depth:
+                break
+        return result._replace(nodes=self._nodes,
+                               seconds=time.perf_counter() - start)
+
+    def _check_stop(self) -> None:
+        """Raises SearchStopped if the search should stop."""
+        if self._stop is not None and self._stop.is_set():
+            raise SearchStopped()
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchStopped()
+
+    def _ordered_moves(self, board: Board, whites_turn: bool,
+                       best: Optional[Move]) -> List[Move]:
+        """Returns the legal moves with the table move first, then captures
+            of the most valuable pieces."""
+        moves = legal_moves(board, whites_turn)
+
+        def priority(move: Move) -> int:
+            if move == best:
+                return -INFINITY
+            (to_row, to_col) = move[1]
+            return -PIECE_VALUES.get(board[to_row][to_col], 0)
+
+        moves.sort(key=priority)
+        return moves
+
+    def _negamax(self, board: Board, whites_turn: bool, key: int, depth: int,
+                 alpha: int, beta: int, ply: int) -> int:
+        """Returns the negamax score of board searched to depth plies."""
+        self._nodes += 1
+        if self._nodes & 63 == 0:
+            self._check_stop()
+
+        original_alpha = alpha
+        entry = self._table.get(key)
+        if entry is not None and entry.depth >= depth and ply > 0:
+            score = score_from_table(entry.score, ply)
+            if entry.bound == EXACT:
+                return score
+            if entry.bound == LOWER and score >= beta:
+                return score
+            if entry.bound == UPPER and score <= alpha:
+                return score
+
+        if depth == 0:
+            return evaluate(board, whites_turn)
+
+        moves = self._ordered_moves(board, whites_turn,
+                                    entry.move if entry else None)
+        if not moves:
+            if is_in_check(board, whites_turn):
+                return -MATE_SCORE + ply
+            return 0
+
+        best_score = -INFINITY
+        best_move = moves[0]
+        for move in moves:
+            child_key = update_hash(key, board, move)
+            score = -self._negamax(update_board(board, move), not whites_turn,
+                                   child_key, depth - 1, -beta, -alpha,
+                                   ply + 1)
+            if score > best_score:
+                best_score = score
+                best_move = move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self._table[key] = TableEntry(depth, score_to_table(best_score, ply),
+                                      bound, best_move)
+        return best_score
+
+
+class PonderRecord(NamedTuple):
+    """Statistics for one engine move made with pondering enabled."""
+    predicted: Optional[Move]
+    actual: Move
+    ponder_seconds: float
+    ponder_depth: int
+    think_seconds: float
+
+    def hit(self) -> bool:
+        """(bool): Return True iff the human played the predicted move."""
+        return self.predicted == self.actual
+
+
+class Ponderer:
+    """Searches the position after the human's most likely reply in a
+    background thread while the human is thinking.
+
+    Usage:
+        ponderer.start(board, whites_turn)    # right after the engine moves
+        ...human chooses a move...
+        result = ponderer.think(board, whites_turn, human_move)
+    """
+
+    def __init__(self, engine: Engine, depth: int,
+                 time_limit: Optional[float] = None) -> None:
+        """
+        Parameters:
+            engine (Engine): The engine, shared with the background search.
+            depth (int): The depth of the engine's own searches.
+            time_limit (float | None): The time limit of the engine's own
+                searches, in seconds.
+        """
+        self._engine = engine
+        self._depth = depth
+        self._time_limit = time_limit
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._predicted: Optional[Move] = None
+        self._ponder_result: Optional[SearchResult] = None
+        self._ponder_start = 0.0
+        self._ponder_seconds = 0.0
+        self.records: List[PonderRecord] = []
+
+    def start(self, board: Board, whites_turn: bool) -> None:
+        """Starts pondering. board is the position the human is to move in.
+
+        The predicted reply is the engine's best move for the human from the
+        transposition table, or a quick one-ply search if there is none.
+        """
+        self.cancel()
+        self._ponder_seconds = 0.0
+        line = self._engine.principal_variation(board, whites_turn, 1)
+        if line:
+            predicted = line[0]
+        else:
+            predicted = self._engine.search(board, whites_turn, 1).move
+        self._predicted = predicted
+        self._ponder_result = None
+        if predicted is None:
+            return
+
+        ponder_board = update_board(board, predicted)
+        self._stop = threading.Event()
+        self._ponder_start = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._ponder, args=(ponder_board, not whites_turn),
+            daemon=True)
+        self._thread.start()
+
+    def _ponder(self, board: Board, whites_turn: bool) -> None:
+        """The background search, run until it is stopped."""
+        self._ponder_result = self._engine.search(
+            board, whites_turn, self._depth, stop=self._stop)
+
+    def cancel(self) -> None:
+        """Stops the background search and waits for it to finish."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._ponder_seconds = time.perf_counter() - self._ponder_start
+
+    def think(self, board: Board, whites_turn: bool,
+              human_move: Move) -> SearchResult:
+        """Stops pondering and returns the engine's reply to human_move.
+
+        Parameters:
+            board (Board): The position after human_move was made.
+            whites_turn (bool): True iff it's white's turn (the engine's).
+            human_move (Move): The move the human actually played.
+
+        Returns:
+            (SearchResult): The engine's search result for board.
+        """
+        self.cancel()
+        start = time.perf_counter()
+        ponder = self._ponder_result
+        if (human_move == self._predicted and ponder is not None
+                and ponder.depth >= self._depth):
+            # Direct hit: the ponder search already finished this position
+            result = ponder
+        else:
+            # Whatever still applies is reached through the table
+            result = self._engine.search(board, whites_turn, self._depth,
+                                         self._time_limit)
+        think_seconds = time.perf_counter() - start
+        self.records.append(PonderRecord(
+            self._predicted, human_move, self._ponder_seconds,
+            ponder.depth if ponder else 0, think_seconds))
+        return result
+
+    def summary(self) -> str:
+        """(str): Return a one-line summary of pondering so far."""
+        if not self.records:
+            return "No pondered moves"
+        hits = sum(record.hit() for record in self.records)
+        think = sum(record.think_seconds for record in self.records)
+        ponder = sum(record.ponder_seconds for record in self.records)
+        return (f"{hits}/{len(self.records)} ponder hits, "
+                f"{think / len(self.records):.2f}s average think time, "
+                f"{ponder / len(self.records):.2f}s average ponder time")
+
+
+def measure_ponder_savings(num_moves: int = 6, depth: int = 3,
+                           human_seconds: float = 1.0
+                           ) -> List[Tuple[float, float]]:
+    """Measures the think time pondering saves per engine move.
+
+    The engine plays black against itself playing white (standing in for a
+    human who always plays the engine's preferred reply, and takes
+    human_seconds to do so). The same game is searched by an engine that
+    ponders and one that doesn't, and each engine move's think times are
+    returned and printed.
+
+    Parameters:
+        num_moves (int): The number of engine moves to measure.
+        depth (int): The search depth of both engines.
+        human_seconds (float): How long the simulated human thinks.
+
+    Returns:
+        (list<tuple<float, float>>): (plain, pondering) think seconds per move.
+    """
+    plain = Engine()
+    pondering = Engine()
+    ponderer = Ponderer(pondering, depth)
+    human = Engine()
+    board = initial_state()
+    times = []
+
+    for _ in range(num_moves):
+        human_move = human.search(board, True, depth).move
+        if human_move is None:
+            break
+        if times:
+            time.sleep(human_seconds)
+        board = update_board(board, human_move)
+
+        start = time.perf_counter()
+        reply = plain.search(board, False, depth).move
+        plain_seconds = time.perf_counter() - start
+        pondered = ponderer.think(board, False, human_move)
+        ponder_seconds = ponderer.records[-1].think_seconds
+        times.append((plain_seconds, ponder_seconds))
+        print(f"{move_name(human_move)} {move_name(reply)}: "
+              f"{plain_seconds:.3f}s without pondering, "
+              f"{ponder_seconds:.3f}s with "
+              f"({'hit' if ponderer.records[-1].hit() else 'miss'})")
+
+        if pondered.move is None:
+            break
+        board = update_board(board, reply)
+        ponderer.start(board, True)
+    ponderer.cancel()
+
+    saved = sum(plain_time - ponder_time for plain_time, ponder_time in times)
+    if times:
+        print(f"Average saving: {saved / len(times):.3f}s per move "
+              f"({ponderer.summary()})")
+    return times
+
+
+if __name__ == "__main__":
+    measure_ponder_savings()
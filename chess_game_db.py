@@ -0,0 +1,414 @@
+"""
+Position-indexed chess game database.
+
+Answers "in which archived games did this exact position occur, and what was
+played next?" without replaying every game. The database is a directory:
+
+    db_dir/
+        manifest.json       Segment list and game count.
+        games.bin           Every game's moves, as little-endian uint16 codes.
+        games.off           uint64 offset (in moves) of each game in games.bin,
+                            plus a final end offset.
+        games.res           int8 result of each game (WHITE_WIN/DRAW/BLACK_WIN,
+                            or UNKNOWN_RESULT).
+        index_00000.npy     Inverted index segments: INDEX_DTYPE records
+        index_00001.npy     (position hash, game id, ply, next move) sorted by
+        ...                 hash.
+
+Segments are memory-mapped and searched by binary search. Adding games
+writes a new segment rather than rebuilding the index; compact() merges the
+segments when there are many of them.
+
+The manifest is written last, so it is what commits a batch of games. Games
+appended to games.bin, games.off and games.res by a batch that never reached
+the manifest (an add interrupted by a crash) are cut off again when the
+database is next opened.
+
+Usage:
+    python chess_game_db.py build DB_DIR GAMES_FILE [--workers W]
+    python chess_game_db.py add DB_DIR GAMES_FILE
+    python chess_game_db.py query DB_DIR e2e4 e7e5 ...
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from chess_support import *
+from chess import initial_state, is_move_valid, update_board
+from chess_positions import (BLACK_WIN, DRAW, WHITE_WIN, decode_move,
+                             encode_move, move_name, parse_move,
+                             position_hash, update_hash)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+GAMES_NAME = "games.bin"
+OFFSETS_NAME = "games.off"
+RESULTS_NAME = "games.res"
+NO_MOVE = 0xFFFF
+UNKNOWN_RESULT = 2
+RESULT_TOKENS = {"1-0": WHITE_WIN, "0-1": BLACK_WIN, "1/2-1/2": DRAW,
+                 "*": UNKNOWN_RESULT}
+DEFAULT_BATCH_GAMES = 100000
+DEFAULT_CHUNK_GAMES = 500
+
+INDEX_DTYPE = np.dtype([
+    ("hash", "<u8"),
+    ("game", "<u4"),
+    ("ply", "<u2"),
+    ("next", "<u2"),
+])
+
+
+class Occurrence(NamedTuple):
+    """An occurrence of a position: the game, the ply it was reached at and
+    the move played from it (None if the game ended there)."""
+    game: int
+    ply: int
+    next_move: Optional[Move]
+
+
+class MoveStatistics(NamedTuple):
+    """How often a move was played from a position, and how those games
+    ended."""
+    games: int
+    white_wins: int
+    draws: int
+    black_wins: int
+
+
+def read_games(path: str) -> Iterator[Tuple[List[Move], int]]:
+    """Yields (moves, result) for each game of a games file.
+
+    Each non-empty line holds one game as moves written "e2e4 e7e5 ...",
+    optionally followed by a result token: 1-0, 0-1, 1/2-1/2 or *.
+
+    Parameters:
+        path (str): The games file.
+    """
+    with open(path, "r") as file:
+        for line in file:
+            tokens = line.split()
+            if not tokens:
+                continue
+            result = UNKNOWN_RESULT
+            if tokens[-1] in RESULT_TOKENS:
+                result = RESULT_TOKENS[tokens.pop()]
+            yield [parse_move(token) for token in tokens], result
+
+
+def _index_games(job: Tuple[int, List[List[Move]], bool]) -> np.ndarray:
+    """Replays a chunk of games and returns their index records, unsorted.
+
+    Parameters:
+        job (tuple): The id of the chunk's first game, the games' moves and
+            whether to check each move with is_move_valid.
+
+    Returns:
+        (np.ndarray): One INDEX_DTYPE record per position of every game.
+    """
+    first_game, games, validate = job
+    records = np.empty(sum(len(moves) + 1 for moves in games),
+                       dtype=INDEX_DTYPE)
+    row = 0
+    for game, moves in enumerate(games, first_game):
+        board = initial_state()
+        whites_turn = True
+        key = position_hash(board, whites_turn)
+        for ply, move in enumerate(moves):
+            if validate and not is_move_valid(move, board, whites_turn):
+                raise ValueError(f"Game {game}: illegal move "
+                                 f"{move_name(move)} at ply {ply}")
+            records[row] = (key, game, ply, encode_move(move))
+            row += 1
+            key = update_hash(key, board, move)
+            board = update_board(board, move)
+            whites_turn = not whites_turn
+        records[row] = (key, game, len(moves), NO_MOVE)
+        row += 1
+    return records
+
+
+class GameDatabase:
+    """An on-disk game archive with an inverted position index."""
+
+    def __init__(self, path: str) -> None:
+        """Opens (or creates) the database in the directory path.
+
+        Parameters:
+            path (str): The database directory.
+        """
+        self._path = path
+        os.makedirs(path, exist_ok=True)
+        manifest_path = os.path.join(path, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as file:
+                self._manifest = json.load(file)
+            self._recover()
+        else:
+            self._manifest = {"version": MANIFEST_VERSION, "games": 0,
+                              "segments": [], "next_segment": 0}
+            with open(os.path.join(path, OFFSETS_NAME), "wb") as file:
+                file.write(np.zeros(1, dtype="<u8").tobytes())
+            open(os.path.join(path, GAMES_NAME), "wb").close()
+            open(os.path.join(path, RESULTS_NAME), "wb").close()
+            self._write_manifest()
+        self._segments: Optional[List[np.ndarray]] = None
+
+    def get_num_games(self) -> int:
+        """(int): Return the number of games in the database."""
+        return self._manifest["games"]
+
+    def _file(self, name: str) -> str:
+        """Returns the path of a file in the database directory."""
+        return os.path.join(self._path, name)
+
+    def _recover(self) -> None:
+        """Cuts the game files back to the games counted by the manifest,
+        dropping games appended by an add that didn't finish.
+
+        Raises:
+            ValueError: If the game files hold fewer games than the manifest.
+        """
+        games = self.get_num_games()
+        offsets = np.fromfile(self._file(OFFSETS_NAME), dtype="<u8")
+        results_size = os.path.getsize(self._file(RESULTS_NAME))
+        if len(offsets) - 1 < games or results_size < games:
+            raise ValueError(f"{self._path} holds fewer games than its "
+                             f"manifest counts ({games})")
+        moves_size = int(offsets[games]) * 2
+        if os.path.getsize(self._file(GAMES_NAME)) < moves_size:
+            raise ValueError(f"{self._path}: {GAMES_NAME} is truncated")
+        if len(offsets) - 1 > games or results_size > games:
+            for name, size in ((OFFSETS_NAME, (games + 1) * 8),
+                               (RESULTS_NAME, games),
+                               (GAMES_NAME, moves_size)):
+                os.truncate(self._file(name), size)
+
+    def _write_manifest(self) -> None:
+        """Atomically replaces the manifest."""
+        tmp_path = self._file(MANIFEST_NAME + ".tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(self._manifest, file, indent=2)
+        os.replace(tmp_path, self._file(MANIFEST_NAME))
+
+    def _load_segments(self) -> List[np.ndarray]:
+        """Returns every index segment, memory-mapped."""
+        if self._segments is None:
+            self._segments = [np.load(self._file(name), mmap_mode="r")
+                              for name in self._manifest["segments"]]
+        return self._segments
+
+    def add_games(self, games: Iterator[Tuple[List[Move], int]],
+                  workers: Optional[int] = None, validate: bool = True,
+                  batch_games: int = DEFAULT_BATCH_GAMES,
+                  chunk_games: int = DEFAULT_CHUNK_GAMES) -> int:
+        """Appends games to the archive and indexes them.
+
+        Games are read batch_games at a time, so memory is bounded by the
+        size of a batch. Each batch is split into chunks that are replayed in
+        parallel, and its records are sorted into one new index segment.
+
+        Parameters:
+            games (iterator): (moves, result) pairs, as from read_games.
+            workers (int | None): The number of worker processes.
+            validate (bool): Whether to check every move with is_move_valid.
+            batch_games (int): The number of games per index segment.
+            chunk_games (int): The number of games per worker task.
+
+        Returns:
+            (int): The number of games added.
+        """
+        added = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                batch = [game for _, game in zip(range(batch_games), games)]
+                if not batch:
+                    break
+                first_game = self.get_num_games()
+                jobs = [(first_game + start,
+                         [moves for moves, _ in batch[start:start + chunk_games]],
+                         validate)
+                        for start in range(0, len(batch), chunk_games)]
+                records = np.concatenate(list(pool.map(_index_games, jobs)))
+                self._append_games(batch)
+                self._write_segment(records)
+                added += len(batch)
+        return added
+
+    def _append_games(self, batch: List[Tuple[List[Move], int]]) -> None:
+        """Appends the moves, offsets and results of a batch of games."""
+        offsets = np.fromfile(self._file(OFFSETS_NAME), dtype="<u8")
+        end = int(offsets[-1])
+        new_offsets = []
+        with open(self._file(GAMES_NAME), "ab") as file:
+            for moves, _ in batch:
+                codes = np.array([encode_move(move) for move in moves],
+                                 dtype="<u2")
+                file.write(codes.tobytes())
+                end += len(moves)
+                new_offsets.append(end)
+        with open(self._file(OFFSETS_NAME), "ab") as file:
+            file.write(np.array(new_offsets, dtype="<u8").tobytes())
+        with open(self._file(RESULTS_NAME), "ab") as file:
+            file.write(np.array([result for _, result in batch],
+                                dtype="i1").tobytes())
+        self._manifest["games"] += len(batch)
+
+    def _write_segment(self, records: np.ndarray) -> None:
+        """Sorts records by hash and stores them as a new index segment."""
+        records = records[np.argsort(records["hash"], kind="stable")]
+        name = f"index_{self._manifest['next_segment']:05d}.npy"
+        tmp_path = self._file(name + ".tmp")
+        with open(tmp_path, "wb") as file:
+            np.save(file, records)
+        os.replace(tmp_path, self._file(name))
+        self._manifest["segments"].append(name)
+        self._manifest["next_segment"] += 1
+        self._write_manifest()
+        self._segments = None
+
+    def compact(self) -> None:
+        """Merges every index segment into one."""
+        segments = self._load_segments()
+        if len(segments) < 2:
+            return
+        old_names = list(self._manifest["segments"])
+        merged = np.concatenate([np.asarray(segment) for segment in segments])
+        self._segments = None
+        self._manifest["segments"] = []
+        self._write_segment(merged)
+        for name in old_names:
+            os.remove(self._file(name))
+
+    def find(self, board: Board, whites_turn: bool) -> List[Occurrence]:
+        """Returns every occurrence of a position in the archive.
+
+        Parameters:
+            board (Board): The board state.
+            whites_turn (bool): True iff it's white's turn.
+
+        Returns:
+            (list<Occurrence>): The occurrences, by segment then game.
+        """
+        return self.find_hash(position_hash(board, whites_turn))
+
+    def find_hash(self, key: int) -> List[Occurrence]:
+        """Returns every occurrence of the position with Zobrist hash key."""
+        occurrences = []
+        key = np.uint64(key)
+        for segment in self._load_segments():
+            hashes = segment["hash"]
+            start = np.searchsorted(hashes, key, side="left")
+            end = np.searchsorted(hashes, key, side="right")
+            for record in segment[start:end]:
+                next_code = int(record["next"])
+                occurrences.append(Occurrence(
+                    int(record["game"]), int(record["ply"]),
+                    None if next_code == NO_MOVE else decode_move(next_code)))
+        return occurrences
+
+    def next_move_statistics(self, board: Board, whites_turn: bool
+                             ) -> Dict[Move, MoveStatistics]:
+        """Returns, for each move played from a position, how many games
+            played it and how they ended.
+
+        Parameters:
+            board (Board): The board state.
+            whites_turn (bool): True iff it's white's turn.
+        """
+        results = np.memmap(self._file(RESULTS_NAME), dtype="i1", mode="r") \
+            if self.get_num_games() else np.zeros(0, dtype="i1")
+        counts: Dict[Move, List[int]] = {}
+        for occurrence in self.find(board, whites_turn):
+            if occurrence.next_move is None:
+                continue
+            tally = counts.setdefault(occurrence.next_move, [0, 0, 0, 0])
+            tally[0] += 1
+            result = int(results[occurrence.game])
+            if result == WHITE_WIN:
+                tally[1] += 1
+            elif result == DRAW:
+                tally[2] += 1
+            elif result == BLACK_WIN:
+                tally[3] += 1
+        return {move: MoveStatistics(*tally) for move, tally in
+                sorted(counts.items(), key=lambda item: -item[1][0])}
+
+    def get_game(self, game: int) -> List[Move]:
+        """Returns the moves of a game in the archive.
+
+        Parameters:
+            game (int): The game id.
+        """
+        offsets = np.memmap(self._file(OFFSETS_NAME), dtype="<u8", mode="r")
+        moves = np.memmap(self._file(GAMES_NAME), dtype="<u2", mode="r") \
+            if offsets[-1] else np.zeros(0, dtype="<u2")
+        start, end = int(offsets[game]), int(offsets[game + 1])
+        return [decode_move(int(code)) for code in moves[start:end]]
+
+
+def play_moves(texts: List[str]) -> Tuple[Board, bool]:
+    """Plays moves written as "e2e4" from the initial state.
+
+    Parameters:
+        texts (list<str>): The moves.
+
+    Returns:
+        (tuple): The board reached and whether it's white's turn.
+
+    Raises:
+        ValueError: If a move is malformed or illegal.
+    """
+    board = initial_state()
+    whites_turn = True
+    for ply, text in enumerate(texts):
+        move = parse_move(text)
+        if not is_move_valid(move, board, whites_turn):
+            raise ValueError(f"Illegal move {text} at ply {ply}")
+        board = update_board(board, move)
+        whites_turn = not whites_turn
+    return board, whites_turn
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=("build", "add", "query"))
+    parser.add_argument("db_dir")
+    parser.add_argument("arguments", nargs="*")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-validate", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "build" and os.path.exists(
+            os.path.join(args.db_dir, MANIFEST_NAME)):
+        parser.error(f"{args.db_dir} already holds a database; use add")
+    database = GameDatabase(args.db_dir)
+
+    if args.command in ("build", "add"):
+        start = time.perf_counter()
+        added = database.add_games(read_games(args.arguments[0]),
+                                   args.workers, not args.no_validate)
+        elapsed = time.perf_counter() - start
+        print(f"Indexed {added} games in {elapsed:.1f}s "
+              f"({database.get_num_games()} games in total)")
+        return
+
+    try:
+        board, whites_turn = play_moves(args.arguments)
+    except ValueError as error:
+        parser.error(str(error))
+    occurrences = database.find(board, whites_turn)
+    print(f"Position found {len(occurrences)} times")
+    for move, stats in database.next_move_statistics(board,
+                                                     whites_turn).items():
+        print(f"{move_name(move)}: {stats.games} games "
+              f"(+{stats.white_wins} ={stats.draws} -{stats.black_wins})")
+
+
+if __name__ == "__main__":
+    main()
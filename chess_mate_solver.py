@@ -0,0 +1,303 @@
+"""
+Mate-in-N solver for chess puzzles using depth-first proof-number search.
+
+The side to move in the given position is the attacker. OR nodes are
+positions with the attacker to move (one mating move is enough), AND nodes
+are positions with the defender to move (every reply must lose). Proof and
+disproof numbers are kept in a hash table keyed by the position's Zobrist
+hash and the number of plies left, so transpositions are solved once.
+
+Usage:
+    python chess_mate_solver.py [PUZZLE_FILE] [--record CSV_FILE]
+"""
+import argparse
+import csv
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from chess_support import *
+from chess import update_board
+from chess_positions import (has_legal_move, legal_moves, move_name,
+                             position_hash, update_hash)
+
+PROOF_INFINITY = 1 << 30
+DEFAULT_PUZZLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   "mate_puzzles.txt")
+PUZZLE_SEPARATOR = "|"
+
+# Key into the proof table: (position hash, plies left)
+TableKey = Tuple[int, int]
+
+
+class MateResult(NamedTuple):
+    """The outcome of a mate search. line is the proven mating line, or None
+    if there is no mate within the requested number of moves."""
+    line: Optional[List[Move]]
+    max_moves: int
+    nodes: int
+    seconds: float
+
+    def __str__(self) -> str:
+        """(str): Return the result in a human-readable format."""
+        if self.line is None:
+            return f"No mate within {self.max_moves}"
+        moves = (len(self.line) + 1) // 2
+        return f"Mate in {moves}: {' '.join(map(move_name, self.line))}"
+
+
+class MateSolver:
+    """A df-pn search for forced mates.
+
+    Each call to solve starts with a fresh proof table.
+    """
+
+    def __init__(self, node_limit: Optional[int] = None) -> None:
+        """
+        Parameters:
+            node_limit (int | None): The number of nodes after which a search
+                gives up (reported as no mate found).
+        """
+        self._node_limit = node_limit
+        self._table: Dict[TableKey, Tuple[int, int]] = {}
+        self._nodes = 0
+
+    def solve(self, board: Board, whites_turn: bool,
+              max_moves: int) -> MateResult:
+        """Searches for a mate by the side to move within max_moves moves.
+
+        Mates in 1, 2, ... max_moves are searched in turn, so the line found
+        is one of the shortest forced mates.
+
+        Parameters:
+            board (Board): The puzzle position.
+            whites_turn (bool): True iff it's white's turn (white attacks).
+            max_moves (int): The largest number of attacker moves allowed.
+
+        Returns:
+            (MateResult): The mating line if one exists, and search effort.
+        """
+        start = time.perf_counter()
+        self._table = {}
+        self._nodes = 0
+        key = position_hash(board, whites_turn)
+        line = None
+
+        for moves in range(1, max_moves + 1):
+            plies = 2 * moves - 1
+            self._search(board, whites_turn, key, plies, True,
+                         PROOF_INFINITY, PROOF_INFINITY)
+            proof, _ = self._table.get((key, plies), (1, 1))
+            if proof == 0:
+                line = self._mating_line(board, whites_turn, key, plies)
+                break
+            if self._out_of_nodes():
+                break
+
+        return MateResult(line, max_moves, self._nodes,
+                          time.perf_counter() - start)
+
+    def _out_of_nodes(self) -> bool:
+        """(bool): Return True iff the node limit has been reached."""
+        return self._node_limit is not None and self._nodes >= self._node_limit
+
+    def _evaluate_leaf(self, board: Board, whites_turn: bool, plies: int,
+                       attacking: bool) -> Optional[Tuple[int, int]]:
+        """Returns the (proof, disproof) numbers of a terminal node, or None
+            if the node must be expanded.
+        """
+        if attacking:
+            if plies == 0 or not has_legal_move(board, whites_turn):
+                return (PROOF_INFINITY, 0)
+            return None
+        if not has_legal_move(board, whites_turn):
+            if is_in_check(board, whites_turn):
+                return (0, PROOF_INFINITY)
+            return (PROOF_INFINITY, 0)
+        if plies == 0:
+            return (PROOF_INFINITY, 0)
+        return None
+
+    def _search(self, board: Board, whites_turn: bool, key: int, plies: int,
+                attacking: bool, proof_limit: int, disproof_limit: int) -> None:
+        """Expands the node until its proof number reaches proof_limit or its
+            disproof number reaches disproof_limit, storing the result.
+        """
+        self._nodes += 1
+        table_key = (key, plies)
+        proof, disproof = self._table.get(table_key, (1, 1))
+        if proof >= proof_limit or disproof >= disproof_limit:
+            return
+
+        terminal = self._evaluate_leaf(board, whites_turn, plies, attacking)
+        if terminal is not None:
+            self._table[table_key] = terminal
+            return
+
+        children = []
+        for move in legal_moves(board, whites_turn):
+            children.append((update_board(board, move),
+                             update_hash(key, board, move)))
+
+        while True:
+            # Proof numbers of the children, from this node's point of view:
+            # at OR nodes we need one proof, at AND nodes one disproof.
+            numbers = [self._table.get((child_key, plies - 1), (1, 1))
+                       for _, child_key in children]
+            if attacking:
+                proof = min(p for p, _ in numbers)
+                disproof = min(PROOF_INFINITY, sum(d for _, d in numbers))
+            else:
+                proof = min(PROOF_INFINITY, sum(p for p, _ in numbers))
+                disproof = min(d for _, d in numbers)
+
+            if (proof >= proof_limit or disproof >= disproof_limit
+                    or self._out_of_nodes()):
+                break
+
+            # Select the most promising child, and the runner up's number
+            index = 0 if attacking else 1
+            order = sorted(range(len(children)),
+                           key=lambda i: numbers[i][index])
+            best = order[0]
+            second = (numbers[order[1]][index] if len(order) > 1
+                      else PROOF_INFINITY)
+            best_proof, best_disproof = numbers[best]
+            if attacking:
+                child_proof_limit = min(proof_limit, second + 1)
+                child_disproof_limit = disproof_limit - disproof + best_disproof
+            else:
+                child_proof_limit = proof_limit - proof + best_proof
+                child_disproof_limit = min(disproof_limit, second + 1)
+
+            child_board, child_key = children[best]
+            self._search(child_board, not whites_turn, child_key, plies - 1,
+                         not attacking, child_proof_limit,
+                         child_disproof_limit)
+
+        self._table[table_key] = (proof, disproof)
+
+    def _mating_line(self, board: Board, whites_turn: bool, key: int,
+                     plies: int) -> List[Move]:
+        """Returns the moves of the proof tree stored in the table, following
+            a proven attacker move and the first defender reply at each step.
+        """
+        line = []
+        attacking = True
+        while plies > 0:
+            chosen = None
+            for move in legal_moves(board, whites_turn):
+                child_key = update_hash(key, board, move)
+                proof, _ = self._table.get((child_key, plies - 1), (1, 1))
+                if proof == 0:
+                    chosen = (move, child_key)
+                    if attacking:
+                        break
+                elif not attacking:
+                    # An unexplored reply is only possible once mate is found
+                    break
+            if chosen is None:
+                break
+            move, key = chosen
+            line.append(move)
+            board = update_board(board, move)
+            whites_turn = not whites_turn
+            attacking = not attacking
+            plies -= 1
+        return line
+
+
+def solve_mate(board: Board, whites_turn: bool, max_moves: int,
+               node_limit: Optional[int] = None) -> MateResult:
+    """Returns a forced mate by the side to move within max_moves, if any.
+
+    Parameters:
+        board (Board): The puzzle position.
+        whites_turn (bool): True iff it's white's turn.
+        max_moves (int): The largest number of attacker moves allowed.
+        node_limit (int | None): The number of nodes to give up after.
+    """
+    return MateSolver(node_limit).solve(board, whites_turn, max_moves)
+
+
+class Puzzle(NamedTuple):
+    """A benchmark puzzle. expected is the length of the shortest mate, or
+    0 if there is no mate within max_moves."""
+    name: str
+    board: Board
+    whites_turn: bool
+    max_moves: int
+    expected: int
+
+
+def read_puzzles(path: str) -> List[Puzzle]:
+    """Reads a puzzle file.
+
+    Each non-empty line that doesn't start with '#' is
+        name | rank8/rank7/.../rank1 | w or b | max moves | expected mate
+
+    Parameters:
+        path (str): The puzzle file.
+
+    Returns:
+        (list<Puzzle>): The puzzles in file order.
+    """
+    puzzles = []
+    with open(path, "r") as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, rows, side, max_moves, expected = (
+                field.strip() for field in line.split(PUZZLE_SEPARATOR))
+            board = tuple(rows.split("/"))
+            if len(board) != BOARD_SIZE or any(
+                    len(row) != BOARD_SIZE for row in board):
+                raise ValueError(f"Puzzle {name!r} is not an 8x8 board")
+            puzzles.append(Puzzle(name, board, side == "w", int(max_moves),
+                                  int(expected)))
+    return puzzles
+
+
+def run_benchmark(path: str = DEFAULT_PUZZLE_FILE,
+                  record: Optional[str] = None) -> bool:
+    """Solves every puzzle in the file and prints the time and nodes taken.
+
+    Parameters:
+        path (str): The puzzle file.
+        record (str | None): A CSV file to append the results to, so that
+            solve time and nodes can be tracked between runs.
+
+    Returns:
+        (bool): True iff every puzzle was solved as expected.
+    """
+    rows = []
+    all_passed = True
+    for puzzle in read_puzzles(path):
+        result = solve_mate(puzzle.board, puzzle.whites_turn,
+                            puzzle.max_moves)
+        found = 0 if result.line is None else (len(result.line) + 1) // 2
+        passed = found == puzzle.expected
+        all_passed = all_passed and passed
+        print(f"{puzzle.name:24} {'ok  ' if passed else 'FAIL'} "
+              f"{result.seconds:8.3f}s {result.nodes:9} nodes  {result}")
+        rows.append([time.strftime("%Y-%m-%d %H:%M:%S"), puzzle.name, found,
+                     passed, f"{result.seconds:.4f}", result.nodes])
+
+    if record is not None:
+        with open(record, "a", newline="") as file:
+            csv.writer(file).writerows(rows)
+    return all_passed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("puzzles", nargs="?", default=DEFAULT_PUZZLE_FILE)
+    parser.add_argument("--record", default=None)
+    args = parser.parse_args()
+    if not run_benchmark(args.puzzles, args.record):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Monte Carlo tree search (UCT) player for the chess game.
+
+An alternative to chess_engine.Engine: instead of searching every line to a
+fixed depth, MCTSPlayer grows a tree towards the most promising moves using
+the results of random playouts. Playouts run in parallel by root
+parallelisation: every worker process grows its own tree from the same root
+and the visit counts and values of the root's children are merged.
+
+Usage:
+    python chess_mcts.py [--playouts N | --seconds S] [--workers W]
+"""
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from chess_support import *
+from chess import initial_state, is_move_valid, update_board
+from chess_engine import evaluate
+from chess_positions import legal_moves, move_name, pieces_of
+
+DEFAULT_EXPLORATION = 1.4
+DEFAULT_PLAYOUT_DEPTH = 40
+CAPTURE_BIAS = 0.5
+EVALUATION_SCALE = 400.0
+
+
+class Node:
+    """A node of the search tree. value is the total playout reward from the
+    point of view of the player who made the move leading to this node."""
+
+    def __init__(self, board: Board, whites_turn: bool,
+                 move: Optional[Move] = None,
+                 parent: Optional["Node"] = None) -> None:
+        self.board = board
+        self.whites_turn = whites_turn
+        self.move = move
+        self.parent = parent
+        self.children: List["Node"] = []
+        self.untried: Optional[List[Move]] = None
+        self.visits = 0
+        self.value = 0.0
+
+    def is_expanded(self) -> bool:
+        """(bool): Return True iff every legal move has a child node."""
+        return self.untried is not None and not self.untried
+
+    def best_child(self, exploration: float) -> "Node":
+        """Returns the child with the highest UCT score."""
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: (
+            child.value / child.visits
+            + exploration * math.sqrt(log_visits / child.visits)))
+
+
+def random_move(board: Board, whites_turn: bool,
+                rng: random.Random) -> Optional[Move]:
+    """Returns a random valid move, or None if there isn't one.
+
+    Candidate moves are validated lazily in random order, so usually only one
+    call to is_move_valid is needed rather than one per legal move. With
+    probability CAPTURE_BIAS captures are tried first (a light guidance that
+    makes playouts less aimless).
+
+    Parameters:
+        board (Board): The board state.
+        whites_turn (bool): True iff it's white's turn.
+        rng (random.Random): The random source.
+    """
+    candidates = [(origin, destination)
+                  for origin in pieces_of(board, whites_turn)
+                  for destination in get_possible_moves(origin, board)]
+    rng.shuffle(candidates)
+    if rng.random() < CAPTURE_BIAS:
+        candidates.sort(key=lambda move: board[move[1][0]][move[1][1]] == EMPTY)
+    for move in candidates:
+        if is_move_valid(move, board, whites_turn):
+            return move
+    return None
+
+
+def playout(board: Board, whites_turn: bool, max_plies: int,
+            rng: random.Random) -> float:
+    """Plays random moves from board and returns the reward for white.
+
+    Parameters:
+        board (Board): The starting board state.
+        whites_turn (bool): True iff it's white's turn.
+        max_plies (int): The depth cap; positions still undecided after this
+            many plies are scored by the static evaluation.
+        rng (random.Random): The random source.
+
+    Returns:
+        (float): 1 for a white win, 0 for a black win, 0.5 for a draw, or the
+                 evaluation squashed into (0, 1) at the depth cap.
+    """
+    for _ in range(max_plies):
+        move = random_move(board, whites_turn, rng)
+        if move is None:
+            if is_in_check(board, whites_turn):
+                return 0.0 if whites_turn else 1.0
+            return 0.5
+        board = update_board(board, move)
+        whites_turn = not whites_turn
+    score = evaluate(board, True)
+    return 1.0 / (1.0 + math.exp(-score / EVALUATION_SCALE))
+
+
+class TreeSearch:
+    """A single-threaded UCT search from one root position."""
+
+    def __init__(self, board: Board, whites_turn: bool, seed: int,
+                 exploration: float = DEFAULT_EXPLORATION,
+                 playout_depth: int = DEFAULT_PLAYOUT_DEPTH) -> None:
+        self._root = Node(board, whites_turn)
+        self._rng = random.Random(seed)
+        self._exploration = exploration
+        self._playout_depth = playout_depth
+
+    def run(self, playouts: Optional[int], seconds: Optional[float]) -> int:
+        """Runs playouts until either limit is reached and returns the number
+            of playouts made. A time limit alone always allows one playout,
+            however short it is, so that the root has a move to choose.
+        """
+        deadline = None if seconds is None else time.perf_counter() + seconds
+        count = 0
+        while playouts is None or count < playouts:
+            if deadline is not None and count \
+                    and time.perf_counter() >= deadline:
+                break
+            self._iterate()
+            count += 1
+        return count
+
+    def _iterate(self) -> None:
+        """Runs one selection, expansion, playout and backup."""
+        node = self._root
+        while node.is_expanded() and node.children:
+            node = node.best_child(self._exploration)
+
+        if node.untried is None:
+            node.untried = legal_moves(node.board, node.whites_turn)
+            self._rng.shuffle(node.untried)
+        if node.untried:
+            move = node.untried.pop()
+            child = Node(update_board(node.board, move), not node.whites_turn,
+                         move, node)
+            node.children.append(child)
+            node = child
+
+        white_reward = playout(node.board, node.whites_turn,
+                               self._playout_depth, self._rng)
+        while node is not None:
+            node.visits += 1
+            # The player who moved into node is the one not to move in it
+            node.value += white_reward if not node.whites_turn \
+                else 1.0 - white_reward
+            node = node.parent
+
+    def root_statistics(self) -> Dict[Move, Tuple[int, float]]:
+        """(dict): Return (visits, value) of each child of the root."""
+        return {child.move: (child.visits, child.value)
+                for child in self._root.children}
+
+
+class SearchJob(NamedTuple):
+    board: Board
+    whites_turn: bool
+    seed: int
+    playouts: Optional[int]
+    seconds: Optional[float]
+    exploration: float
+    playout_depth: int
+
+
+def _run_job(job: SearchJob) -> Tuple[int, Dict[Move, Tuple[int, float]]]:
+    """Runs one worker's tree search and returns its playouts and root
+        statistics."""
+    search = TreeSearch(job.board, job.whites_turn, job.seed, job.exploration,
+                        job.playout_depth)
+    count = search.run(job.playouts, job.seconds)
+    return count, search.root_statistics()
+
+
+class MCTSResult(NamedTuple):
+    """The move chosen by a search, with the merged root statistics."""
+    move: Optional[Move]
+    win_rate: float
+    playouts: int
+    seconds: float
+    statistics: Dict[Move, Tuple[int, float]]
+
+    def playouts_per_second(self) -> float:
+        """(float): Return the playout rate over all workers."""
+        return self.playouts / self.seconds if self.seconds else 0.0
+
+
+class MCTSPlayer:
+    """Chooses moves by UCT search with root-parallel playouts."""
+
+    def __init__(self, workers: int = 1,
+                 exploration: float = DEFAULT_EXPLORATION,
+                 playout_depth: int = DEFAULT_PLAYOUT_DEPTH,
+                 seed: Optional[int] = None) -> None:
+        """
+        Parameters:
+            workers (int): The number of worker processes (1 searches in the
+                calling process).
+            exploration (float): The UCT exploration constant.
+            playout_depth (int): The number of plies after which a playout is
+                scored by the static evaluation.
+            seed (int | None): Seed for reproducible searches.
+        """
+        self._workers = workers
+        self._exploration = exploration
+        self._playout_depth = playout_depth
+        self._rng = random.Random(seed)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def close(self) -> None:
+        """Shuts down the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def choose_move(self, board: Board, whites_turn: bool,
+                    playouts: Optional[int] = None,
+                    seconds: Optional[float] = None) -> MCTSResult:
+        """Searches board and returns the most visited root move.
+
+        Parameters:
+            board (Board): The board state.
+            whites_turn (bool): True iff it's white's turn.
+            playouts (int | None): The total number of playouts to run,
+                shared between the workers.
+            seconds (float | None): The wall time to search for.
+
+        Returns:
+            (MCTSResult): The chosen move and search statistics. The move is
+                None only if there is no legal move.
+
+        Raises:
+            ValueError: If neither limit is given, playouts isn't positive or
+                seconds is negative.
+        """
+        if playouts is None and seconds is None:
+            raise ValueError("A playout count or time limit is required")
+        if playouts is not None and playouts < 1:
+            raise ValueError("At least one playout is required")
+        if seconds is not None and seconds < 0:
+            raise ValueError("The time limit can't be negative")
+
+        start = time.perf_counter()
+        jobs = []
+        for index in range(self._workers):
+            share = None
+            if playouts is not None:
+                share = playouts // self._workers \
+                    + (index < playouts % self._workers)
+            jobs.append(SearchJob(board, whites_turn, self._rng.getrandbits(32),
+                                  share, seconds, self._exploration,
+                                  self._playout_depth))
+
+        if self._workers == 1:
+            results = [_run_job(jobs[0])]
+        else:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self._workers)
+            results = list(self._pool.map(_run_job, jobs))
+
+        total = 0
+        merged: Dict[Move, Tuple[int, float]] = {}
+        for count, statistics in results:
+            total += count
+            for move, (visits, value) in statistics.items():
+                old_visits, old_value = merged.get(move, (0, 0.0))
+                merged[move] = (old_visits + visits, old_value + value)
+
+        best = max(merged, key=lambda move: merged[move][0], default=None)
+        win_rate = merged[best][1] / merged[best][0] if best else 0.0
+        return MCTSResult(best, win_rate, total, time.perf_counter() - start,
+                          merged)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--playouts", type=int, default=None)
+    parser.add_argument("--seconds", type=float, default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--depth", type=int, default=DEFAULT_PLAYOUT_DEPTH)
+    args = parser.parse_args()
+    if args.playouts is None and args.seconds is None:
+        args.seconds = 5.0
+
+    player = MCTSPlayer(args.workers, playout_depth=args.depth)
+    result = player.choose_move(initial_state(), True, args.playouts,
+                                args.seconds)
+    player.close()
+    print(f"Best move {move_name(result.move)} "
+          f"(win rate {result.win_rate:.2f}), {result.playouts} playouts in "
+          f"{result.seconds:.2f}s, "
+          f"{result.playouts_per_second():.0f} playouts/s "
+          f"over {args.workers} workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Position utilities shared by the chess tools.
+
+Provides Zobrist hashing of board states, legal move generation built on
+get_possible_moves/is_move_valid, and silent outcome detection (the
+functions in chess.py print as a side effect, which the tools can't use).
+"""
+import random
+from typing import Dict, List, Optional, Tuple
+
+from chess_support import *
+from chess import is_move_valid
+
+# Results, from white's point of view
+WHITE_WIN = 1
+DRAW = 0
+BLACK_WIN = -1
+
+# Integer codes for pieces, used by hashing and the fixed-width encodings
+PIECE_CODES: Dict[str, int] = {
+    EMPTY: 0,
+    WHITE_PAWN: 1,
+    WHITE_KNIGHT: 2,
+    WHITE_BISHOP: 3,
+    WHITE_ROOK: 4,
+    WHITE_QUEEN: 5,
+    WHITE_KING: 6,
+    BLACK_PAWN: 7,
+    BLACK_KNIGHT: 8,
+    BLACK_BISHOP: 9,
+    BLACK_ROOK: 10,
+    BLACK_QUEEN: 11,
+    BLACK_KING: 12,
+}
+CODE_PIECES = {code: piece for piece, code in PIECE_CODES.items()}
+
+NUM_SQUARES = BOARD_SIZE * BOARD_SIZE
+ZOBRIST_SEED = 20210901
+
+_zobrist_rng = random.Random(ZOBRIST_SEED)
+ZOBRIST_PIECES: Dict[str, Tuple[int, ...]] = {
+    piece: tuple(_zobrist_rng.getrandbits(64) for _ in range(NUM_SQUARES))
+    for piece in PIECE_CODES
+    if piece != EMPTY
+}
+ZOBRIST_BLACK_TO_MOVE = _zobrist_rng.getrandbits(64)
+
+
+def position_hash(board: Board, whites_turn: bool) -> int:
+    """Returns the 64-bit Zobrist hash of a board state and side to move.
+
+    Parameters:
+        board (Board): The board state.
+        whites_turn (bool): True iff it's white's turn.
+
+    Returns:
+        (int): An unsigned 64-bit hash of the position.
+    """
+    key = 0 if whites_turn else ZOBRIST_BLACK_TO_MOVE
+    for row, row_str in enumerate(board):
+        for col, piece in enumerate(row_str):
+            if piece != EMPTY:
+                key ^= ZOBRIST_PIECES[piece][row * BOARD_SIZE + col]
+    return key
+
+
+def update_hash(key: int, board: Board, move: Move) -> int:
+    """Returns the hash of the position reached by making move on board,
+        given the hash of board itself. Only the squares touched by the move
+        are visited, and the side to move is flipped.
+
+    Parameters:
+        key (int): The hash of board (as returned by position_hash).
+        board (Board): The board state before the move.
+        move (Move): The move being made.
+
+    Returns:
+        (int): The hash of the position after the move.
+    """
+    (from_row, from_col), (to_row, to_col) = move
+    piece = board[from_row][from_col]
+    captured = board[to_row][to_col]
+    key ^= ZOBRIST_PIECES[piece][from_row * BOARD_SIZE + from_col]
+    key ^= ZOBRIST_PIECES[piece][to_row * BOARD_SIZE + to_col]
+    if captured != EMPTY:
+        key ^= ZOBRIST_PIECES[captured][to_row * BOARD_SIZE + to_col]
+    return key ^ ZOBRIST_BLACK_TO_MOVE
+
+
+def pieces_of(board: Board, whites_turn: bool) -> List[Position]:
+    """Returns the positions of every piece belonging to the player.
+
+    Parameters:
+        board (Board): The board state.
+        whites_turn (bool): True iff it's white's turn.
+
+    Returns:
+        (list<Position>): The (row, col) positions, in board order.
+    """
+    own_pieces = WHITE_PIECES if whites_turn else BLACK_PIECES
+    return [
+        (row, col)
+        for row, row_str in enumerate(board)
+        for col, piece in enumerate(row_str)
+        if piece in own_pieces
+    ]
+
+
+def legal_moves(board: Board, whites_turn: bool) -> List[Move]:
+    """Returns every valid move for the player whose turn it is.
+
+    Parameters:
+        board (Board): The board state.
+        whites_turn (bool): True iff it's white's turn.
+
+    Returns:
+        (list<Move>): The legal moves, in board order of their origin.
+    """
+    moves = []
+    for origin in pieces_of(board, whites_turn):
+        for destination in get_possible_moves(origin, board):
+            move = (origin, destination)
+            if is_move_valid(move, board, whites_turn):
+                moves.append(move)
+    return moves
+
+
+def has_legal_move(board: Board, whites_turn: bool) -> bool:
+    """Returns True iff the player whose turn it is has a valid move.
+
+    Unlike chess.can_move, every piece is checked from its own square rather
+    than from the first square holding the same kind of piece.
+    """
+    for origin in pieces_of(board, whites_turn):
+        for destination in get_possible_moves(origin, board):
+            if is_move_valid((origin, destination), board, whites_turn):
+                return True
+    return False
+
+
+def game_outcome(board: Board, whites_turn: bool) -> Optional[int]:
+    """Returns the result of the game if the position is terminal, without
+        printing anything.
+
+    Parameters:
+        board (Board): The board state.
+        whites_turn (bool): True iff it's white's turn.
+
+    Returns:
+        (int | None): WHITE_WIN, BLACK_WIN or DRAW for checkmate or stalemate,
+                      or None if the player to move has a valid move.
+    """
+    if has_legal_move(board, whites_turn):
+        return None
+    if is_in_check(board, whites_turn):
+        return BLACK_WIN if whites_turn else WHITE_WIN
+    return DRAW
+
+
+def encode_board(board: Board) -> bytes:
+    """Returns the board as NUM_SQUARES piece codes in row-major order."""
+    return bytes(PIECE_CODES[piece] for row_str in board for piece in row_str)
+
+
+def encode_move(move: Move) -> int:
+    """Returns move packed as from_square * NUM_SQUARES + to_square."""
+    (from_row, from_col), (to_row, to_col) = move
+    return ((from_row * BOARD_SIZE + from_col) * NUM_SQUARES
+            + to_row * BOARD_SIZE + to_col)
+
+
+def decode_move(code: int) -> Move:
+    """Returns the move packed into code by encode_move."""
+    origin, destination = divmod(code, NUM_SQUARES)
+    return (divmod(origin, BOARD_SIZE), divmod(destination, BOARD_SIZE))
+
+
+def square_name(position: Position) -> str:
+    """Returns the chess notation (e.g. "e2") of a (row, col) position."""
+    row, col = position
+    return f"{chr(ord('a') + col)}{BOARD_SIZE - row}"
+
+
+def move_name(move: Move) -> str:
+    """Returns move in compact notation, e.g. "e2e4"."""
+    origin, destination = move
+    return square_name(origin) + square_name(destination)
+
+
+def parse_move(text: str) -> Move:
+    """Parses a move written as "e2e4" or "e2 e4".
+
+    Raises:
+        ValueError: If text is not a move in either format.
+    """
+    text = text.replace(" ", "")
+    if len(text) != 4 or not valid_move_format(f"{text[:2]} {text[2:]}"):
+        raise ValueError(f"Invalid move: {text!r}")
+    squares = []
+    for square in (text[:2], text[2:]):
+        col = ord(square[0].lower()) - ord("a")
+        row = BOARD_SIZE - int(square[1])
+        squares.append((row, col))
+    return (squares[0], squares[1])
+
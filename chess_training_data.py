@@ -0,0 +1,363 @@
+"""
+Sharded training-data generator for chess evaluation models.
+
+Games are played (random legal moves from a seeded RNG) or replayed (from a
+text file with one game per line, moves written as "e2e4 e7e5 ...") across a
+process pool. Positions are sampled from each game and written to fixed-width,
+memory-mappable NumPy shards together with a JSON manifest:
+
+    out_dir/
+        manifest.json
+        shard_00000.npy
+        shard_00001.npy
+        ...
+
+Each shard is a structured array with SAMPLE_DTYPE, so a shard can be opened
+with numpy.load(path, mmap_mode="r") without reading it into memory.
+
+Usage:
+    python chess_training_data.py OUT_DIR [--games N] [--replay FILE] ...
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set
+
+import numpy as np
+
+from chess import initial_state, update_board, is_move_valid
+from chess_positions import (DRAW, NUM_SQUARES, encode_board, encode_move,
+                             game_outcome, legal_moves, parse_move,
+                             position_hash, update_hash)
+
+MAX_LEGAL_MOVES = 256
+NO_MOVE = 0xFFFF
+DEFAULT_SHARD_SIZE = 65536
+DEFAULT_MAX_PLIES = 200
+DEFAULT_SEEN_CAPACITY = 1 << 22
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+SAMPLE_DTYPE = np.dtype([
+    ("hash", "<u8"),
+    ("board", "i1", (NUM_SQUARES,)),
+    ("white_to_move", "i1"),
+    ("ply", "<u2"),
+    ("num_legal", "<u2"),
+    ("legal", "<u2", (MAX_LEGAL_MOVES,)),
+    ("played", "<u2"),
+    ("outcome", "i1"),
+])
+
+
+class Sample(NamedTuple):
+    """A sampled position, as produced by a worker process."""
+    hash: int
+    board: bytes
+    white_to_move: bool
+    ply: int
+    legal: Sequence[int]
+    played: int
+    outcome: int
+
+
+class GameJob(NamedTuple):
+    """The work unit sent to a worker: either a seed to play a random game
+    from, or a list of moves to replay."""
+    game_id: int
+    seed: int
+    moves: Optional[Sequence[str]]
+    sample_rate: float
+    skip_plies: int
+    max_plies: int
+
+
+def _sample_game(job: GameJob) -> List[Sample]:
+    """Plays or replays a single game and returns its sampled positions.
+
+    The outcome of the game is only known once it ends, so samples are
+    collected first and stamped with the outcome afterwards.
+
+    Parameters:
+        job (GameJob): The game to play or replay.
+
+    Returns:
+        (list<Sample>): The sampled positions of the game.
+    """
+    rng = random.Random(job.seed)
+    board = initial_state()
+    whites_turn = True
+    key = position_hash(board, whites_turn)
+    pending = []
+    outcome = DRAW
+    scripted = None if job.moves is None else iter(job.moves)
+
+    for ply in range(job.max_plies):
+        moves = legal_moves(board, whites_turn)
+        if not moves:
+            outcome = game_outcome(board, whites_turn)
+            break
+
+        if scripted is None:
+            move = rng.choice(moves)
+        else:
+            text = next(scripted, None)
+            if text is None:
+                # Replayed game ended before a terminal position
+                outcome = DRAW
+                break
+            move = parse_move(text)
+            if not is_move_valid(move, board, whites_turn):
+                raise ValueError(f"Game {job.game_id}: illegal move {text} "
+                                 f"at ply {ply}")
+
+        if ply >= job.skip_plies and rng.random() < job.sample_rate:
+            pending.append((key, encode_board(board), whites_turn, ply,
+                            [encode_move(legal) for legal in moves],
+                            encode_move(move)))
+
+        key = update_hash(key, board, move)
+        board = update_board(board, move)
+        whites_turn = not whites_turn
+
+    return [Sample(*fields, outcome) for fields in pending]
+
+
+class GenerationStats(NamedTuple):
+    """Summary of a generation run."""
+    games: int
+    positions_seen: int
+    positions_written: int
+    duplicates: int
+    shards: int
+    seconds: float
+
+    def positions_per_second(self) -> float:
+        """(float): Sampled positions processed per wall-clock second."""
+        return self.positions_seen / self.seconds if self.seconds else 0.0
+
+
+class SeenHashes:
+    """A bounded set of position hashes used for deduplication.
+
+    Two generations of hashes are kept. When the current generation reaches
+    half the capacity it becomes the previous one and the old previous
+    generation is dropped, so memory stays bounded and the most recently seen
+    positions are always remembered. Duplicates further apart than that may
+    slip through.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """
+        Parameters:
+            capacity (int): The maximum number of hashes held at once.
+        """
+        self._limit = max(1, capacity // 2)
+        self._current: Set[int] = set()
+        self._previous: Set[int] = set()
+
+    def add(self, key: int) -> bool:
+        """Records key and returns True iff it had not been seen before."""
+        if key in self._current or key in self._previous:
+            return False
+        if len(self._current) >= self._limit:
+            self._previous = self._current
+            self._current = set()
+        self._current.add(key)
+        return True
+
+
+class ShardWriter:
+    """Buffers samples into a fixed-size structured array and flushes it to
+    numbered .npy shards, recording each shard in the manifest."""
+
+    def __init__(self, out_dir: str, shard_size: int) -> None:
+        """
+        Parameters:
+            out_dir (str): The directory to write shards into.
+            shard_size (int): The number of samples per shard.
+        """
+        self._out_dir = out_dir
+        self._buffer = np.zeros(shard_size, dtype=SAMPLE_DTYPE)
+        self._count = 0
+        self.shards: List[dict] = []
+
+    def write(self, sample: Sample) -> None:
+        """Appends a sample, flushing the buffer when it is full."""
+        num_legal = min(len(sample.legal), MAX_LEGAL_MOVES)
+        row = self._buffer[self._count]
+        row["hash"] = sample.hash
+        row["board"] = np.frombuffer(sample.board, dtype=np.int8)
+        row["white_to_move"] = sample.white_to_move
+        row["ply"] = sample.ply
+        row["num_legal"] = num_legal
+        row["legal"][:num_legal] = sample.legal[:num_legal]
+        row["legal"][num_legal:] = NO_MOVE
+        row["played"] = sample.played
+        row["outcome"] = sample.outcome
+        self._count += 1
+        if self._count == len(self._buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes any buffered samples to a new shard."""
+        if not self._count:
+            return
+        name = f"shard_{len(self.shards):05d}.npy"
+        path = os.path.join(self._out_dir, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            np.save(file, self._buffer[:self._count])
+        os.replace(tmp_path, path)
+        self.shards.append({"file": name, "samples": self._count})
+        self._count = 0
+
+
+def read_games(path: str) -> Iterator[List[str]]:
+    """Yields the move lists of a games file, one game per non-empty line.
+
+    Parameters:
+        path (str): The games file, with moves written as "e2e4 e7e5 ...".
+    """
+    with open(path, "r") as file:
+        for line in file:
+            moves = line.split()
+            if moves:
+                yield moves
+
+
+def _jobs(games: Iterable[Optional[List[str]]], seed: int, sample_rate: float,
+          skip_plies: int, max_plies: int) -> Iterator[GameJob]:
+    """Yields a GameJob for every game, with a distinct per-game seed."""
+    for game_id, moves in enumerate(games):
+        yield GameJob(game_id, seed * 1000003 + game_id, moves, sample_rate,
+                      skip_plies, max_plies)
+
+
+def generate(out_dir: str, num_games: int = 100,
+             replay_file: Optional[str] = None, seed: int = 0,
+             sample_rate: float = 0.25, skip_plies: int = 0,
+             max_plies: int = DEFAULT_MAX_PLIES,
+             shard_size: int = DEFAULT_SHARD_SIZE,
+             seen_capacity: int = DEFAULT_SEEN_CAPACITY,
+             workers: Optional[int] = None,
+             max_in_flight: Optional[int] = None) -> GenerationStats:
+    """Generates a sharded training set and its manifest in out_dir.
+
+    Memory use is bounded by the shard buffer, the deduplication set and the
+    number of games in flight: games are submitted to the pool in batches of
+    at most max_in_flight rather than all at once.
+
+    Parameters:
+        out_dir (str): The directory to write the shards and manifest into.
+        num_games (int): The number of random games to play. Ignored when
+            replay_file is given.
+        replay_file (str | None): A games file to replay instead of playing.
+        seed (int): The seed that all per-game seeds are derived from.
+        sample_rate (float): The probability that a position is sampled.
+        skip_plies (int): The number of opening plies never sampled.
+        max_plies (int): The ply after which a game is adjudicated a draw.
+        shard_size (int): The number of samples per shard.
+        seen_capacity (int): The number of hashes kept for deduplication.
+        workers (int | None): The number of worker processes.
+        max_in_flight (int | None): The number of games submitted at once.
+
+    Returns:
+        (GenerationStats): A summary of the run.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if replay_file is not None:
+        games: Iterable[Optional[List[str]]] = read_games(replay_file)
+    else:
+        games = (None for _ in range(num_games))
+    jobs = _jobs(games, seed, sample_rate, skip_plies, max_plies)
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 8
+    writer = ShardWriter(out_dir, shard_size)
+    seen = SeenHashes(seen_capacity)
+    num_played = positions_seen = duplicates = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = [job for _, job in zip(range(max_in_flight), jobs)]
+            if not batch:
+                break
+            for samples in pool.map(_sample_game, batch):
+                num_played += 1
+                for sample in samples:
+                    positions_seen += 1
+                    if seen.add(sample.hash):
+                        writer.write(sample)
+                    else:
+                        duplicates += 1
+            elapsed = time.perf_counter() - start
+            print(f"{num_played} games, {positions_seen} positions "
+                  f"({positions_seen / elapsed:.0f} positions/s)")
+    writer.flush()
+
+    stats = GenerationStats(num_played, positions_seen,
+                            positions_seen - duplicates, duplicates,
+                            len(writer.shards), time.perf_counter() - start)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "dtype": SAMPLE_DTYPE.descr,
+        "max_legal_moves": MAX_LEGAL_MOVES,
+        "no_move": NO_MOVE,
+        "move_encoding": "from_square * 64 + to_square, square = row * 8 + col",
+        "shards": writer.shards,
+        "stats": dict(stats._asdict(),
+                      positions_per_second=stats.positions_per_second()),
+        "source": {
+            "replay_file": replay_file,
+            "seed": seed,
+            "sample_rate": sample_rate,
+            "skip_plies": skip_plies,
+            "max_plies": max_plies,
+        },
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as file:
+        json.dump(manifest, file, indent=2)
+    return stats
+
+
+def load_shards(out_dir: str) -> List[np.ndarray]:
+    """Returns every shard listed in the manifest as a read-only memory map.
+
+    Parameters:
+        out_dir (str): A directory written by generate.
+    """
+    with open(os.path.join(out_dir, MANIFEST_NAME), "r") as file:
+        manifest = json.load(file)
+    return [np.load(os.path.join(out_dir, shard["file"]), mmap_mode="r")
+            for shard in manifest["shards"]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("out_dir")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--replay", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sample-rate", type=float, default=0.25)
+    parser.add_argument("--skip-plies", type=int, default=0)
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    stats = generate(args.out_dir, args.games, args.replay, args.seed,
+                     args.sample_rate, args.skip_plies, args.max_plies,
+                     args.shard_size, workers=args.workers)
+    print(f"Wrote {stats.positions_written} positions "
+          f"({stats.duplicates} duplicates skipped) to {stats.shards} shards "
+          f"in {stats.seconds:.1f}s, "
+          f"{stats.positions_per_second():.0f} positions/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""
+Line-based stdin/stdout protocol mode for the chess engine, modelled on UCI.
+
+Supported commands:
+    uci                                 -> id lines and "uciok"
+    isready                             -> "readyok"
+    ucinewgame                          Start a new game.
+    position startpos [moves m1 m2 ...]
+    position board RANK8/.../RANK1 w|b [moves m1 m2 ...]
+    go [depth D] [movetime MS] [infinite]
+                                        -> "info ..." lines, "bestmove MOVE"
+    setoption name Engine value AlphaBeta|MCTS
+                                        Choose the alpha-beta engine (the
+                                        default) or the UCT player of
+                                        chess_mcts.
+    stop                                Stop the current search.
+    d                                   Print the current board.
+    quit
+
+Moves are written as "e2e4". Boards use the same characters as chess.py.
+
+The MCTS player can't be interrupted: it searches for the movetime (or
+MCTS_DEFAULT_SECONDS), ignoring depth, and stop waits for it to finish.
+
+Usage:
+    python chess.py uci
+"""
+import os
+import sys
+import threading
+import time
+from typing import List, Optional, TextIO, Tuple
+
+from chess_support import *
+from chess import initial_state, is_move_valid, update_board
+from chess_engine import Engine, MATE_SCORE, SearchResult
+from chess_mcts import MCTSPlayer
+from chess_positions import move_name, parse_move, position_hash, update_hash
+
+ENGINE_NAME = "game_practice chess"
+DEFAULT_DEPTH = 4
+MAX_DEPTH = 64
+INFO_INTERVAL = 1.0
+ENGINE_CHOICES = ("AlphaBeta", "MCTS")
+MCTS_DEFAULT_SECONDS = 2.0
+
+
+class GameState:
+    """The position the protocol is working on, updated move by move.
+
+    The boards and hashes reached along the way are kept so that a
+    "position" command that extends the current game only applies the new
+    moves, and one that takes moves back only pops them, instead of replaying
+    every move from initial_state().
+    """
+
+    def __init__(self, board: Optional[Board] = None,
+                 whites_turn: bool = True) -> None:
+        """
+        Parameters:
+            board (Board | None): The starting board, or the initial state.
+            whites_turn (bool): True iff it's white's turn at the start.
+        """
+        self._start = (board or initial_state(), whites_turn)
+        self._moves: List[Move] = []
+        self._stack: List[Tuple[Board, bool, int]] = []
+        board, whites_turn = self._start
+        self._stack.append((board, whites_turn,
+                            position_hash(board, whites_turn)))
+
+    def get_start(self) -> Tuple[Board, bool]:
+        """(tuple): Return the starting board and side to move."""
+        return self._start
+
+    def get_board(self) -> Board:
+        """(Board): Return the current board."""
+        return self._stack[-1][0]
+
+    def is_whites_turn(self) -> bool:
+        """(bool): Return True iff it's white's turn."""
+        return self._stack[-1][1]
+
+    def get_hash(self) -> int:
+        """(int): Return the Zobrist hash of the current position."""
+        return self._stack[-1][2]
+
+    def push(self, move: Move) -> None:
+        """Makes a move.
+
+        Raises:
+            ValueError: If the move is not valid in the current position.
+        """
+        board, whites_turn, key = self._stack[-1]
+        if not is_move_valid(move, board, whites_turn):
+            raise ValueError(f"Illegal move {move_name(move)}")
+        self._stack.append((update_board(board, move), not whites_turn,
+                            update_hash(key, board, move)))
+        self._moves.append(move)
+
+    def pop(self) -> None:
+        """Takes back the last move."""
+        self._stack.pop()
+        self._moves.pop()
+
+    def set_moves(self, moves: List[Move]) -> None:
+        """Brings the game to the position after moves from the start,
+            reusing the longest common prefix with the current move list.
+
+        Raises:
+            ValueError: If one of the moves is illegal. The game is then
+                left in the position it was in before.
+        """
+        common = 0
+        while (common < len(moves) and common < len(self._moves)
+               and moves[common] == self._moves[common]):
+            common += 1
+        previous = self._moves[common:]
+        while len(self._moves) > common:
+            self.pop()
+        try:
+            for move in moves[common:]:
+                self.push(move)
+        except ValueError:
+            while len(self._moves) > common:
+                self.pop()
+            for move in previous:
+                self.push(move)
+            raise
+
+
+class ProtocolHandler:
+    """Reads commands and writes replies for one protocol session."""
+
+    def __init__(self, output: TextIO = sys.stdout) -> None:
+        """
+        Parameters:
+            output (TextIO): Where replies are written.
+        """
+        self._output = output
+        self._output_lock = threading.Lock()
+        self._engine = Engine()
+        self._mcts: Optional[MCTSPlayer] = None
+        self._state = GameState()
+        self._search_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def send(self, line: str) -> None:
+        """Writes a line of output and flushes it."""
+        with self._output_lock:
+            self._output.write(line + "\n")
+            self._output.flush()
+
+    def handle(self, line: str) -> bool:
+        """Handles one command line. Returns False once the session is over.
+
+        Parameters:
+            line (str): The command, as read from the input.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"option name Engine type combo default "
+                      f"{ENGINE_CHOICES[0]} "
+                      + " ".join(f"var {choice}" for choice in ENGINE_CHOICES))
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.stop()
+            self._engine = Engine()
+            self._state = GameState()
+        elif command == "position":
+            self.stop()
+            try:
+                self._position(arguments)
+            except ValueError as error:
+                self.send(f"info string {error}")
+        elif command == "go":
+            self.stop()
+            try:
+                self._go(arguments)
+            except ValueError as error:
+                self.send(f"info string {error}")
+        elif command == "setoption":
+            self.stop()
+            try:
+                self._setoption(arguments)
+            except ValueError as error:
+                self.send(f"info string {error}")
+        elif command == "stop":
+            self.stop()
+        elif command == "d":
+            board = self._state.get_board()
+            for i, row in enumerate(board):
+                self.send(f"{row}  {BOARD_SIZE - i}")
+            self.send(f"{'white' if self._state.is_whites_turn() else 'black'}"
+                      f" to move, hash {self._state.get_hash():016x}")
+        elif command == "quit":
+            self.stop()
+            if self._mcts is not None:
+                self._mcts.close()
+            return False
+        else:
+            self.send(f"info string Unknown command: {command}")
+        return True
+
+    def _position(self, arguments: List[str]) -> None:
+        """Handles the arguments of a "position" command."""
+        if "moves" in arguments:
+            split = arguments.index("moves")
+            setup, move_texts = arguments[:split], arguments[split + 1:]
+        else:
+            setup, move_texts = arguments, []
+
+        if setup == ["startpos"]:
+            start = (initial_state(), True)
+        elif len(setup) == 3 and setup[0] == "board":
+            board = tuple(setup[1].split("/"))
+            if len(board) != BOARD_SIZE or any(
+                    len(row) != BOARD_SIZE for row in board):
+                raise ValueError("Board must have 8 ranks of 8 squares")
+            unknown = set("".join(board)) - set(WHITE_PIECES + BLACK_PIECES
+                                                + (EMPTY,))
+            if unknown:
+                raise ValueError(f"Unknown pieces: {''.join(sorted(unknown))}")
+            if setup[2] not in ("w", "b"):
+                raise ValueError("The side to move must be 'w' or 'b'")
+            start = (board, setup[2] == "w")
+        else:
+            raise ValueError("Expected 'startpos' or 'board RANKS w|b'")
+
+        moves = [parse_move(text) for text in move_texts]
+        if start != self._state.get_start():
+            state = GameState(*start)
+            state.set_moves(moves)
+            self._state = state
+        else:
+            self._state.set_moves(moves)
+
+    def _setoption(self, arguments: List[str]) -> None:
+        """Handles the arguments of a "setoption" command."""
+        if len(arguments) != 4 or arguments[0] != "name" \
+                or arguments[2] != "value":
+            raise ValueError("Expected 'setoption name NAME value VALUE'")
+        name, value = arguments[1], arguments[3]
+        if name != "Engine":
+            raise ValueError(f"Unknown option: {name}")
+        if value not in ENGINE_CHOICES:
+            raise ValueError(f"Engine must be one of "
+                             f"{', '.join(ENGINE_CHOICES)}")
+        if value == "MCTS" and self._mcts is None:
+            self._mcts = MCTSPlayer(os.cpu_count() or 1)
+        elif value == "AlphaBeta" and self._mcts is not None:
+            self._mcts.close()
+            self._mcts = None
+
+    def _go(self, arguments: List[str]) -> None:
+        """Starts a background search for the arguments of a "go" command."""
+        depth = DEFAULT_DEPTH
+        time_limit = None
+        options = iter(arguments)
+        for option in options:
+            if option == "depth":
+                depth = _number_option(options, option, DEFAULT_DEPTH)
+            elif option == "movetime":
+                movetime = _number_option(options, option, None)
+                time_limit = None if movetime is None else movetime / 1000
+            elif option == "infinite":
+                depth = MAX_DEPTH
+        if time_limit is not None and "depth" not in arguments:
+            depth = MAX_DEPTH
+
+        self._stop = threading.Event()
+        if self._mcts is not None:
+            self._search_thread = threading.Thread(
+                target=self._search_mcts, daemon=True,
+                args=(self._state.get_board(), self._state.is_whites_turn(),
+                      time_limit or MCTS_DEFAULT_SECONDS))
+            self._search_thread.start()
+            return
+        self._search_thread = threading.Thread(
+            target=self._search, daemon=True,
+            args=(self._state.get_board(), self._state.is_whites_turn(),
+                  depth, time_limit, self._stop))
+        self._search_thread.start()
+
+    def _search(self, board: Board, whites_turn: bool, depth: int,
+                time_limit: Optional[float], stop: threading.Event) -> None:
+        """Runs a search, reporting progress and then the best move."""
+        start = time.perf_counter()
+        done = threading.Event()
+
+        def report_progress() -> None:
+            while not done.wait(INFO_INTERVAL):
+                nodes = self._engine.get_nodes()
+                elapsed = time.perf_counter() - start
+                self.send(f"info nodes {nodes} nps {int(nodes / elapsed)} "
+                          f"time {int(elapsed * 1000)}")
+
+        def report_iteration(result: SearchResult) -> None:
+            pv = self._engine.principal_variation(board, whites_turn,
+                                                  result.depth)
+            nps = int(result.nodes / result.seconds) if result.seconds else 0
+            self.send(f"info depth {result.depth} score {format_score(result)}"
+                      f" nodes {result.nodes} nps {nps} "
+                      f"time {int(result.seconds * 1000)} "
+                      f"pv {' '.join(map(move_name, pv))}")
+
+        reporter = threading.Thread(target=report_progress, daemon=True)
+        reporter.start()
+        result = self._engine.search(board, whites_turn, depth, time_limit,
+                                     stop, report_iteration)
+        done.set()
+        reporter.join()
+        self.send("bestmove "
+                  + (move_name(result.move) if result.move else "0000"))
+
+    def _search_mcts(self, board: Board, whites_turn: bool,
+                     seconds: float) -> None:
+        """Runs a search with the MCTS player, then reports the best move."""
+        result = self._mcts.choose_move(board, whites_turn, seconds=seconds)
+        self.send(f"info nodes {result.playouts} "
+                  f"nps {int(result.playouts_per_second())} "
+                  f"time {int(result.seconds * 1000)} "
+                  f"string win rate {result.win_rate:.2f}")
+        self.send("bestmove "
+                  + (move_name(result.move) if result.move else "0000"))
+
+    def stop(self) -> None:
+        """Stops any running search, which still reports its best move."""
+        self._stop.set()
+        self.wait()
+
+    def wait(self) -> None:
+        """Waits for any running search to finish."""
+        if self._search_thread is not None:
+            self._search_thread.join()
+            self._search_thread = None
+
+
+def _number_option(options, name: str, default: Optional[int]
+                   ) -> Optional[int]:
+    """Returns the positive number following a "go" option, or default if
+    the command ends after the option.
+
+    Raises:
+        ValueError: If the value isn't a positive whole number.
+    """
+    value = next(options, None)
+    if value is None:
+        return default
+    if not value.isdigit() or int(value) == 0:
+        raise ValueError(f"Expected a positive number after {name}, "
+                         f"got {value!r}")
+    return int(value)
+
+
+def format_score(result: SearchResult) -> str:
+    """Returns the score of result as "cp N" or "mate N" (in moves)."""
+    if abs(result.score) >= MATE_SCORE - MAX_DEPTH:
+        plies = MATE_SCORE - abs(result.score)
+        moves = (plies + 1) // 2
+        return f"mate {moves if result.score > 0 else -moves}"
+    return f"cp {result.score}"
+
+
+def run(input_stream: TextIO = sys.stdin,
+        output: TextIO = sys.stdout) -> None:
+    """Runs a protocol session until "quit" or the end of the input."""
+    handler = ProtocolHandler(output)
+    for line in input_stream:
+        if not handler.handle(line):
+            return
+    handler.wait()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,156 @@
+"""
+Background autosaves of a running Hacker game, for crash recovery.
+
+The Tk thread only takes a snapshot: SaveData.from_game copies the grid's
+cell codes into an immutable bytes object, a single memory copy however the
+game goes on to change. Compressing, writing and syncing the save file (see
+hacker_save) happen on a worker thread. If the worker is still busy when a
+newer snapshot arrives, the older pending one is dropped, so a slow disk
+never makes snapshots pile up or the game wait.
+
+Autosaves are numbered files in one directory, of which the newest
+AUTOSAVE_KEEP are kept. A game that ends normally calls finish, which deletes
+them, so only a game that crashed is offered for restoring.
+"""
+import os
+import re
+import threading
+import time
+from typing import List, Optional
+
+from hacker_model import Game
+from hacker_save import SaveData, write_save
+
+AUTOSAVE_DIRECTORY = "autosaves"
+AUTOSAVE_NAME = "autosave-{:06d}.hks"
+AUTOSAVE_PATTERN = re.compile(r"autosave-(\d{6})\.hks")
+AUTOSAVE_KEEP = 3
+AUTOSAVE_INTERVAL = 10.0
+
+
+def list_autosaves(directory: str) -> List[str]:
+    """(list): Return the paths of the autosaves in directory, oldest
+    first."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, name)
+            for name in sorted(names) if AUTOSAVE_PATTERN.fullmatch(name)]
+
+
+def newest_autosave(directory: str) -> Optional[str]:
+    """(str | None): Return the path of the newest autosave in directory, or
+    None if there is none."""
+    autosaves = list_autosaves(directory)
+    return autosaves[-1] if autosaves else None
+
+
+class Autosaver:
+    """Writes snapshots of a game to rotating autosave files on a background
+    thread.
+
+    Usage:
+        autosaver = Autosaver(directory)
+        autosaver.offer(game, time_count, paused)    # after each step
+        ...
+        autosaver.finish()    # or close() to keep the autosaves
+    """
+
+    def __init__(self, directory: str, keep: int = AUTOSAVE_KEEP,
+                 interval: float = AUTOSAVE_INTERVAL) -> None:
+        """Starts the worker thread.
+
+        Parameters:
+            directory (str): Where to keep the autosaves (created if needed).
+            keep (int): The number of autosaves to keep.
+            interval (float): The least number of seconds between snapshots.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._keep = keep
+        self._interval = interval
+        self._last_snapshot = float("-inf")
+        self._pending: Optional[SaveData] = None
+        self._closed = False
+        self._condition = threading.Condition()
+
+        newest = newest_autosave(directory)
+        self._number = 0 if newest is None else \
+            int(AUTOSAVE_PATTERN.fullmatch(os.path.basename(newest)).group(1))
+        self.saves_written = 0
+        self.snapshots_dropped = 0
+        self.errors: List[OSError] = []
+
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+    def offer(self, game: Game, time_count: int, paused: bool,
+              force: bool = False) -> bool:
+        """Takes a snapshot of game for the worker to save, unless one was
+        taken less than the interval ago.
+
+        Parameters:
+            game (Game): The game to save.
+            time_count (int): The seconds the game has been played.
+            paused (bool): True iff the game is paused.
+            force (bool): Take the snapshot even within the interval.
+
+        Returns:
+            (bool): True iff a snapshot was taken.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_snapshot < self._interval:
+            return False
+        self._last_snapshot = now
+        snapshot = SaveData.from_game(game, time_count, paused)
+        with self._condition:
+            if self._pending is not None:
+                self.snapshots_dropped += 1
+            self._pending = snapshot
+            self._condition.notify()
+        return True
+
+    def _work(self) -> None:
+        """The worker thread: save each snapshot until closed."""
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                snapshot, self._pending = self._pending, None
+            if snapshot is None:
+                return
+            try:
+                self._write(snapshot)
+            except OSError as error:
+                self.errors.append(error)
+
+    def _write(self, snapshot: SaveData) -> None:
+        """Writes snapshot as the newest autosave and deletes the autosaves
+        beyond the newest keep."""
+        self._number += 1
+        write_save(os.path.join(self._directory,
+                                AUTOSAVE_NAME.format(self._number)), snapshot)
+        self.saves_written += 1
+        for path in list_autosaves(self._directory)[:-self._keep]:
+            os.unlink(path)
+
+    def close(self) -> None:
+        """Saves the pending snapshot, if any, and stops the worker."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def finish(self) -> None:
+        """Drops the pending snapshot, stops the worker and deletes the
+        autosaves, once the game has ended normally and there is nothing
+        left to recover."""
+        with self._condition:
+            self._pending = None
+        self.close()
+        for path in list_autosaves(self._directory):
+            try:
+                os.unlink(path)
+            except OSError as error:
+                self.errors.append(error)
@@ -0,0 +1,94 @@
+"""
+Benchmarks for the Hacker game model, run without opening a window.
+
+Usage:
+    python hacker_benchmark.py [TICKS] [SIZE]
+"""
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict
+
+import hacker_model
+from hacker_game_support import *
+
+BENCHMARK_SEED = 1001
+DEFAULT_TICKS = 20000
+ACTIONS = (LEFT, RIGHT, COLLECT, DESTROY, None)
+
+
+def _play(ticks: int, size: int) -> None:
+    """Plays a game for ticks steps with a random action before each step,
+    reading the entities every tick as the view does. A lost or won game is
+    replaced by a new one."""
+    game = hacker_model.Game(size)
+    for _ in range(ticks):
+        action = random.choice(ACTIONS)
+        if action in DIRECTIONS:
+            game.rotate_grid(action)
+        elif action in SHOT_TYPES:
+            game.fire(action)
+        if game.has_lost() or game.has_won():
+            game = hacker_model.Game(size)
+        game.step()
+        game.get_grid().get_entities()
+
+
+def count_allocations(ticks: int, size: int) -> Dict[str, int]:
+    """Returns the number of Position and Entity objects created while
+    playing, counted by temporarily wrapping their __init__.
+
+    __init__ rather than __new__ is wrapped because CPython can't undo an
+    assignment to __new__: the class would keep calling object.__new__ with
+    the constructor's arguments and fail from then on."""
+    counts = {"Position": 0, "Entity": 0}
+    classes = {Position: "Position", hacker_model.Entity: "Entity"}
+    #An __init__ defined on the class itself is put back, an inherited one
+    #is restored by deleting the wrapper
+    originals = {cls: vars(cls).get("__init__") for cls in classes}
+
+    def counting_init(name, original):
+        def __init__(self, *args, **kwargs):
+            counts[name] += 1
+            if original is not None:
+                original(self, *args, **kwargs)
+        return __init__
+
+    for cls, name in classes.items():
+        cls.__init__ = counting_init(name, originals[cls])
+    try:
+        random.seed(BENCHMARK_SEED)
+        _play(ticks, size)
+    finally:
+        for cls, original in originals.items():
+            if original is None:
+                del cls.__init__
+            else:
+                cls.__init__ = original
+    return counts
+
+
+def run(ticks: int = DEFAULT_TICKS, size: int = GRID_SIZE) -> None:
+    """Prints the time, peak traced memory and model object allocations of
+    a long headless run."""
+    random.seed(BENCHMARK_SEED)
+    start = time.perf_counter()
+    _play(ticks, size)
+    elapsed = time.perf_counter() - start
+
+    random.seed(BENCHMARK_SEED)
+    tracemalloc.start()
+    _play(ticks, size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    counts = count_allocations(ticks, size)
+    print(f"{ticks} ticks on a {size}x{size} grid: {elapsed:.3f}s "
+          f"({ticks / elapsed:.0f} ticks/s), peak traced memory "
+          f"{peak / 1024:.1f} KiB, {counts['Position']} Positions and "
+          f"{counts['Entity']} Entities created")
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:3]))
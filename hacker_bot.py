@@ -0,0 +1,333 @@
+"""
+Lookahead bot for the Hacker game.
+
+LookaheadBot chooses each tick's action by expectimax: it tries every action
+for a few ticks ahead, and averages over sampled spawns in between (drawn
+like Game.generate_entities). States are compact (the grid's entity codes as
+bytes in logical order and the number of collected entities) so they can be
+hashed, and a memo of state values means a state reached along several
+action sequences is only searched once. The root actions can be evaluated
+in parallel by a pool of worker processes.
+
+Usage:
+    python hacker_bot.py [GAMES] [DEPTH] [SAMPLES] [ACTIONS_PER_TICK] [WORKERS]
+"""
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from hacker_game_support import *
+from hacker_model import EMPTY_CELL, ENTITY_CODES, YCOORD_BOUND, Game
+from hacker_simulation import ACTIONS, Simulation
+
+DEFAULT_DEPTH = 2
+DEFAULT_SAMPLES = 4
+DEFAULT_ACTIONS_PER_TICK = 3
+WIN_SCORE = 1000.0
+LOSS_SCORE = -1000.0
+COLLECT_VALUE = 20.0
+DANGER_WEIGHT = 10.0
+OPPORTUNITY_WEIGHT = 1.0
+COLLECTABLE_CODE = ENTITY_CODES[COLLECTABLE]
+DESTROYABLE_CODE = ENTITY_CODES[DESTROYABLE]
+
+State = Tuple[bytes, int]
+
+
+def game_state(game: Game) -> State:
+    """(tuple): Return the entity codes of game's grid, row by row in
+    logical order, and the number of collectables acquired."""
+    grid = game.get_grid()
+    cells = b"".join(grid.get_row(y) for y in range(grid.get_size()))
+    return cells, game.get_num_collected()
+
+
+def sample_spawn(size: int, rng: random.Random) -> bytes:
+    """Returns a row of entity codes drawn like Game.generate_entities.
+
+    Parameters:
+        size (int): The number of columns of the grid.
+        rng (random.Random): The random source.
+    """
+    kinds = rng.choices(ENTITY_TYPES, k=rng.randint(0, size - 3))
+    if rng.randint(1, 4) % 4 == 0:
+        kinds.append(BLOCKER)
+    row = bytearray(size)
+    for x, kind in zip(rng.sample(range(size), len(kinds)), kinds):
+        row[x] = ENTITY_CODES[kind]
+    return bytes(row)
+
+
+def apply_action(state: State, action: str, size: int) -> State:
+    """Returns the state after action, as Game.rotate_grid or Game.fire
+    would leave it.
+
+    Parameters:
+        state (State): The grid codes and collected count.
+        action (str): One of ACTIONS.
+        size (int): The number of rows (columns) of the grid.
+    """
+    cells, collected = state
+    if action == LEFT or action == RIGHT:
+        shift = 1 if action == LEFT else size - 1
+        return b"".join(cells[start + shift:start + size]
+                        + cells[start:start + shift]
+                        for start in range(0, size * size, size)), collected
+    if action in SHOT_TYPES:
+        for index in range(YCOORD_BOUND * size + size // 2, size * size, size):
+            code = cells[index]
+            if code == EMPTY_CELL:
+                continue
+            if code == COLLECTABLE_CODE or (action == DESTROY
+                                            and code == DESTROYABLE_CODE):
+                if action == COLLECT:
+                    collected += 1
+                cells = cells[:index] + bytes(1) + cells[index + 1:]
+            break
+    return cells, collected
+
+
+def is_lost(state: State, size: int) -> bool:
+    """(bool): Return True iff the state is lost, as in Game.has_lost."""
+    return DESTROYABLE_CODE in state[0][YCOORD_BOUND * size:
+                                        (YCOORD_BOUND + 1) * size]
+
+
+def step_state(state: State, spawn: bytes, size: int) -> State:
+    """Returns the state after Game.step, with spawn as the new top row."""
+    cells, collected = state
+    return (bytes(size) + cells[(YCOORD_BOUND + 1) * size:] + spawn,
+            collected)
+
+
+def evaluate(state: State, size: int) -> float:
+    """Returns a heuristic value of a state that isn't over: collectables
+    acquired are good, destroyables are worse the closer they are, and
+    collectables are slightly better the closer they are."""
+    cells, collected = state
+    score = COLLECT_VALUE * collected
+    for y in range(YCOORD_BOUND, size):
+        row = cells[y * size:(y + 1) * size]
+        score -= DANGER_WEIGHT * row.count(DESTROYABLE_CODE) / y
+        score += OPPORTUNITY_WEIGHT * row.count(COLLECTABLE_CODE) / y
+    return score
+
+
+class Expectimax:
+    """An expectimax search over one fixed set of sampled spawns.
+
+    A tick is actions_per_tick actions (as a player pressing keys between
+    two steps) followed by a step, averaged over the sampled spawns. Every
+    chance node the same number of ticks ahead averages over the same spawns,
+    so the value of a state doesn't depend on the path to it and can be
+    memoised; for example, rotating left then right comes back to a state
+    that has already been searched.
+    """
+
+    def __init__(self, size: int, spawns: List[List[bytes]],
+                 actions_per_tick: int) -> None:
+        """
+        Parameters:
+            size (int): The number of rows (columns) of the grid.
+            spawns (list): spawns[t] are the rows averaged over when t + 1
+                more ticks are to be searched.
+            actions_per_tick (int): The actions played before each step.
+        """
+        self._size = size
+        self._spawns = spawns
+        self._actions_per_tick = actions_per_tick
+        self._memo: Dict[Tuple[State, int, int], float] = {}
+        self.nodes = 0
+        self.hits = 0
+
+    def action_value(self, state: State, action: str, ticks: int,
+                     moves: int) -> float:
+        """Returns the expected value of playing action in state and then the
+        best actions until ticks more steps have been made.
+
+        Parameters:
+            state (State): The state to play in.
+            action (str): One of ACTIONS.
+            ticks (int): The number of steps left to search (at least 1).
+            moves (int): The number of actions left before the next step,
+                including this one.
+        """
+        self.nodes += 1
+        size = self._size
+        state = apply_action(state, action, size)
+        if moves > 1:
+            return self.value(state, ticks, moves - 1)
+        if is_lost(state, size):
+            return LOSS_SCORE
+        if state[1] >= COLLECTION_TARGET:
+            return WIN_SCORE
+        spawns = self._spawns[ticks - 1]
+        return sum(self.value(step_state(state, spawn, size), ticks - 1,
+                              self._actions_per_tick)
+                   for spawn in spawns) / len(spawns)
+
+    def value(self, state: State, ticks: int, moves: int) -> float:
+        """Returns the value of state with ticks steps left to search and
+        moves actions before the next one."""
+        if ticks == 0:
+            return evaluate(state, self._size)
+        key = (state, ticks, moves)
+        value = self._memo.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        value = max(self.action_value(state, action, ticks, moves)
+                    for action in ACTIONS)
+        self._memo[key] = value
+        return value
+
+
+class ActionJob(NamedTuple):
+    state: State
+    action: str
+    ticks: int
+    moves: int
+    actions_per_tick: int
+    size: int
+    spawns: List[List[bytes]]
+
+
+def _evaluate_action(job: ActionJob) -> Tuple[float, int, int]:
+    """Returns the value of one root action with the nodes searched and memo
+        hits."""
+    search = Expectimax(job.size, job.spawns, job.actions_per_tick)
+    value = search.action_value(job.state, job.action, job.ticks, job.moves)
+    return value, search.nodes, search.hits
+
+
+class Decision(NamedTuple):
+    """An action chosen by the bot with the values of every action."""
+    action: str
+    values: Dict[str, float]
+    nodes: int
+    hits: int
+    seconds: float
+
+
+class LookaheadBot:
+    """Chooses actions for a Game by sampled expectimax."""
+
+    def __init__(self, depth: int = DEFAULT_DEPTH,
+                 samples: int = DEFAULT_SAMPLES,
+                 actions_per_tick: int = DEFAULT_ACTIONS_PER_TICK,
+                 workers: int = 1, seed: Optional[int] = None) -> None:
+        """
+        Parameters:
+            depth (int): The number of ticks to look ahead.
+            actions_per_tick (int): The number of actions the bot plays
+                between two steps.
+            samples (int): The number of spawns averaged over per tick.
+            workers (int): The number of worker processes evaluating root
+                actions (1 searches in the calling process, sharing one memo
+                between the actions).
+            seed (int | None): Seed of the spawn sampling.
+        """
+        self._depth = depth
+        self._samples = samples
+        self._actions_per_tick = actions_per_tick
+        self._workers = workers
+        self._rng = random.Random(seed)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._decisions = 0
+        self._seconds = 0.0
+
+    def close(self) -> None:
+        """Shuts down the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def get_actions_per_tick(self) -> int:
+        """(int): Return the number of actions played between two steps."""
+        return self._actions_per_tick
+
+    def decide(self, game: Game, moves: int = 1) -> Decision:
+        """Searches game and returns the best action with its statistics.
+
+        Parameters:
+            game (Game): The game to play in.
+            moves (int): The number of actions left before the next step,
+                including this one.
+        """
+        start = time.perf_counter()
+        size = game.get_grid().get_size()
+        state = game_state(game)
+        spawns = [[sample_spawn(size, self._rng)
+                   for _ in range(self._samples)]
+                  for _ in range(self._depth)]
+
+        if self._workers == 1:
+            search = Expectimax(size, spawns, self._actions_per_tick)
+            values = {action: search.action_value(state, action, self._depth,
+                                                  moves)
+                      for action in ACTIONS}
+            nodes, hits = search.nodes, search.hits
+        else:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self._workers)
+            jobs = [ActionJob(state, action, self._depth, moves,
+                              self._actions_per_tick, size, spawns)
+                    for action in ACTIONS]
+            results = list(self._pool.map(_evaluate_action, jobs))
+            values = {job.action: value
+                      for job, (value, _, _) in zip(jobs, results)}
+            nodes = sum(result[1] for result in results)
+            hits = sum(result[2] for result in results)
+
+        # Ties go to the first action in ACTIONS, so NOOP when nothing helps
+        action = max(ACTIONS, key=lambda action: values[action])
+        seconds = time.perf_counter() - start
+        self._decisions += 1
+        self._seconds += seconds
+        return Decision(action, values, nodes, hits, seconds)
+
+    def choose_action(self, game: Game, moves: int = 1) -> str:
+        """Returns the action to play in game."""
+        return self.decide(game, moves).action
+
+    def play_tick(self, simulation: Simulation) -> bool:
+        """Plays actions_per_tick actions in simulation and then steps it.
+
+        Returns:
+            (bool): True iff the game is over.
+        """
+        game = simulation.get_game()
+        for moves in range(self._actions_per_tick, 1, -1):
+            simulation.act(self.choose_action(game, moves))
+        return simulation.tick(self.choose_action(game))
+
+    def decisions_per_second(self) -> float:
+        """(float): Return the average decision rate so far."""
+        return self._decisions / self._seconds if self._seconds else 0.0
+
+
+def main(games: int = 20, depth: int = DEFAULT_DEPTH,
+         samples: int = DEFAULT_SAMPLES,
+         actions_per_tick: int = DEFAULT_ACTIONS_PER_TICK,
+         workers: int = 1) -> None:
+    """Plays games with the bot and prints the results and decision rate."""
+    bot = LookaheadBot(depth, samples, actions_per_tick, workers, seed=0)
+    wins = 0
+    ticks = 0
+    for seed in range(games):
+        simulation = Simulation(GRID_SIZE, seed)
+        while not bot.play_tick(simulation):
+            pass
+        wins += simulation.get_game().has_won()
+        ticks += simulation.get_ticks()
+    bot.close()
+    print(f"{wins}/{games} games won in {ticks} ticks, "
+          f"{bot.decisions_per_second():.1f} decisions/s (depth {depth}, "
+          f"{samples} samples, {actions_per_tick} actions per tick, "
+          f"{workers} workers)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:6]))
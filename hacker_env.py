@@ -0,0 +1,192 @@
+"""
+Gym-style environment for the Hacker game with preallocated observations.
+
+HackerEnv wraps a hacker_simulation.Simulation behind reset() and step().
+Observations are written into NumPy buffers allocated once by the
+environment, so every call returns the same arrays (later calls overwrite
+them; copy an observation to keep it). The grid is read straight from the
+model's cell storage (Grid.get_storage) instead of through get_entities or
+serialise.
+
+Observation (a dict, also reused):
+    "grid":  size x size uint8 entity codes indexed [y, x] (see
+             hacker_model.ENTITY_CODES, EMPTY_CELL for no entity)
+    "one_hot": (1 + entity types) x size x size bool planes, one per code,
+             if the environment was made with one_hot=True
+    "score": int64 [collected, destroyed, shots, ticks]
+
+Usage:
+    python hacker_env.py [STEPS] [SIZE]
+"""
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from hacker_game_support import *
+from hacker_model import CODE_ENTITIES
+from hacker_simulation import ACTIONS, DEFAULT_SEED, Simulation
+
+COLLECT_REWARD = 1.0
+DESTROY_REWARD = 0.1
+LOSS_REWARD = -1.0
+SCORE_FIELDS = ("collected", "destroyed", "shots", "ticks")
+DEFAULT_STEPS = 100000
+
+Observation = Dict[str, np.ndarray]
+
+
+class HackerEnv:
+    """A single Hacker game with a reset/step interface.
+
+    The reward of a step is COLLECT_REWARD per collectable acquired and
+    DESTROY_REWARD per entity destroyed (from Game.get_num_collected and
+    Game.get_num_destroyed), plus LOSS_REWARD when the game is lost. The
+    episode is done once the game is lost or won.
+    """
+
+    def __init__(self, size: int = GRID_SIZE,
+                 seed: Optional[int] = DEFAULT_SEED,
+                 one_hot: bool = False,
+                 collect_reward: float = COLLECT_REWARD,
+                 destroy_reward: float = DESTROY_REWARD,
+                 loss_reward: float = LOSS_REWARD) -> None:
+        """
+        Parameters:
+            size (int): The number of rows (columns) of the grid.
+            seed (int | None): The seed of the first game.
+            one_hot (bool): Also fill the one-hot planes of the observation.
+            collect_reward (float): The reward per collectable acquired.
+            destroy_reward (float): The reward per entity destroyed.
+            loss_reward (float): The reward for losing the game.
+        """
+        self._size = size
+        self._simulation = Simulation(size, seed)
+        self._rewards = (collect_reward, destroy_reward, loss_reward)
+
+        self._grid = np.zeros((size, size), dtype=np.uint8)
+        self._rows = np.zeros((size, size), dtype=np.uint8)
+        self._score = np.zeros(len(SCORE_FIELDS), dtype=np.int64)
+        self._observation: Observation = {"grid": self._grid,
+                                          "score": self._score}
+        if one_hot:
+            self._codes = np.arange(1 + len(CODE_ENTITIES),
+                                    dtype=np.uint8)[:, None, None]
+            self._one_hot = np.zeros((len(self._codes), size, size),
+                                     dtype=bool)
+            self._observation["one_hot"] = self._one_hot
+
+        # orders[origin] lists the storage rows (columns) in logical order
+        self._orders = (np.arange(size)[None, :]
+                        + np.arange(size)[:, None]) % size
+        self._storage: Optional[bytearray] = None
+        self._cells = self._grid
+        self._info: Dict[str, Any] = {"won": False, "lost": False}
+        self._last_score = (0, 0)
+
+    def get_simulation(self) -> Simulation:
+        """(Simulation): Return the simulation being played."""
+        return self._simulation
+
+    def reset(self, seed: Optional[int] = None) -> Observation:
+        """Starts a new game and returns its first observation.
+
+        Parameters:
+            seed (int | None): The seed of the new game; the current one if
+                not given.
+        """
+        self._simulation.reset(seed)
+        self._last_score = (0, 0)
+        self._info["won"] = self._info["lost"] = False
+        return self._observe()
+
+    def step(self, action: Union[int, str]
+             ) -> Tuple[Observation, float, bool, Dict[str, Any]]:
+        """Plays one tick.
+
+        Parameters:
+            action (int | str): An index into ACTIONS, or the action itself.
+
+        Returns:
+            (tuple): The observation, the reward, whether the game is over and
+                an info dict with "won" and "lost". The observation and info
+                are reused by the next call.
+        """
+        if not isinstance(action, str):
+            action = ACTIONS[action]
+        simulation = self._simulation
+        done = simulation.tick(action)
+
+        game = simulation.get_game()
+        collected = game.get_num_collected()
+        destroyed = game.get_num_destroyed()
+        collect_reward, destroy_reward, loss_reward = self._rewards
+        last_collected, last_destroyed = self._last_score
+        reward = (collect_reward * (collected - last_collected)
+                  + destroy_reward * (destroyed - last_destroyed))
+        self._last_score = (collected, destroyed)
+        if done:
+            lost = game.has_lost()
+            self._info["lost"] = lost
+            self._info["won"] = game.has_won()
+            if lost:
+                reward += loss_reward
+        return self._observe(), reward, done, self._info
+
+    def _observe(self) -> Observation:
+        """Writes the current game into the observation buffers."""
+        simulation = self._simulation
+        game = simulation.get_game()
+        storage, row_origin, column_origin = game.get_grid().get_storage()
+        if storage is not self._storage:
+            self._storage = storage
+            self._cells = np.frombuffer(storage, dtype=np.uint8).reshape(
+                self._size, self._size)
+
+        np.take(self._cells, self._orders[row_origin], axis=0, out=self._rows)
+        np.take(self._rows, self._orders[column_origin], axis=1,
+                out=self._grid)
+        if "one_hot" in self._observation:
+            np.equal(self._grid, self._codes, out=self._one_hot)
+
+        score = self._score
+        score[0] = game.get_num_collected()
+        score[1] = game.get_num_destroyed()
+        score[2] = game.get_total_shots()
+        score[3] = simulation.get_ticks()
+        return self._observation
+
+
+def _play(env: HackerEnv, actions: list) -> None:
+    """Steps env through actions, starting a new game after each one ends."""
+    env.reset()
+    for action in actions:
+        if env.step(action)[2]:
+            env.reset(env.get_simulation().get_seed() + 1)
+
+
+def benchmark(steps: int = DEFAULT_STEPS, size: int = GRID_SIZE) -> None:
+    """Prints the speed of steps random-action steps and the peak memory
+    traced while stepping, with and without one-hot planes."""
+    actions = np.random.default_rng(DEFAULT_SEED).integers(
+        0, len(ACTIONS), steps).tolist()
+    for one_hot in (False, True):
+        env = HackerEnv(size, one_hot=one_hot)
+        start = time.perf_counter()
+        _play(env, actions)
+        elapsed = time.perf_counter() - start
+
+        env = HackerEnv(size, one_hot=one_hot)
+        tracemalloc.start()
+        _play(env, actions)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"one_hot={one_hot}: {steps} steps in {elapsed:.3f}s "
+              f"({steps / elapsed:.0f} steps/s), peak traced memory "
+              f"{peak / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    benchmark(*(int(arg) for arg in sys.argv[1:3]))
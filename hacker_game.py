@@ -1,353 +1,24 @@
 from hacker_game_support import *
-import tkinter as tk
+from hacker_model import *
+from hacker_replay import GameRecorder, LOG_SUFFIX, new_seed
+from hacker_save import SaveData, load_save, write_save
+from hacker_autosave import AUTOSAVE_DIRECTORY, Autosaver, newest_autosave
+from hacker_sprites import SPRITES
+from hacker_loop import DEFAULT_TICK_RATE, GameLoop
+from hacker_metrics import NS_PER_MS, Metrics
+from time import perf_counter_ns
+import atexit
+import os
 import random
-from PIL import Image, ImageTk
+import time
+import tkinter as tk
+from PIL import ImageTk
 from tkinter import messagebox, filedialog
 
 MINUTE_TO_SECOND = 60
-MIN_XCOORD = 0
-MIN_YCOORD = 0
-YCOORD_BOUND = 1
-X_ROTATE = 1
-FILE_INDEX = -1
 BAR_RATIO = 3
-
-class Entity(object):
-    """An abstract class used to represent any element that can appear on the 
-    game's grid."""
-
-    def display(self) -> str:
-        """
-        (str): Return character used to represent the entity in text-based grid
-        """
-        raise NotImplementedError() 
-    
-    def __repr__(self) -> str:
-        """(str): Return a representation of this Entity."""
-        return f'{self.__class__.__name__}()'
-
-
-class Player(Entity):
-    """A subclass of Entity representing a Player within the game."""
-
-    def display(self) -> str:
-        """(str): Return the character representing a player."""
-        return PLAYER
-
-
-class Destroyable(Entity):
-    """A subclass of Entity representing a Destroyable within the game. It can 
-    be destroyed by the player but not collected."""
-
-    def display(self) -> str:
-        """(str): Return the character representing a destroyable."""
-        return DESTROYABLE
-
-
-class Collectable(Entity):
-    """A subclass of Entity representing a Collectable within the game. It can 
-    be destroyed or collected by the player."""
-
-    def display(self) -> str:
-        """(str): Return the character representing a collectable."""
-        return COLLECTABLE
-
-
-class Blocker(Entity):
-    """A subclass of Entity representing a Blocker within the game. It cannot be
-    destoryed or collected by the player."""
-
-    def display(self) -> str:
-        """(str): Return the character representing a blocker."""
-        return BLOCKER
-
-
-class Grid:
-    """A class representing the 2D grid of entities. The top left is (0, 0)."""
-
-    def __init__(self, size: int) -> None:
-        """Constructs a grid with a size representing number of rows (columns).
-
-        Parameters:
-            size (int): The size representing number of rows (columns) in the grid
-        """
-        self._size = size
-        self._entities = {}
-    
-    def get_size(self) -> int:
-        """(int): Return the size of the grid."""
-        return self._size
-    
-    def add_entity(self, position: Position, entity: Entity) -> None:
-        """Add a given entity into the grid at a specified position if it's valid
-        
-        Parameters:
-            position (Position): The specified position to be added to in the grid
-            entity (Entity): The entity to be added
-        """
-        if self.in_bounds(position):
-            self._entities[position] = entity
-    
-    def get_entities(self) -> Dict[Position, Entity]:
-        """(dict): Return the dictionary containing grid entities."""
-        entities = {}
-
-        for position, entity in list(self._entities.items()):
-            entities[position] = entity
-        return entities
-    
-    def get_entity(self, position: Position) -> Optional[Entity]: 
-        """Return a entity from the grid at a specific position or None if the 
-        position does not have a mapped entity.
-        
-        Parameters:
-            positon (Position): The specific position to get entity.
-        
-        Returns:
-            (Entity): Return a entity at a specific position.
-        """
-        if position in self._entities:
-            return self._entities[position]
-        else:
-            return None
-    
-    def remove_entity(self, position: Position) -> None:
-        """Remove an entity from the grid at a specified position."""
-        del self._entities[position]
-    
-    def serialise(self) -> Dict[Tuple[int, int], str]:
-        """Convert dictionary of Position and Entities into a simplified, 
-        serialised dictionary mapping tuples to characters. 
-
-        Returns:
-            (dict): Return a serialised mapping.
-        """
-        serial_entities = {}
-
-        for position, entity in list(self._entities.items()):
-            coord_x = position.get_x()
-            coord_y = position.get_y()
-            serial_entities[(coord_x, coord_y)] = entity.display()
-
-        return serial_entities
-    
-    def in_bounds(self, position: Position) -> bool:
-        """(bool): Return a boolean based on whether the position is valid in
-         terms of the dimensions of the grid.
-        
-        Parameters:
-            positon (Position): The specific position to check the bounds.
-        """
-        coordx = position.get_x()
-        coordy = position.get_y()
-        return MIN_XCOORD <= coordx and coordx < self._size \
-            and YCOORD_BOUND <= coordy and coordy < self._size
-        
-
-    def set_entities(self, entities: dict) -> None:
-        """Set the position entity mapping according to the given entities.
-        
-        Parameters:
-            entities (dict): The position entity mapping to be set to.
-        """
-        self._entities = entities
-
-    def __repr__(self) -> str:
-        """(str): Return a representation of this Grid."""
-        return f'Grid({self.get_size()})'
-
-
-class Game:
-    """
-    A class handles the logic to control actions of the entities in the grid.
-    """
-
-    def __init__(self, size: int) -> None:
-        """Constructs a game with a grid size.
-
-        Parameters:
-            size (int): The size representing number of rows (columns) in game
-        """
-        self._size = size
-        self._grid = Grid(self._size)
-        self._won = False
-
-        self._num_collected = 0
-        self._num_destroyed = 0
-        self._total_shots = 0
-    
-    def get_grid(self) -> Grid: 
-        """(Grid): Return the instance of the grid held by the game."""
-        return self._grid
-
-    def get_player_position(self) -> Position:
-        """(Position): Return the position of the player in the grid."""
-        centered_xcoord = self._size // 2 
-        return Position(centered_xcoord, MIN_YCOORD)
-    
-    def get_num_collected(self) -> int:
-        """(int): Return the total of Collectables acquired."""
-        return self._num_collected
-
-    def get_num_destroyed(self) -> int:
-        """(int): Return the total of Destroyables removed with a shot."""
-        return self._num_destroyed
-
-    def get_total_shots(self) -> int:
-        """(int): Return the total of shots taken."""
-        return self._total_shots
-    
-    def rotate_grid(self, direction: str) -> None:
-        """Rotate the positions of the entities within the grid depending on 
-        the direction they are being rotated.
-
-        Parameters:
-            direction(str): The direction positions of entities being rotated.
-        """
-        direction = direction.upper()
-        rotate_entities = {}
-        change = ROTATIONS[DIRECTIONS.index(direction)]
-
-        if direction in DIRECTIONS:
-            for position, entity in self.get_grid().get_entities().items():
-
-                #Rotate positions and Player position doesn't change.
-                if entity.display() == PLAYER:
-                    new_position = position
-                else:
-                    new_position = position.add(Position(change[0], change[1]))
-                
-                #Reset position if out of bound
-                coordx = new_position.get_x()
-                coordy = new_position.get_y()
-                if not self._grid.in_bounds(new_position):
-                    if coordx >= self._size:
-                        coordx = MIN_XCOORD
-                    elif coordx < MIN_XCOORD:
-                        coordx = self._size - X_ROTATE
-
-                #Update grid after rotation
-                new_entity = self._create_entity(entity.display())
-                rotate_entities[Position(coordx, coordy)] = new_entity
-
-            self._grid.set_entities(rotate_entities)
-
-    def _create_entity(self, display: str) -> Entity:
-        """Uses a display character to create an Entity.
-        
-        Parameters:
-            display (str): The display character of entity.
-        
-        Returns:
-            (Entity): The entity to be created.
-        """
-        if display == COLLECTABLE:
-            return Collectable()
-        elif display == DESTROYABLE:
-            return Destroyable()
-        elif display == BLOCKER:
-            return Blocker()
-        else:
-            raise NotImplementedError()
-
-    def generate_entities(self) -> None:
-        """
-        Method given to the students to generate a random amount of entities to
-        add into the game after each step
-        """
-        # Generate amount
-        entity_count = random.randint(0, self.get_grid().get_size() - 3)
-        entities = random.choices(ENTITY_TYPES, k=entity_count)
-
-        # Blocker in a 1 in 4 chance
-        blocker = random.randint(1, 4) % 4 == 0
-
-        # UNCOMMENT THIS FOR TASK 3 (CSSE7030)
-        # bomb = False
-        # if not blocker:
-        #     bomb = random.randint(1, 4) % 4 == 0
-
-        total_count = entity_count
-        if blocker:
-            total_count += 1
-            entities.append(BLOCKER)
-
-        # UNCOMMENT THIS FOR TASK 3 (CSSE7030)
-        # if bomb:
-        #     total_count += 1
-        #     entities.append(BOMB)
-
-        entity_index = random.sample(range(self.get_grid().get_size()),
-                                     total_count)
-
-        # Add entities into grid
-        for pos, entity in zip(entity_index, entities):
-            position = Position(pos, self.get_grid().get_size() - 1)
-            #'Game' object has no attribute '_create_entity'
-            new_entity = self._create_entity(entity)
-            self.get_grid().add_entity(position, new_entity)
-            
-    def step(self) -> None:
-        """Moves all entities on the board by an offset of (0, -1)."""
-        step_entities = {}
-
-        #Update positions of entities after step
-        for position, entity in self._grid.get_entities().items():
-            new_position = position.add(Position(MOVE[0], MOVE[1]))
-            if self._grid.in_bounds(new_position):
-                step_entities[new_position] = self._create_entity(entity.display())
-
-        self._grid.set_entities(step_entities)
-        self.generate_entities()
-
-    def fire(self, shot_type: str) -> None:
-        """Handles firing/collecting actions of player towards an entity.
-        
-        Parameters:
-            shot_type (str): A collect or destroy shot has been fired.
-        """
-        self._total_shots += 1
-
-        #Find the position and entity that will be fired
-        fire_xcoord = self.get_player_position().get_x()
-        positions = list(self._grid.serialise().keys())
-        fire_ycoords = [coordy for coordx, coordy in positions \
-            if coordx == fire_xcoord]
-
-        if fire_ycoords != []:
-            min_ycoord_entity = min(fire_ycoords)
-            del_position = Position(fire_xcoord, min_ycoord_entity)
-            entity_display = self._grid.get_entities()[del_position].display()
-
-            #Collectable will be fired
-            if entity_display == COLLECTABLE:
-                if shot_type == COLLECT:
-                    self._num_collected += 1
-                    self.get_grid().remove_entity(del_position)
-                if shot_type == DESTROY:
-                    self._num_destroyed += 1
-                    self.get_grid().remove_entity(del_position)
-
-            #Destroyable will be fired
-            if shot_type == DESTROY and entity_display == DESTROYABLE:
-                self._num_destroyed += 1
-                self.get_grid().remove_entity(del_position)
-
-    def has_won(self) -> bool:
-        """(bool): Return True if the player has won the game."""
-        return self.get_num_collected() >= COLLECTION_TARGET
-    
-    def has_lost(self) -> bool:
-        """(bool): Returns True if the game is lost."""
-        entities = self.get_grid().serialise()
-        destroy_ycoord = [coordy for (coordx, coordy), entity in entities.items()
-            if entity == DESTROYABLE]
-
-        for ycoord in destroy_ycoord:
-            if ycoord == YCOORD_BOUND:
-                return True
-        return False
-
+SPRITE_POLL_DELAY = 20
+MAX_VIEW_SIZE = 15
 
 class AbstractField(tk.Canvas):
     """An abstract view class provides base functionality for other view classes.
@@ -427,33 +98,99 @@ class AbstractField(tk.Canvas):
 
 
 class GameField(AbstractField):
-    """A class which is a visual representation of the game grid."""
+    """A class which is a visual representation of the game grid.
+
+    The canvas items of every cell are created once, hidden while the cell is
+    empty. Each frame only reconfigures the items of the cells whose entity
+    changed since the previous frame."""
     def __init__(self, master, size, width, height, **kwargs) -> None:
         """Constructs a visual representation of the game grid.
 
         Parameters:
             master (tkinter): The parameter inherit from tkinter.
-            size (int): The columns and rows of the game grid.
+            size (int): The columns and rows of the game grid shown.
             width (int): The width of the game field.
             height (int): The height of the game field.
         """
         super().__init__(master, rows=size, cols=size, width=width, height=height)
         self._size = size
+        self.create_rectangle(MIN_XCOORD, MIN_YCOORD, width, height,
+                              fill=FIELD_COLOUR)
+        self.draw_player_area()
+        self._codes = bytearray(size * size)
+        self._items = [self.create_cell(intern_position(x, y))
+                       for y in range(size) for x in range(size)]
+
+    def create_cell(self, position) -> Tuple[int, ...]:
+        """Creates the hidden canvas items of the cell at position.
+
+        Parameters:
+            position (Position): The position of the cell.
+
+        Returns:
+            (tuple): The ids of the cell's canvas items.
+        """
+        rectangle = self.create_rectangle(self.get_bbox(position),
+                                          state=tk.HIDDEN)
+        text = self.create_text(self.get_position_center(position),
+                                fill="white", state=tk.HIDDEN)
+        return rectangle, text
+
+    def show_cell(self, items, code) -> None:
+        """Shows the entity with the given code in a cell using a coloured
+        rectangle with superimposed text identifying the entity, or hides the
+        cell's items if code is EMPTY_CELL.
+
+        Parameters:
+            items (tuple): The ids of the cell's canvas items.
+            code (int): The entity code of the cell.
+        """
+        rectangle, text = items
+        if code == EMPTY_CELL:
+            self.itemconfig(rectangle, state=tk.HIDDEN)
+            self.itemconfig(text, state=tk.HIDDEN)
+        else:
+            display = CODE_DISPLAYS[code]
+            self.itemconfig(rectangle, fill=COLOURS[display], state=tk.NORMAL)
+            self.itemconfig(text, text=display, state=tk.NORMAL)
+
+    def draw_cells(self, cells) -> int:
+        """Updates the view to show the given entity codes, reconfiguring only
+        the cells that changed since the last update.
+
+        Parameters:
+            cells (bytes): The entity codes of every cell, as Grid.get_cells
+                returns them.
+
+        Returns:
+            (int): The number of cells that changed.
+        """
+        previous = self._codes
+        size = self._size
+        changed = 0
+        for start in range(0, size * size, size):
+            end = start + size
+            if cells[start:end] == previous[start:end]:
+                continue
+            for index in range(start, end):
+                code = cells[index]
+                if code != previous[index]:
+                    self.show_cell(self._items[index], code)
+                    previous[index] = code
+                    changed += 1
+        return changed
 
     def draw_grid(self, entities) -> None:
-        """Draws the entities in the game grid at their given position using
-         a coloured rectangle with superimposed text identifying the entity.
+        """Draws the entities in the game grid at their given position.
          
         Parameters:
             entities (dict): A mapping of positions and entities in the grid.
         """
-        for position, entity in list(entities.items()):
-            color = COLOURS[entity.display()]
-            bbox = self.get_bbox(position)
-            center_position = self.get_position_center(position)
-
-            self.create_rectangle(bbox, fill=color)
-            self.create_text(center_position, text=entity.display(), fill="white")
+        cells = bytearray(self._size * self._size)
+        for position, entity in entities.items():
+            cells[position.get_y() * self._size + position.get_x()] = \
+                ENTITY_CODES[entity.display()]
+        self.draw_cells(cells)
     
     def draw_player_area(self) -> None:
         """Draws the grey area a player is placed on."""
@@ -478,14 +215,7 @@ class ScoreBar(AbstractField):
 
         self._num_xcoord = 1
         self._destroy_ycoord = 2
-        
-    def draw(self, collect_num, destroy_num) -> None:
-        """Draw the number of collected entity and destroyed entity in score bar.
-        
-        Parameters:
-        collect_num (int): The number of collectables acquired.
-        destroy_num (int): The number of destroyables shot.
-        """
+
         score_position = (self._width/self._cols, self._bheight/2)
         self.create_text(score_position, font=('Arial', 22), text="Score", 
                         fill="white")
@@ -496,7 +226,7 @@ class ScoreBar(AbstractField):
         destroy_pos = Position(MIN_XCOORD, self._destroy_ycoord)
         dnum_pos = Position(self._num_xcoord,self._destroy_ycoord)
 
-        #Draw Collect and Destroy Data
+        #Draw Collect and Destroy Labels, keeping the numbers to update
         collect_position = self.get_position_center(collect_pos)
         destroy_position = self.get_position_center(destroy_pos)
         self.create_text(collect_position, text="Collected", fill="white")
@@ -504,54 +234,102 @@ class ScoreBar(AbstractField):
 
         cnum_position = self.get_position_center(cnum_pos)
         dnum_position = self.get_position_center(dnum_pos)
-        self.create_text(cnum_position, text=f"{collect_num}", fill="white")
-        self.create_text(dnum_position, text=f"{destroy_num}", fill="white")
+        self._collect_text = self.create_text(cnum_position, fill="white")
+        self._destroy_text = self.create_text(dnum_position, fill="white")
+        self._scores = None
+        
+    def draw(self, collect_num, destroy_num) -> None:
+        """Show the number of collected entity and destroyed entity in score
+        bar, if they changed.
+        
+        Parameters:
+        collect_num (int): The number of collectables acquired.
+        destroy_num (int): The number of destroyables shot.
+        """
+        if self._scores == (collect_num, destroy_num):
+            return
+        self._scores = (collect_num, destroy_num)
+        self.itemconfig(self._collect_text, text=f"{collect_num}")
+        self.itemconfig(self._destroy_text, text=f"{destroy_num}")
 
 class ImageGameField(GameField):
-    """A class using images to display each square in game field."""
+    """A class using images to display each square in game field.
+
+    The images come from the shared sprite cache (see hacker_sprites), which
+    prepares them in the background. Cells whose image isn't ready yet stay
+    hidden until it is."""
     def __init__(self, master, size, width, height, **kwargs) -> None:
         """Constructs a representation with images of the game grid.
 
         Parameters:
             master (tkinter): The parameter inherit from tkinter.
-            size (int): The columns and rows of the game grid.
+            size (int): The columns and rows of the game grid shown.
             width (int): The width of the game field.
             height (int): The height of the game field.
         """
-        super().__init__(master, size, width, height, **kwargs)
         self._box_size = int(width /size)
     
-        #Import Images of Entities
-        self._player = ImageTk.PhotoImage(Image.open("images/P.png").resize((
-            self._box_size, self._box_size)))
-        self._blocker = ImageTk.PhotoImage(Image.open("images/B.png").resize((
-            self._box_size, self._box_size)))
-        self._collectable = ImageTk.PhotoImage(Image.open("images/C.png").resize((
-            self._box_size, self._box_size)))
-        self._destroyable = ImageTk.PhotoImage(Image.open("images/D.png").resize((
-            self._box_size, self._box_size)))
-
-    def draw_grid(self, entities: dict) -> None:
-        """Draws the entities in the game grid at their given position using
-         images identifying the entity.
-         
-         Parameters:
-            entities (dict): A mapping of positions and entities in the grid.
+        #Images of Entities shown by this field, and cells waiting for theirs
+        self._images = {}
+        self._waiting = {}
+        SPRITES.prepare_all(self._box_size)
+        super().__init__(master, size, width, height, **kwargs)
+
+    def create_cell(self, position) -> Tuple[int, ...]:
+        """Creates the hidden image item of the cell at position.
+
+        Parameters:
+            position (Position): The position of the cell.
+
+        Returns:
+            (tuple): The id of the cell's image item.
         """
-        self.create_rectangle(MIN_XCOORD, self._box_size, MAP_WIDTH, MAP_HEIGHT,\
-            fill=FIELD_COLOUR)
+        return (self.create_image(self.get_position_center(position),
+                                  state=tk.HIDDEN),)
 
-        #Draw Images of Entities
-        for position, entity in entities.items():
-            coordx, coordy = self.get_position_center(position)
-            if entity.display() == PLAYER:
-                self.create_image(coordx, coordy, image=self._player)
-            if entity.display() == BLOCKER:
-                self.create_image(coordx, coordy, image=self._blocker)
-            if entity.display() == COLLECTABLE:
-                self.create_image(coordx, coordy, image=self._collectable)
-            if entity.display() == DESTROYABLE:
-                self.create_image(coordx, coordy, image=self._destroyable)
+    def show_cell(self, items, code) -> None:
+        """Shows the image identifying the entity with the given code in a
+        cell, or hides the cell's image if code is EMPTY_CELL.
+
+        Parameters:
+            items (tuple): The id of the cell's image item.
+            code (int): The entity code of the cell.
+        """
+        image, = items
+        self._waiting.pop(items, None)
+        photo = None
+        if code != EMPTY_CELL:
+            photo = self.get_image(code)
+            if photo is None:
+                if not self._waiting:
+                    self.after(SPRITE_POLL_DELAY, self.show_waiting)
+                self._waiting[items] = code
+
+        if photo is None:
+            self.itemconfig(image, state=tk.HIDDEN)
+        else:
+            self.itemconfig(image, image=photo, state=tk.NORMAL)
+
+    def get_image(self, code) -> Optional[ImageTk.PhotoImage]:
+        """Returns the image of the entity with the given code at this field's
+        cell size, or None if it isn't ready yet.
+
+        Parameters:
+            code (int): The entity code.
+        """
+        photo = self._images.get(code)
+        if photo is None:
+            photo = SPRITES.photo(CODE_DISPLAYS[code], self._box_size)
+            if photo is not None:
+                self._images[code] = photo
+        return photo
+
+    def show_waiting(self) -> None:
+        """Shows the cells that were waiting for their image, polling again
+        for those still waiting."""
+        waiting, self._waiting = self._waiting, {}
+        for items, code in waiting.items():
+            self.show_cell(items, code)
 
 class StatusBar(tk.Frame):
     """A class representing the status of the game, including total shots, timer
@@ -585,18 +363,64 @@ class StatusBar(tk.Frame):
         press_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=tk.TRUE)
         self._press = tk.Button(press_frame, text="Pause")
         self._press.pack(side=tk.LEFT, expand=tk.TRUE)
+
+    def add_metrics_panel(self) -> None:
+        """Add a panel showing the rates and times of the instrumented game."""
+        frame_metrics = tk.Frame(self.master)
+        frame_metrics.pack(side=tk.LEFT, fill=tk.BOTH, expand=tk.TRUE)
+        self._metrics = tk.Label(frame_metrics, font=("Courier", 9),
+                                 justify=tk.LEFT)
+        self._metrics.pack(side=tk.TOP)
+
+    def show_metrics(self, metrics) -> None:
+        """Show the ticks and frames per second and the p50/p99 step and draw
+        times in the metrics panel.
+
+        Parameters:
+            metrics (Metrics): The metrics of the game.
+        """
+        lines = [f"{metrics.rate('tick'):.1f} tps "
+                 f"{metrics.rate('frame'):.1f} fps"]
+        for name in ("step", "draw", "tk"):
+            p50 = metrics.percentile(name, 50)
+            p99 = metrics.percentile(name, 99)
+            if p50 is not None:
+                lines.append(f"{name} {p50 / NS_PER_MS:.2f}/"
+                             f"{p99 / NS_PER_MS:.2f}ms")
+        self._metrics.config(text="\n".join(lines))
     
 class HackerController(object):
-    """A class which is the controller for the Hacker game."""
-    def __init__(self, master, size) -> None:
+    """A class which is the controller for the Hacker game.
+
+    Grids larger than the view are shown through a viewport: the rows nearest
+    the player and the columns centred on the player's column. Rotating the
+    grid moves the entities through the viewport, and a frame only reads and
+    draws the cells inside it, whatever the size of the grid."""
+    def __init__(self, master, size, bot=None, log_directory=None,
+                 tick_rate=DEFAULT_TICK_RATE, metrics=None,
+                 view_size=None) -> None:
         """Constructs a controller of the Hacker game.
 
         Parameters:
             master (tkinter): The parameter inherit from tkinter.
+            size (int): The columns and rows of the game grid.
+            bot (LookaheadBot): A bot playing instead of the keyboard, if given.
+            log_directory (str): Where to record an input log of each game
+                (see hacker_replay), if given.
+            tick_rate (float): The number of game steps per second.
+            metrics (Metrics): Where to record the time of the game's hot
+                paths (see hacker_metrics), if given.
+            view_size (int): The columns and rows of the viewport, at most
+                size (MAX_VIEW_SIZE if not given).
         """
         self._master = master
         self._size = size
-        self._game = Game(size)
+        self._view_size = min(size, view_size or MAX_VIEW_SIZE)
+        self._log_directory = log_directory
+        self._recorder = None
+        self._metrics = metrics
+        self._game = self.create_game()
+        self._bot = bot
         
         #HACKER Title
         self._title = tk.Frame(self._master)
@@ -611,19 +435,96 @@ class HackerController(object):
         #Game field and Score bar
         self._game_score = tk.Frame(self._master)
         self._game_score.pack(side=tk.TOP)
-        self._score_bar = ScoreBar(self._game_score, self._size, bg=SCORE_COLOUR)
+        self._score_bar = ScoreBar(self._game_score, self._view_size,
+                                   bg=SCORE_COLOUR)
         self._score_bar.pack(side=tk.RIGHT)
         self.game_field()
         self.draw(self._game)
         self._score_bar.draw(self._game.get_num_collected(), \
             self._game.get_num_destroyed())
 
-        self._master.bind("<Key>", self.handle_keypress)
-        self._master.after(2000, self.step)
+        if self._metrics is not None:
+            self.instrument()
+
+        #Game loop stepping the game at a fixed rate (see hacker_loop)
+        self._loop = GameLoop(self._master.after, self._master.after_cancel,
+                              self.step, self.render, tick_rate)
+        self._bot_job = None
+        if self._bot is None:
+            self._master.bind("<Key>", self.handle_keypress)
+
+    def start(self) -> None:
+        """Start stepping the game, and let the bot play if there is one.
+        Called once the controller is fully constructed."""
+        if self._bot is not None:
+            self.schedule_bot()
+        self._loop.start()
+
+    def create_game(self) -> Game:
+        """Create a game with a fresh seed, recording it if logging is on."""
+        seed = new_seed()
+        if self._log_directory is not None:
+            self.stop_recording()
+            os.makedirs(self._log_directory, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{seed:016x}{LOG_SUFFIX}"
+            self._recorder = GameRecorder(
+                os.path.join(self._log_directory, name), self._size, seed)
+        return self.instrument_game(Game(self._size, random.Random(seed)))
+
+    def instrument_game(self, game) -> Game:
+        """Time the model calls of game if instrumentation is on.
+
+        Parameters:
+            game (Game): A game about to be played.
+
+        Returns:
+            (Game): The same game.
+        """
+        if self._metrics is not None:
+            self._metrics.wrap(game, "step", "step")
+            self._metrics.wrap(game, "generate_entities", "generate")
+            self._metrics.wrap(game, "fire", "fire")
+            self._metrics.wrap(game, "rotate_grid", "rotate")
+        return game
+
+    def instrument(self) -> None:
+        """Time the ticks, frames and draw phases of the controller. Each
+        frame also flushes Tk's pending redraws, timed as "tk"."""
+        metrics = self._metrics
+        metrics.wrap(self, "step", "tick")
+        metrics.wrap(self, "draw", "draw")
+        metrics.wrap(self._game_field, "draw_cells", "draw cells")
+        metrics.wrap(self._score_bar, "draw", "draw scores")
+
+        render = self.render
+        def render_and_flush():
+            render()
+            start = perf_counter_ns()
+            self._master.update_idletasks()
+            metrics.record("tk", perf_counter_ns() - start)
+        self.render = metrics.timed(render_and_flush, "frame")
+
+    def export_metrics(self, path) -> None:
+        """Write the recorded metrics to path (see Metrics.export), if
+        instrumentation is on.
+
+        Parameters:
+            path (str): A .json or .csv file.
+        """
+        if self._metrics is not None and path:
+            self._metrics.export(path, {"ticks": self._loop.ticks,
+                                        "dropped_ticks":
+                                            self._loop.dropped_ticks})
+
+    def stop_recording(self) -> None:
+        """Close the input log of the current game, if any."""
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
 
     def game_field(self) -> None:
         """Construct the game field of the game."""
-        self._game_field = GameField(self._game_score, self._size, MAP_WIDTH,
+        self._game_field = GameField(self._game_score, self._view_size, MAP_WIDTH,
                                      MAP_HEIGHT, bg=FIELD_COLOUR)
         self._game_field.pack(side=tk.LEFT)
     
@@ -643,24 +544,60 @@ class HackerController(object):
         self.draw(self._game)
 
     def draw(self, game) -> None:
-        """Clears and redraws the view based on the current game state.
+        """Updates the view to the current game state.
         
         Parameters:
             game (Game): The current game played by the player.
         """
-        entities = game.get_grid().get_entities()
-        entities[game.get_player_position()] = Player()
+        view = self._view_size
+        player = game.get_player_position()
+        left = player.get_x() - view // 2
+        cells = bytearray(game.get_grid().get_window(left, MIN_YCOORD, view,
+                                                     view))
+        cells[player.get_y() * view + view // 2] = ENTITY_CODES[PLAYER]
 
-        self._game_field.delete(tk.ALL)
-        self._score_bar.delete(tk.ALL)
-
-        #Redraw the view
-        self._game_field.create_rectangle(MIN_XCOORD, MIN_YCOORD, MAP_WIDTH, \
-            MAP_HEIGHT, fill=FIELD_COLOUR)
-        self._game_field.draw_player_area()
-        self._game_field.draw_grid(entities)
+        self._game_field.draw_cells(cells)
         self._score_bar.draw(game.get_num_collected(), game.get_num_destroyed())
+
+    def render(self) -> None:
+        """Updates the view after the game loop stepped the game."""
+        self.draw(self._game)
     
+    def bot_interval(self) -> int:
+        """(int): Return the milliseconds between the bot's actions, spreading
+        them over the time between steps."""
+        period = round(self._loop.get_period() * 1000)
+        return period // (self._bot.get_actions_per_tick() + 1)
+
+    def schedule_bot(self) -> None:
+        """Spread the bot's actions for the next step over the time between
+        steps, dropping any actions left from the last step."""
+        if self._bot_job is not None:
+            self._master.after_cancel(self._bot_job)
+        self._bot_job = self._master.after(self.bot_interval(), self.play_bot,
+                                           self._bot.get_actions_per_tick())
+
+    def play_bot(self, moves) -> None:
+        """Let the bot make one action in place of a keypress, then schedule
+        its next action before the coming step.
+
+        Parameters:
+            moves (int): The number of actions the bot has left before the step.
+        """
+        action = self._bot.choose_action(self._game, moves)
+        if action in DIRECTIONS:
+            self.handle_rotate(action)
+        elif action in SHOT_TYPES:
+            self.handle_fire(action)
+        self.draw(self._game)
+        self._master.title(f"{TITLE} - bot: "
+                           f"{self._bot.decisions_per_second():.1f} decisions/s")
+
+        self._bot_job = None
+        if moves > 1:
+            self._bot_job = self._master.after(self.bot_interval(),
+                                               self.play_bot, moves - 1)
+
     def handle_rotate(self, direction) -> None:
         """Handles rotation of the entities and redrawing the game.
         
@@ -668,6 +605,8 @@ class HackerController(object):
             direction(str): The direction positions of entities being rotated.
         """
         self._game.rotate_grid(direction)
+        if self._recorder is not None:
+            self._recorder.record_action(direction)
 
     def handle_fire(self, shot_type) -> None:
         """Handles the firing of the specified shot type and redraw the game.
@@ -676,33 +615,54 @@ class HackerController(object):
             shot_type (str): A collect or destroy shot has been fired.
         """
         self._game.fire(shot_type)
+        if self._recorder is not None:
+            self._recorder.record_action(shot_type)
 
     def step(self) -> None:
-        """Triggers the step for the game and updates view every 2 seconds"""
+        """Steps the game once; the game loop calls this at the tick rate and
+        updates the view afterwards."""
 
         #Check Game Over
-        if self._game.has_lost() or self._game.has_won():
-            if self._game.has_lost():
+        lost = self._game.has_lost()
+        won = self._game.has_won()
+        if lost or won:
+            if self._recorder is not None:
+                self._recorder.record_end(self._game)
+            if lost:
                 messagebox.showinfo("Game Over", "You lost!")
-            if self._game.has_won():
+            if won:
                 messagebox.showinfo("Game Over", "You won!")
             exit(0)
 
         self._game.step()
-        self.draw(self._game)
-        self._master.after(2000, self.step)
+        if self._recorder is not None:
+            self._recorder.record_step(self._game)
+        if self._bot is not None:
+            self.schedule_bot()
 
 class AdvancedHackerController(HackerController):
     """A interface class that extends the functionality of HackerController"""
-    def __init__(self, master, size) -> None: 
+    def __init__(self, master, size, bot=None, log_directory=None,
+                 autosave_directory=None, tick_rate=DEFAULT_TICK_RATE,
+                 metrics=None, view_size=None) -> None: 
         """Constructs an advanced controller of the Hacker game.
 
         Parameters:
             master (tkinter): The parameter inherit from tkinter.
-        """
-        super().__init__(master, size)
+            size (int): The columns and rows of the game grid.
+            bot (LookaheadBot): A bot playing instead of the keyboard, if given.
+            log_directory (str): Where to record an input log of each game.
+            autosave_directory (str): Where to autosave the game in the
+                background (see hacker_autosave), if given.
+            tick_rate (float): The number of game steps per second.
+            metrics (Metrics): Where to record the time of the game's hot
+                paths, shown in an extra status bar panel, if given.
+            view_size (int): The columns and rows of the viewport.
+        """
+        super().__init__(master, size, bot, log_directory, tick_rate, metrics,
+                         view_size)
         self._pause = False
-        self._time_count = -1
+        self._status_job = None
 
         #Status Bar
         self._status_bar = tk.Frame(self._master)
@@ -713,41 +673,73 @@ class AdvancedHackerController(HackerController):
         self._status = StatusBar(self._status_bar)
         self._status.pack()
         self._status._press.config(command=self.pause)
+        if self._metrics is not None:
+            self._status.add_metrics_panel()
         self.status_step()
 
         #File Menu
         self._filename = None
-        self._entity_line = 0
-        self._time_line = 1
-        self._shot_line = 2
-        self._pause_line = 3
-        self._collect_line = 4
-        self._destroy_line = 5
         self.file()
 
+        #Autosave, started by start after offering to restore
+        self._autosave_directory = autosave_directory
+        self._autosaver = None
+
+    def start(self) -> None:
+        """Offer to restore the newest autosave before the game starts, so
+        nothing ticks while the dialog is open, then start autosaving and
+        stepping the game. A restored game that was paused stays paused."""
+        if self._autosave_directory is not None:
+            self.offer_restore(self._autosave_directory)
+            self._autosaver = Autosaver(self._autosave_directory)
+        if not self._pause:
+            super().start()
+
     def game_field(self) -> None:
         """Construct the game field with images of the game."""
-        self._game_field = ImageGameField(self._game_score, self._size, 
+        self._game_field = ImageGameField(self._game_score, self._view_size, 
                                           MAP_WIDTH, MAP_HEIGHT, bg=FIELD_COLOUR)
         self._game_field.pack(side=tk.LEFT)
 
     def pause(self) -> None:
-        """Pause the game when user press Pause button"""
+        """Pause the game when user press Pause button. Nothing is scheduled
+        while the game is paused."""
         if self._pause:
             self._status._press.config(text="Pause")
         else:
             self._status._press.config(text="Play")
         self._pause = not self._pause 
+        if self._pause:
+            self._loop.pause()
+        else:
+            self._loop.resume()
+        self.status_step()
+
+    def get_time_count(self) -> int:
+        """(int): Return the seconds the game has been played, from the game
+        loop's clock."""
+        return int(self._loop.elapsed())
     
     def step(self) -> None:
-        """Triggers the step for the game and updates view every 2 seconds
-        Pause the game when the game is over."""
+        """Steps the game once. Pause the game when the game is over, and
+        delete its autosaves since it ended normally."""
+        if self._game.has_lost() or self._game.has_won():
+            self.pause()
+            if self._autosaver is not None:
+                self._autosaver.finish()
+                self._autosaver = None
+        super().step()
+        if self._autosaver is not None:
+            self._autosaver.offer(self._game, self.get_time_count(), False)
+
+    def play_bot(self, moves) -> None:
+        """Let the bot make one action unless the game is paused.
+
+        Parameters:
+            moves (int): The number of actions the bot has left before the step.
+        """
         if not self._pause:
-            if self._game.has_lost() or self._game.has_won():
-                self.pause()
-            super().step()
-        else:
-            self._master.after(2000, self.step)
+            super().play_bot(moves)
     
     def file(self) -> None:
         """Add a file menu with new game, save game, load game, quit options"""
@@ -762,13 +754,20 @@ class AdvancedHackerController(HackerController):
         filemenu.add_command(label="Quit", command=self.quit_game)
 
     def status_step(self) -> None:
-        """Triggers the step for the game and updates timer every 1 seconds"""
+        """Updates the timer from the game loop's clock, then again at the
+        next whole second unless the game is paused."""
+        if self._status_job is not None:
+            self._master.after_cancel(self._status_job)
+            self._status_job = None
+
+        elapsed = self._loop.elapsed()
+        minute, second = time_format(int(elapsed))
+        self._status._time.config(text=f'{minute}m {second}s')
+        if self._metrics is not None:
+            self._status.show_metrics(self._metrics)
         if not self._pause:
-            self._time_count += 1
-            minute, second = time_format(self._time_count)
-            self._status._time.config(text=f'{minute}m {second}s')
-
-        self._master.after(1000, self.status_step)    
+            delay = max(1, round((1 - elapsed % 1) * 1000))
+            self._status_job = self._master.after(delay, self.status_step)
 
     def handle_fire(self, shot_type) -> None:
         """Handles the firing of the specified shot type, update total shots
@@ -785,11 +784,11 @@ class AdvancedHackerController(HackerController):
         if self._pause:
             self.pause()
 
-        self._game = Game(self._size)
+        self._game = self.create_game()
         self.draw(self._game)
         self._status._shot_num.config(text=f'{self._game.get_total_shots()}')
-        self._status._time.config(text="0m 0s")
-        self._time_count = 0
+        self._loop.set_elapsed(0)
+        self.status_step()
 
     def save_game(self) -> None:
         """Prompt the user for the location to save their file and save necessary
@@ -808,53 +807,76 @@ class AdvancedHackerController(HackerController):
 
         #Save the necessary game information in the location chosen by user
         if self._filename:
-            with open(f'{self._filename}', 'w') as file:
-                file.write(str(self._game.get_grid().get_entities()))
-                file.write("\n")
-                file.write(str(self._time_count))
-                file.write("\n")
-                file.write(str(self._game.get_total_shots()))
-                file.write("\n")
-                file.write(str(pause_before_save))
-                file.write("\n")
-                file.write(str(self._game.get_num_collected()))
-                file.write("\n")
-                file.write(str(self._game.get_num_destroyed()))
+            write_save(self._filename, SaveData.from_game(
+                self._game, self.get_time_count(), pause_before_save))
 
     def load_game(self) -> None:
         """Prompt the user for the location of the file to load a game and load
-        the game described in that file."""
+        the game described in that file. Saves in the old text format are
+        migrated as they are read."""
         if not self._pause:
             self.pause()
 
         #Read saved game information
         filename = filedialog.askopenfilename()
-        if filename:
-            self._filename = filename
-            with open(f'{self._filename}', 'r') as file:
-                saveinfo = file.readlines()
-                save_entities = eval(saveinfo[self._entity_line][:FILE_INDEX])
-                save_time = int(saveinfo[self._time_line][:FILE_INDEX])
-                save_shots = int(saveinfo[self._shot_line][:FILE_INDEX])
-                pause_before_save = saveinfo[self._pause_line][:FILE_INDEX]
-                save_collect = int(saveinfo[self._collect_line][:FILE_INDEX])
-                save_destroy = int(saveinfo[self._destroy_line])
-
-        #Start the game according to saved information        
-        self._game = Game(self._size)
-        self._game.get_grid().set_entities(save_entities)
-        self._game._num_collected = save_collect
-        self._game._num_destroyed = save_destroy
-        self._game._total_shots = save_shots
-        self._time_count = save_time
-
-        minute, second = time_format(save_time)
+        if not filename:
+            return
+        try:
+            save = load_save(filename, self._size)
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Load Game", f"Can't load {filename}: {error}")
+            return
+        if save.size != self._size:
+            messagebox.showerror("Load Game", f"{filename} holds a "
+                                 f"{save.size}x{save.size} game")
+            return
+        self._filename = filename
+        self.restore(save)
+
+    def offer_restore(self, directory) -> None:
+        """Ask the user whether to restore the newest autosave in directory,
+        if there is one, and restore it if they say yes.
+
+        Parameters:
+            directory (str): The autosave directory.
+        """
+        path = newest_autosave(directory)
+        if path is None:
+            return
+        saved = time.strftime("%H:%M:%S on %d %b",
+                              time.localtime(os.path.getmtime(path)))
+        if not messagebox.askyesno("Restore", f"Restore the game autosaved "
+                                   f"at {saved}?"):
+            return
+        try:
+            save = load_save(path, self._size)
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Restore", f"Can't restore {path}: {error}")
+            return
+        if save.size == self._size:
+            if not self._pause:
+                self.pause()
+            self.restore(save)
+
+    def restore(self, save) -> None:
+        """Replace the current game with a saved one. Expects the game to be
+        paused, and resumes it if it wasn't paused when saved.
+
+        Parameters:
+            save (SaveData): The saved game.
+        """
+        #Start the game according to saved information (a loaded game can't
+        #be replayed from a seed, so it isn't recorded)
+        self.stop_recording()
+        self._game = self.instrument_game(save.to_game())
+        self._loop.set_elapsed(save.time_count)
+
         self.draw(self._game)
-        self._status._shot_num.config(text=save_shots)
-        self._status._time.config(text=f"{minute}m {second}s")
+        self._status._shot_num.config(text=save.shots)
+        self.status_step()
 
         #Set game pause state according to saved pause condition
-        if pause_before_save == "False":
+        if not save.paused:
             self.pause()
 
     def quit_game(self) -> None:
@@ -870,6 +892,9 @@ class AdvancedHackerController(HackerController):
 
         message = messagebox.askyesno("Quit", "Are you sure you want to quit?")
         if message:
+            #A clean exit leaves no autosave to restore next time
+            if self._autosaver is not None:
+                self._autosaver.finish()
             exit(0)
 
         #Continue the previous game state
@@ -890,22 +915,68 @@ def time_format(time_count) -> Tuple[int, int]:
     second = time_count % MINUTE_TO_SECOND
     return minute, second
 
-def start_game(root, TASK=TASK):
-    controller = HackerController
-
-    if TASK != 1:
-        controller = AdvancedHackerController
-
-    app = controller(root, GRID_SIZE)
+def start_game(root, TASK=TASK, bot=None, log_directory=None,
+               autosave_directory=None, tick_rate=DEFAULT_TICK_RATE,
+               metrics=None, size=GRID_SIZE, view_size=None):
+    if TASK == 1:
+        app = HackerController(root, size, bot, log_directory, tick_rate,
+                               metrics, view_size)
+    else:
+        app = AdvancedHackerController(root, size, bot, log_directory,
+                                       autosave_directory, tick_rate, metrics,
+                                       view_size)
+    app.start()
     return app
 
 
-def main():
+def main(use_bot=False, log_directory=None,
+         autosave_directory=AUTOSAVE_DIRECTORY, tick_rate=DEFAULT_TICK_RATE,
+         metrics_path=None, size=GRID_SIZE, view_size=None):
     root = tk.Tk()
     root.title(TITLE)
-    app = start_game(root)
+    bot = None
+    if use_bot:
+        from hacker_bot import LookaheadBot
+        bot = LookaheadBot()
+    metrics = None if metrics_path is None else Metrics()
+    app = start_game(root, bot=bot, log_directory=log_directory,
+                     autosave_directory=autosave_directory,
+                     tick_rate=tick_rate, metrics=metrics, size=size,
+                     view_size=view_size)
+    #Export the metrics however the game ends (exit or closing the window)
+    atexit.register(app.export_metrics, metrics_path)
     root.mainloop()
 
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument("player", nargs="?", choices=["bot"],
+                        help="let the lookahead bot play")
+    parser.add_argument("--log", metavar="DIRECTORY",
+                        help="record an input log of each game")
+    parser.add_argument("--autosave", metavar="DIRECTORY",
+                        default=AUTOSAVE_DIRECTORY,
+                        help="where to autosave the game (default: "
+                             f"{AUTOSAVE_DIRECTORY})")
+    parser.add_argument("--no-autosave", action="store_true",
+                        help="don't autosave the game")
+    parser.add_argument("--tick-rate", type=float, default=DEFAULT_TICK_RATE,
+                        help="game steps per second (default: "
+                             f"{DEFAULT_TICK_RATE})")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="time the game's hot paths, show them in the "
+                             "status bar and write them to FILE (.json or "
+                             ".csv) on exit")
+    parser.add_argument("--size", type=int, default=GRID_SIZE,
+                        help=f"columns and rows of the grid (default: "
+                             f"{GRID_SIZE})")
+    parser.add_argument("--view", type=int,
+                        help="columns and rows shown around the player "
+                             f"(default: {MAX_VIEW_SIZE} or the grid size)")
+    args = parser.parse_args()
+    if not args.tick_rate > 0:
+        parser.error("--tick-rate must be positive")
+    main(args.player == "bot", args.log,
+         None if args.no_autosave else args.autosave, args.tick_rate,
+         args.metrics, args.size, args.view)
@@ -47,6 +47,7 @@ IMAGES = {COLLECTABLE: "C.png",
           BOMB: "O.png"}
 
 GRID_SIZE = 7
+POSITION_CACHE_LIMIT = 1 << 16
 
 
 class Position:
@@ -67,6 +68,8 @@ class Position:
         4
     """
 
+    __slots__ = ("_x", "_y", "_hash")
+
     def __init__(self, x: int, y: int):
         """
         The position class is constructed from the x and y coordinate which the
@@ -78,6 +81,7 @@ class Position:
         """
         self._x = x
         self._y = y
+        self._hash = hash((x, y))
 
     def get_x(self) -> int:
         """Returns the x coordinate of the position."""
@@ -147,9 +151,11 @@ class Position:
         # an __eq__ method needs to support any object for example
         # so it can handle `Position(1, 2) == 2`
         # https://www.pythontutorial.net/python-oop/python-__eq__/
+        if self is other:
+            return True
         if not isinstance(other, Position):
             return False
-        return self.get_x() == other.get_x() and self.get_y() == other.get_y()
+        return self._x == other._x and self._y == other._y
 
     def __hash__(self) -> int:
         """
@@ -163,8 +169,10 @@ class Position:
         the x and y values.
 
         Reference: https://stackoverflow.com/questions/17585730/what-does-hash-do-in-python
+
+        The hash is calculated once, when the position is constructed.
         """
-        return hash((self.get_x(), self.get_y()))
+        return self._hash
 
     def __repr__(self) -> str:
         """
@@ -271,3 +279,30 @@ class Position:
         if self._y >= other.get_y():
             return True
         return False
+
+
+_interned_positions: Dict[Tuple[int, int], Position] = {}
+
+
+def intern_position(x: int, y: int) -> Position:
+    """
+    Return a shared Position instance for the given coordinates.
+
+    Positions are immutable, so the model can reuse one instance per cell
+    instead of constructing a new one every time. Up to POSITION_CACHE_LIMIT
+    positions are kept; beyond that a new instance is returned.
+
+    Examples:
+        >>> intern_position(1, 2) is intern_position(1, 2)
+        True
+
+    Parameters:
+        x: The x coordinate of the position
+        y: The y coordinate of the position
+    """
+    position = _interned_positions.get((x, y))
+    if position is None:
+        position = Position(x, y)
+        if len(_interned_positions) < POSITION_CACHE_LIMIT:
+            _interned_positions[(x, y)] = position
+    return position
@@ -0,0 +1,155 @@
+"""
+A fixed-timestep game loop for the Hacker game, driven by Tk's after.
+
+Tick times are fixed multiples of the tick period on a monotonic clock, so
+the time spent in a tick doesn't push back the ticks after it. If the loop
+falls behind (a slow tick, a busy Tk thread), it runs the missed ticks back
+to back, up to MAX_CATCH_UP at a time, then renders once. Ticks further
+behind than that are dropped instead of running in a burst. While the loop
+is paused no callback is scheduled at all, and the paused time isn't
+counted as elapsed.
+
+The loop only needs an after(ms, callback) function and its cancel, so it
+runs the same without a window given any such scheduler.
+"""
+import time
+from typing import Callable, Optional
+
+DEFAULT_TICK_RATE = 0.5
+MAX_CATCH_UP = 5
+
+
+class GameLoop:
+    """Runs simulation ticks at a fixed rate and renders after each batch of
+    ticks.
+
+    Usage:
+        loop = GameLoop(root.after, root.after_cancel, tick, render)
+        loop.start()
+        ...
+        loop.pause(); loop.resume()
+    """
+
+    def __init__(self, after: Callable, cancel: Callable,
+                 tick: Callable[[], None], render: Callable[[], None],
+                 tick_rate: float = DEFAULT_TICK_RATE,
+                 max_catch_up: int = MAX_CATCH_UP,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Parameters:
+            after (callable): Schedules a callback, as tk.Misc.after.
+            cancel (callable): Cancels a scheduled callback, as
+                tk.Misc.after_cancel.
+            tick (callable): Advances the simulation by one tick.
+            render (callable): Draws the current state.
+            tick_rate (float): The number of ticks per second.
+            max_catch_up (int): The most ticks run in one batch.
+            clock (callable): The monotonic clock, in seconds.
+
+        Raises:
+            ValueError: If tick_rate isn't positive or max_catch_up is less
+                than 1.
+        """
+        if not tick_rate > 0:
+            raise ValueError(f"The tick rate must be positive, got {tick_rate}")
+        if max_catch_up < 1:
+            raise ValueError(f"At least one tick must be run per batch, got "
+                             f"{max_catch_up}")
+        self._after = after
+        self._cancel = cancel
+        self._tick = tick
+        self._render = render
+        self._period = 1 / tick_rate
+        self._max_catch_up = max_catch_up
+        self._clock = clock
+        self._job = None
+        self._next_tick = 0.0
+        self._paused_left = self._period
+        self._started_at: Optional[float] = None
+        self._elapsed_before = 0.0
+        self.ticks = 0
+        self.dropped_ticks = 0
+
+    def get_period(self) -> float:
+        """(float): Return the seconds between ticks."""
+        return self._period
+
+    def is_running(self) -> bool:
+        """(bool): Return True iff the loop is started and not paused."""
+        return self._started_at is not None
+
+    def elapsed(self) -> float:
+        """(float): Return the seconds the loop has been running, not
+        counting pauses."""
+        if self._started_at is None:
+            return self._elapsed_before
+        return self._elapsed_before + self._clock() - self._started_at
+
+    def set_elapsed(self, seconds: float) -> None:
+        """Sets the elapsed running time, as when a game is restarted or
+        loaded. The next tick is a whole period away."""
+        self._elapsed_before = seconds
+        if self._started_at is None:
+            self._paused_left = self._period
+        else:
+            self._started_at = self._clock()
+            self._next_tick = self._started_at + self._period
+            self._schedule()
+
+    def start(self) -> None:
+        """Starts the loop, with the first tick a period from now."""
+        self.resume()
+
+    def resume(self) -> None:
+        """Resumes a paused loop, keeping the part of the tick period that
+        was left when it was paused."""
+        if self._started_at is not None:
+            return
+        now = self._clock()
+        self._started_at = now
+        self._next_tick = now + min(max(self._paused_left, 0.0), self._period)
+        self._schedule()
+
+    def pause(self) -> None:
+        """Stops ticking and the elapsed clock until resume is called."""
+        if self._started_at is None:
+            return
+        now = self._clock()
+        self._elapsed_before += now - self._started_at
+        self._paused_left = self._next_tick - now
+        self._started_at = None
+        if self._job is not None:
+            self._cancel(self._job)
+            self._job = None
+
+    def _schedule(self) -> None:
+        """Schedules the next wake-up for the next tick time."""
+        if self._job is not None:
+            self._cancel(self._job)
+        delay = max(0, round((self._next_tick - self._clock()) * 1000))
+        self._job = self._after(delay, self._run)
+
+    def _run(self) -> None:
+        """Runs the ticks that are due, renders and schedules the next
+        wake-up."""
+        self._job = None
+        now = self._clock()
+        ran = 0
+        while self._next_tick <= now and ran < self._max_catch_up:
+            self._next_tick += self._period
+            self._tick()
+            ran += 1
+            self.ticks += 1
+            if self._started_at is None:
+                #The tick paused the loop
+                break
+        if self._started_at is None:
+            self._render()
+            return
+        if self._next_tick <= now:
+            behind = int((now - self._next_tick) / self._period) + 1
+            self.dropped_ticks += behind
+            self._next_tick += behind * self._period
+        if ran:
+            self._render()
+        self._schedule()
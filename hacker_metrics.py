@@ -0,0 +1,164 @@
+"""
+Optional timing instrumentation for the Hacker game's hot paths.
+
+Metrics.wrap replaces a method on one object with a version that times each
+call with perf_counter_ns. Nothing is wrapped unless instrumentation is
+turned on, so an uninstrumented game runs exactly the original methods.
+
+For each timed name the metrics keep:
+    - the last ROLLING_WINDOW durations, for percentiles of recent calls
+    - the end times of calls in the last RATE_WINDOW_NS, for calls per second
+    - a histogram of every duration in power-of-two nanosecond buckets, with
+      the count and total, for the export
+
+export writes a summary of every name to a JSON file, or a CSV file if the
+path ends in .csv.
+"""
+import csv
+import functools
+import json
+from collections import deque
+from time import perf_counter_ns
+from typing import Callable, Deque, Dict, List, Optional
+
+ROLLING_WINDOW = 512
+RATE_WINDOW_NS = 2_000_000_000
+HISTOGRAM_BUCKETS = 40
+NS_PER_MS = 1_000_000
+
+
+class TimedName:
+    """The timings recorded under one name."""
+
+    def __init__(self, window: int) -> None:
+        """
+        Parameters:
+            window (int): The number of recent durations to keep.
+        """
+        self.recent: Deque[int] = deque(maxlen=window)
+        self.ends: Deque[int] = deque()
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+
+    def record(self, duration: int, end: int) -> None:
+        """Records a call that took duration ns and ended at end."""
+        self.recent.append(duration)
+        self.ends.append(end)
+        while self.ends[0] < end - RATE_WINDOW_NS:
+            self.ends.popleft()
+        self.buckets[min(duration.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += duration
+
+
+class Metrics:
+    """Timings of named calls.
+
+    Usage:
+        metrics = Metrics()
+        metrics.wrap(game, "step", "step")
+        ...
+        metrics.percentile("step", 99), metrics.rate("step")
+        metrics.export("metrics.json")
+    """
+
+    def __init__(self, window: int = ROLLING_WINDOW) -> None:
+        """
+        Parameters:
+            window (int): The number of recent durations kept per name.
+        """
+        self._window = window
+        self._names: Dict[str, TimedName] = {}
+
+    def record(self, name: str, duration: int) -> None:
+        """Records a call to name that took duration ns and just ended."""
+        timed = self._names.get(name)
+        if timed is None:
+            timed = self._names[name] = TimedName(self._window)
+        timed.record(duration, perf_counter_ns())
+
+    def timed(self, function: Callable, name: str) -> Callable:
+        """(callable): Return function, recording the time of each call under
+        name."""
+        record = self.record
+
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, perf_counter_ns() - start)
+        return timed_function
+
+    def wrap(self, target: object, method: str, name: str) -> None:
+        """Times the calls of target's method under name, from now on.
+
+        Parameters:
+            target (object): The object whose method to time.
+            method (str): The name of the method.
+            name (str): The name to record the times under.
+        """
+        setattr(target, method, self.timed(getattr(target, method), name))
+
+    def percentile(self, name: str, percent: float) -> Optional[int]:
+        """(int | None): Return the given percentile, in ns, of the recent
+        durations of name, or None if it hasn't been called."""
+        timed = self._names.get(name)
+        if timed is None or not timed.recent:
+            return None
+        durations = sorted(timed.recent)
+        index = min(len(durations) - 1, int(len(durations) * percent / 100))
+        return durations[index]
+
+    def rate(self, name: str) -> float:
+        """(float): Return the calls to name per second over the last
+        RATE_WINDOW_NS."""
+        timed = self._names.get(name)
+        if timed is None:
+            return 0.0
+        now = perf_counter_ns()
+        calls = sum(1 for end in timed.ends if end >= now - RATE_WINDOW_NS)
+        return calls * 1_000_000_000 / RATE_WINDOW_NS
+
+    def summary(self) -> List[Dict[str, object]]:
+        """(list): Return a summary of every timed name: its count, mean,
+        recent p50 and p99 in ms, and the histogram bucket counts."""
+        rows = []
+        for name, timed in sorted(self._names.items()):
+            rows.append({
+                "name": name,
+                "count": timed.count,
+                "mean_ms": timed.total_ns / timed.count / NS_PER_MS,
+                "p50_ms": self.percentile(name, 50) / NS_PER_MS,
+                "p99_ms": self.percentile(name, 99) / NS_PER_MS,
+                "histogram": {f"<{1 << bucket}ns": count for bucket, count
+                              in enumerate(timed.buckets) if count},
+            })
+        return rows
+
+    def export(self, path: str, extra: Optional[Dict[str, object]] = None
+               ) -> None:
+        """Writes the summary to path, as CSV if it ends in .csv, else as
+        JSON.
+
+        Parameters:
+            path (str): The file to write.
+            extra (dict | None): More values to include (JSON only).
+        """
+        rows = self.summary()
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(["name", "count", "mean_ms", "p50_ms",
+                                 "p99_ms", "histogram"])
+                for row in rows:
+                    writer.writerow([row["name"], row["count"],
+                                     f"{row['mean_ms']:.4f}",
+                                     f"{row['p50_ms']:.4f}",
+                                     f"{row['p99_ms']:.4f}",
+                                     json.dumps(row["histogram"])])
+        else:
+            with open(path, "w") as file:
+                json.dump({"timings": rows, **(extra or {})}, file, indent=2)
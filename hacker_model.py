@@ -0,0 +1,585 @@
+"""
+The model of the Hacker game: entities, the grid and the game logic.
+
+This module doesn't depend on tkinter or PIL, so the game can be simulated
+headlessly (see hacker_simulation.py).
+"""
+from hacker_game_support import *
+from typing import Iterator, Optional
+import random
+import re
+
+MIN_XCOORD = 0
+MIN_YCOORD = 0
+YCOORD_BOUND = 1
+
+class Entity(object):
+    """An abstract class used to represent any element that can appear on the 
+    game's grid.
+
+    Entities carry no per-instance state, so the model shares one instance of
+    each type (see CODE_ENTITIES) rather than creating new ones."""
+
+    __slots__ = ()
+
+    def display(self) -> str:
+        """
+        (str): Return character used to represent the entity in text-based grid
+        """
+        raise NotImplementedError() 
+    
+    def __repr__(self) -> str:
+        """(str): Return a representation of this Entity."""
+        return f'{self.__class__.__name__}()'
+
+
+class Player(Entity):
+    """A subclass of Entity representing a Player within the game."""
+
+    __slots__ = ()
+
+    def display(self) -> str:
+        """(str): Return the character representing a player."""
+        return PLAYER
+
+
+class Destroyable(Entity):
+    """A subclass of Entity representing a Destroyable within the game. It can 
+    be destroyed by the player but not collected."""
+
+    __slots__ = ()
+
+    def display(self) -> str:
+        """(str): Return the character representing a destroyable."""
+        return DESTROYABLE
+
+
+class Collectable(Entity):
+    """A subclass of Entity representing a Collectable within the game. It can 
+    be destroyed or collected by the player."""
+
+    __slots__ = ()
+
+    def display(self) -> str:
+        """(str): Return the character representing a collectable."""
+        return COLLECTABLE
+
+
+class Blocker(Entity):
+    """A subclass of Entity representing a Blocker within the game. It cannot be
+    destoryed or collected by the player."""
+
+    __slots__ = ()
+
+    def display(self) -> str:
+        """(str): Return the character representing a blocker."""
+        return BLOCKER
+
+
+#Compact codes used by the Grid's cell storage, 0 is an empty cell
+EMPTY_CELL = 0
+ENTITY_CODES = {COLLECTABLE: 1, DESTROYABLE: 2, BLOCKER: 3, PLAYER: 4}
+CODE_ENTITIES = {1: Collectable(), 2: Destroyable(), 3: Blocker(), 4: Player()}
+CODE_DISPLAYS = {code: display for display, code in ENTITY_CODES.items()}
+OCCUPIED_CELL = re.compile(rb"[^\x00]")
+
+
+class Grid:
+    """A class representing the 2D grid of entities. The top left is (0, 0).
+
+    Entities are stored as one byte per cell (see ENTITY_CODES) in a flat,
+    row-major bytearray, so moving entities never allocates per-entity
+    objects.
+
+    Both axes of the storage are circular: cell (x, y) of the grid is stored
+    in column (x + column origin) % size of row (y + row origin) % size.
+    Scrolling the grid towards the player only clears the row that falls off
+    and advances the row origin, and rotating it only moves the column
+    origin, so both cost the same however many entities there are.
+
+    For each storage column the grid also keeps a bit mask of the storage
+    rows holding an entity. This occupancy index finds the entity nearest to
+    the player in any column without looking at the rest of the grid.
+    Live counters of entities per type, overall and per storage row, answer
+    counting queries (such as destroyables in the danger row) the same way.
+    """
+
+    def __init__(self, size: int) -> None:
+        """Constructs a grid with a size representing number of rows (columns).
+
+        Parameters:
+            size (int): The size representing number of rows (columns) in the grid
+        """
+        self._size = size
+        self._clear()
+
+    def _clear(self) -> None:
+        """Remove every entity and reset the storage origins."""
+        self._cells = bytearray(self._size * self._size)
+        self._column_masks = [0] * self._size
+        self._type_counts = [0] * len(CODE_ENTITIES)
+        self._row_counts = [[0] * len(CODE_ENTITIES) for _ in range(self._size)]
+        self._row_origin = 0
+        self._column_origin = 0
+    
+    def get_size(self) -> int:
+        """(int): Return the size of the grid."""
+        return self._size
+
+    def _index(self, x: int, y: int) -> int:
+        """(int): Return the index in the cell storage of the cell at (x, y)."""
+        return self._row_start(y) + (x + self._column_origin) % self._size
+
+    def _row_start(self, y: int) -> int:
+        """(int): Return the index in the cell storage where row y starts."""
+        return ((y + self._row_origin) % self._size) * self._size
+
+    def _set_cell(self, index: int, code: int) -> None:
+        """Write a code into the cell storage, keeping the occupancy index
+        and the entity counters up to date.
+
+        Parameters:
+            index (int): The index of the cell in the cell storage.
+            code (int): The entity code to store, or EMPTY_CELL.
+        """
+        row, column = divmod(index, self._size)
+        old_code = self._cells[index]
+        if old_code != EMPTY_CELL:
+            self._type_counts[old_code - 1] -= 1
+            self._row_counts[row][old_code - 1] -= 1
+        if code != EMPTY_CELL:
+            self._type_counts[code - 1] += 1
+            self._row_counts[row][code - 1] += 1
+        self._cells[index] = code
+        if code == EMPTY_CELL:
+            self._column_masks[column] &= ~(1 << row)
+        else:
+            self._column_masks[column] |= 1 << row
+
+    def _occupied_cells(self) -> Iterator[Tuple[int, int, int]]:
+        """Yield the (x, y, code) of every cell holding an entity."""
+        size = self._size
+        row_origin = self._row_origin
+        column_origin = self._column_origin
+
+        for index, code in enumerate(self._cells):
+            if code != EMPTY_CELL:
+                row, column = divmod(index, size)
+                yield (column - column_origin) % size, \
+                    (row - row_origin) % size, code
+    
+    def add_entity(self, position: Position, entity: Entity) -> None:
+        """Add a given entity into the grid at a specified position if it's valid
+        
+        Parameters:
+            position (Position): The specified position to be added to in the grid
+            entity (Entity): The entity to be added
+        """
+        if self.in_bounds(position):
+            code = ENTITY_CODES.get(entity.display())
+            if code is None:
+                raise NotImplementedError()
+            self._set_cell(self._index(position.get_x(), position.get_y()), code)
+    
+    def get_entities(self) -> Dict[Position, Entity]:
+        """(dict): Return the dictionary containing grid entities."""
+        entities = {}
+
+        for coordx, coordy, code in sorted(self._occupied_cells(),
+                                           key=lambda cell: (cell[1], cell[0])):
+            entities[intern_position(coordx, coordy)] = CODE_ENTITIES[code]
+        return entities
+    
+    def get_entity(self, position: Position) -> Optional[Entity]: 
+        """Return a entity from the grid at a specific position or None if the 
+        position does not have a mapped entity.
+        
+        Parameters:
+            positon (Position): The specific position to get entity.
+        
+        Returns:
+            (Entity): Return a entity at a specific position.
+        """
+        code = self.get_code(position.get_x(), position.get_y())
+        if code != EMPTY_CELL:
+            return CODE_ENTITIES[code]
+        else:
+            return None
+
+    def get_code(self, x: int, y: int) -> int:
+        """(int): Return the entity code at (x, y), EMPTY_CELL if there is no
+        entity or the coordinates are out of bounds."""
+        if MIN_XCOORD <= x < self._size and YCOORD_BOUND <= y < self._size:
+            return self._cells[self._index(x, y)]
+        return EMPTY_CELL
+    
+    def remove_entity(self, position: Position) -> None:
+        """Remove an entity from the grid at a specified position."""
+        coordx = position.get_x()
+        coordy = position.get_y()
+        if self.get_code(coordx, coordy) == EMPTY_CELL:
+            raise KeyError(position)
+        self._set_cell(self._index(coordx, coordy), EMPTY_CELL)
+
+    def get_storage(self) -> Tuple[bytearray, int, int]:
+        """Return the cell storage with its row and column origins. Row y of
+        the grid is storage row (y + row origin) % size and column x is
+        storage column (x + column origin) % size. The storage is shared, not
+        copied, and is replaced when the grid is cleared.
+
+        Returns:
+            (tuple): The cell storage (size * size entity codes, row by row),
+                the row origin and the column origin.
+        """
+        return self._cells, self._row_origin, self._column_origin
+
+    def get_row(self, y: int) -> bytes:
+        """(bytes): Return the entity codes in row y, ordered by x."""
+        start = self._row_start(y)
+        split = start + self._column_origin
+        return bytes(self._cells[split:start + self._size]
+                     + self._cells[start:split])
+
+    def get_window(self, x: int, y: int, width: int, height: int) -> bytes:
+        """Return the entity codes of a window of the grid, reading only the
+        cells inside it. Columns wrap around the sides of the grid, as
+        rotation does, and rows outside the grid are empty.
+
+        Parameters:
+            x (int): The column of the left edge of the window.
+            y (int): The row of the top edge of the window.
+            width (int): The columns in the window (at most the grid size).
+            height (int): The rows in the window.
+
+        Returns:
+            (bytes): width * height codes, row by row, each row ordered by x.
+        """
+        size = self._size
+        cells = self._cells
+        first = (x + self._column_origin) % size
+        rows = []
+        for row_y in range(y, y + height):
+            if not MIN_YCOORD <= row_y < size:
+                rows.append(bytes(width))
+                continue
+            start = self._row_start(row_y)
+            end = first + width
+            if end <= size:
+                rows.append(cells[start + first:start + end])
+            else:
+                rows.append(cells[start + first:start + size]
+                            + cells[start:start + end - size])
+        return b"".join(rows)
+
+    def get_column(self, x: int) -> bytes:
+        """(bytes): Return the entity codes in column x, ordered by y."""
+        column = self._cells[(x + self._column_origin) % self._size::self._size]
+        split = self._row_origin % self._size
+        return bytes(column[split:] + column[:split])
+
+    def row_contains(self, y: int, display: str) -> bool:
+        """(bool): Return True iff row y contains an entity with the given
+        display character."""
+        return self.count_in_row(y, display) > 0
+
+    def count_in_row(self, y: int, display: str) -> int:
+        """(int): Return the number of entities in row y with the given
+        display character."""
+        row = (y + self._row_origin) % self._size
+        return self._row_counts[row][ENTITY_CODES[display] - 1]
+
+    def count(self, display: str) -> int:
+        """(int): Return the number of entities in the grid with the given
+        display character."""
+        return self._type_counts[ENTITY_CODES[display] - 1]
+
+    def nearest_in_column(self, x: int) -> Optional[int]:
+        """Return the y coordinate of the entity in column x that is nearest to
+        the player, or None if the column is empty. This only reads the
+        occupancy index, so it costs the same however full the grid is.
+
+        Parameters:
+            x (int): The column to search.
+        """
+        size = self._size
+        mask = self._column_masks[(x + self._column_origin) % size]
+        if not mask:
+            return None
+
+        #Rotate the storage row bits so bit y stands for row y of the grid
+        origin = self._row_origin
+        mask = ((mask >> origin) | (mask << (size - origin))) & ((1 << size) - 1)
+        return (mask & -mask).bit_length() - 1
+
+    def scroll(self) -> None:
+        """Move every entity one row towards the player (an offset of MOVE),
+        dropping the entities that leave the grid."""
+        start = self._row_start(YCOORD_BOUND)
+        if any(self._row_counts[start // self._size]):
+            for index in range(start, start + self._size):
+                if self._cells[index] != EMPTY_CELL:
+                    self._set_cell(index, EMPTY_CELL)
+        self._row_origin = (self._row_origin + 1) % self._size
+
+    def rotate(self, change: int) -> None:
+        """Move every entity change columns along its row, wrapping around
+        the sides of the grid.
+
+        Parameters:
+            change (int): The number of columns to move right (negative moves
+                left).
+        """
+        self._column_origin = (self._column_origin - change) % self._size
+    
+    def serialise(self) -> Dict[Tuple[int, int], str]:
+        """Convert dictionary of Position and Entities into a simplified, 
+        serialised dictionary mapping tuples to characters. 
+
+        Returns:
+            (dict): Return a serialised mapping.
+        """
+        serial_entities = {}
+
+        for coordx, coordy, code in self._occupied_cells():
+            serial_entities[(coordx, coordy)] = CODE_DISPLAYS[code]
+
+        return serial_entities
+    
+    def in_bounds(self, position: Position) -> bool:
+        """(bool): Return a boolean based on whether the position is valid in
+         terms of the dimensions of the grid.
+        
+        Parameters:
+            positon (Position): The specific position to check the bounds.
+        """
+        coordx = position.get_x()
+        coordy = position.get_y()
+        return MIN_XCOORD <= coordx and coordx < self._size \
+            and YCOORD_BOUND <= coordy and coordy < self._size
+        
+
+    def get_cells(self) -> bytes:
+        """(bytes): Return the entity codes of every cell, row by row in
+        order of y, each row in order of x."""
+        return b"".join(self.get_row(y) for y in range(self._size))
+
+    def set_cells(self, cells: bytes) -> None:
+        """Replace every entity with the entity codes of cells, laid out as
+        get_cells returns them. Codes in the player's row are ignored.
+
+        Parameters:
+            cells (bytes): size * size entity codes (EMPTY_CELL for none).
+
+        Raises:
+            ValueError: If cells has the wrong length or an unknown code.
+        """
+        if len(cells) != self._size * self._size:
+            raise ValueError(f"Expected {self._size * self._size} cells, "
+                             f"got {len(cells)}")
+        self._clear()
+        for match in OCCUPIED_CELL.finditer(cells, self._size * YCOORD_BOUND):
+            code = cells[match.start()]
+            if code not in CODE_ENTITIES:
+                raise ValueError(f"Unknown entity code {code}")
+            self._set_cell(match.start(), code)
+
+    def set_entities(self, entities: dict) -> None:
+        """Set the position entity mapping according to the given entities.
+        Entities at positions outside the grid are ignored.
+        
+        Parameters:
+            entities (dict): The position entity mapping to be set to.
+        """
+        self._clear()
+        for position, entity in entities.items():
+            self.add_entity(position, entity)
+
+    def __repr__(self) -> str:
+        """(str): Return a representation of this Grid."""
+        return f'Grid({self.get_size()})'
+
+
+class Game:
+    """
+    A class handles the logic to control actions of the entities in the grid.
+    """
+
+    def __init__(self, size: int, rng: Optional[random.Random] = None) -> None:
+        """Constructs a game with a grid size.
+
+        Parameters:
+            size (int): The size representing number of rows (columns) in game
+            rng (random.Random | None): The random source used to generate
+                entities; the global random module if not given. Pass a
+                seeded random.Random for a reproducible game.
+        """
+        self._size = size
+        self._rng = random if rng is None else rng
+        self._grid = Grid(self._size)
+        self._won = False
+
+        self._num_collected = 0
+        self._num_destroyed = 0
+        self._total_shots = 0
+    
+    def get_grid(self) -> Grid: 
+        """(Grid): Return the instance of the grid held by the game."""
+        return self._grid
+
+    def get_player_position(self) -> Position:
+        """(Position): Return the position of the player in the grid."""
+        centered_xcoord = self._size // 2 
+        return intern_position(centered_xcoord, MIN_YCOORD)
+    
+    def get_num_collected(self) -> int:
+        """(int): Return the total of Collectables acquired."""
+        return self._num_collected
+
+    def get_num_destroyed(self) -> int:
+        """(int): Return the total of Destroyables removed with a shot."""
+        return self._num_destroyed
+
+    def get_total_shots(self) -> int:
+        """(int): Return the total of shots taken."""
+        return self._total_shots
+
+    def set_counts(self, collected: int, destroyed: int, shots: int) -> None:
+        """Set the collected, destroyed and shot totals, as when a saved
+        game is loaded."""
+        self._num_collected = collected
+        self._num_destroyed = destroyed
+        self._total_shots = shots
+    
+    def rotate_grid(self, direction: str) -> None:
+        """Rotate the positions of the entities within the grid depending on 
+        the direction they are being rotated. Entities leaving one side of
+        the grid reappear on the other; the player doesn't move.
+
+        Examples:
+            >>> game = Game(3)
+            >>> game.get_grid().add_entity(Position(2, 1), Collectable())
+            >>> game.rotate_grid(RIGHT)
+            >>> game.get_grid().serialise()
+            {(0, 1): 'C'}
+            >>> game.rotate_grid(LEFT)
+            >>> game.rotate_grid(LEFT)
+            >>> game.get_grid().serialise()
+            {(1, 1): 'C'}
+
+        Parameters:
+            direction(str): The direction positions of entities being rotated.
+        """
+        direction = direction.upper()
+        change = ROTATIONS[DIRECTIONS.index(direction)]
+
+        if direction in DIRECTIONS:
+            self._grid.rotate(change[0])
+
+    def _create_entity(self, display: str) -> Entity:
+        """Uses a display character to get the (shared) Entity of that type.
+        
+        Parameters:
+            display (str): The display character of entity.
+        
+        Returns:
+            (Entity): The entity to be created.
+        """
+        if display in (COLLECTABLE, DESTROYABLE, BLOCKER):
+            return CODE_ENTITIES[ENTITY_CODES[display]]
+        else:
+            raise NotImplementedError()
+
+    def generate_entities(self) -> None:
+        """
+        Method given to the students to generate a random amount of entities to
+        add into the game after each step
+        """
+        # Generate amount
+        entity_count = self._rng.randint(0, self.get_grid().get_size() - 3)
+        entities = self._rng.choices(ENTITY_TYPES, k=entity_count)
+
+        # Blocker in a 1 in 4 chance
+        blocker = self._rng.randint(1, 4) % 4 == 0
+
+        # UNCOMMENT THIS FOR TASK 3 (CSSE7030)
+        # bomb = False
+        # if not blocker:
+        #     bomb = random.randint(1, 4) % 4 == 0
+
+        total_count = entity_count
+        if blocker:
+            total_count += 1
+            entities.append(BLOCKER)
+
+        # UNCOMMENT THIS FOR TASK 3 (CSSE7030)
+        # if bomb:
+        #     total_count += 1
+        #     entities.append(BOMB)
+
+        entity_index = self._rng.sample(range(self.get_grid().get_size()),
+                                        total_count)
+
+        # Add entities into grid
+        for pos, entity in zip(entity_index, entities):
+            position = intern_position(pos, self.get_grid().get_size() - 1)
+            #'Game' object has no attribute '_create_entity'
+            new_entity = self._create_entity(entity)
+            self.get_grid().add_entity(position, new_entity)
+            
+    def step(self) -> None:
+        """Moves all entities on the board by an offset of (0, -1)."""
+        self._grid.scroll()
+        self.generate_entities()
+
+    def fire(self, shot_type: str) -> None:
+        """Handles firing/collecting actions of player towards an entity.
+        
+        Parameters:
+            shot_type (str): A collect or destroy shot has been fired.
+        """
+        self._total_shots += 1
+
+        #Find the position and entity that will be fired
+        fire_xcoord = self.get_player_position().get_x()
+        min_ycoord_entity = self._grid.nearest_in_column(fire_xcoord)
+
+        if min_ycoord_entity is not None:
+            del_position = intern_position(fire_xcoord, min_ycoord_entity)
+            entity_display = CODE_DISPLAYS[
+                self._grid.get_code(fire_xcoord, min_ycoord_entity)]
+
+            #Collectable will be fired
+            if entity_display == COLLECTABLE:
+                if shot_type == COLLECT:
+                    self._num_collected += 1
+                    self.get_grid().remove_entity(del_position)
+                if shot_type == DESTROY:
+                    self._num_destroyed += 1
+                    self.get_grid().remove_entity(del_position)
+
+            #Destroyable will be fired
+            if shot_type == DESTROY and entity_display == DESTROYABLE:
+                self._num_destroyed += 1
+                self.get_grid().remove_entity(del_position)
+
+    def has_won(self) -> bool:
+        """(bool): Return True if the player has won the game."""
+        return self.get_num_collected() >= COLLECTION_TARGET
+    
+    def has_lost(self) -> bool:
+        """(bool): Returns True if the game is lost."""
+        return self._grid.row_contains(YCOORD_BOUND, DESTROYABLE)
+
+    def stats(self) -> Dict[str, int]:
+        """(dict): Return the live game statistics: the number of entities of
+        each type in the grid, the destroyables in the danger row and the
+        player's shot counts."""
+        return {
+            "collectables": self._grid.count(COLLECTABLE),
+            "destroyables": self._grid.count(DESTROYABLE),
+            "blockers": self._grid.count(BLOCKER),
+            "danger": self._grid.count_in_row(YCOORD_BOUND, DESTROYABLE),
+            "collected": self._num_collected,
+            "destroyed": self._num_destroyed,
+            "shots": self._total_shots,
+        }
@@ -0,0 +1,125 @@
+"""
+Frame times of the Hacker game view, comparing the retained canvas items of
+GameField with redrawing every item each frame, as the view used to, and
+the frame times of a fixed viewport on growing grids.
+
+Needs a display, since it opens (and closes) a Tk window.
+
+Usage:
+    python hacker_render_benchmark.py [FRAMES] [SIZE...]
+
+The viewport is measured on VIEWPORT_GRID_SIZES.
+"""
+import random
+import sys
+import time
+import tkinter as tk
+
+from hacker_game import MAX_VIEW_SIZE, GameField, ScoreBar
+from hacker_game_support import *
+from hacker_model import (CODE_DISPLAYS, ENTITY_CODES, MIN_XCOORD, MIN_YCOORD,
+                          Game)
+
+BENCHMARK_SEED = 1001
+DEFAULT_FRAMES = 100
+DEFAULT_SIZES = (7, 30, 100)
+VIEWPORT_GRID_SIZES = (100, 1000, 3000)
+
+
+def _frames(size: int, frames: int, view: int = None):
+    """Yields the cell codes and scores of frames consecutive steps of a
+    game, with the player shown as the view shows it, for a view x view
+    viewport (the whole grid if not given)."""
+    view = view or size
+    game = Game(size, random.Random(BENCHMARK_SEED))
+    player = game.get_player_position()
+    for _ in range(frames):
+        game.step()
+        if game.has_lost() or game.has_won():
+            game = Game(size, random.Random(BENCHMARK_SEED))
+        cells = bytearray(game.get_grid().get_window(
+            player.get_x() - view // 2, MIN_YCOORD, view, view))
+        cells[player.get_y() * view + view // 2] = ENTITY_CODES[PLAYER]
+        yield cells, game.get_num_collected(), game.get_num_destroyed()
+
+
+def _redraw_all(field: GameField, scores: ScoreBar, cells: bytes,
+                collected: int, destroyed: int) -> None:
+    """Draws a frame the old way: delete every item and create it again."""
+    size = field._size
+    field.delete(tk.ALL)
+    scores.delete(tk.ALL)
+    field.create_rectangle(MIN_XCOORD, MIN_YCOORD, MAP_WIDTH, MAP_HEIGHT,
+                           fill=FIELD_COLOUR)
+    field.draw_player_area()
+    for index, code in enumerate(cells):
+        if code:
+            position = Position(index % size, index // size)
+            display = CODE_DISPLAYS[code]
+            field.create_rectangle(field.get_bbox(position),
+                                   fill=COLOURS[display])
+            field.create_text(field.get_position_center(position),
+                              text=display, fill="white")
+    for row, text in enumerate(("Score", f"{collected}", f"{destroyed}")):
+        scores.create_text(SCORE_WIDTH / 2, (row + 0.5) * 50, text=text)
+
+
+def _time(root: tk.Tk, draw, frames) -> float:
+    """(float): Return the mean seconds to draw and render each frame."""
+    start = time.perf_counter()
+    count = 0
+    for frame in frames:
+        draw(*frame)
+        root.update_idletasks()
+        count += 1
+    return (time.perf_counter() - start) / count
+
+
+def run(frames: int = DEFAULT_FRAMES, sizes=DEFAULT_SIZES) -> None:
+    """Prints the mean frame time of both ways of drawing for each size."""
+    try:
+        root = tk.Tk()
+    except tk.TclError as error:
+        sys.exit(f"This benchmark needs a display: {error}")
+    try:
+        for size in sizes:
+            field = GameField(root, size, MAP_WIDTH, MAP_HEIGHT)
+            scores = ScoreBar(root, size)
+            field.pack()
+            scores.pack()
+            old = _time(root, lambda *frame: _redraw_all(field, scores,
+                                                         *frame),
+                        _frames(size, frames))
+            field.destroy()
+            scores.destroy()
+
+            field = GameField(root, size, MAP_WIDTH, MAP_HEIGHT)
+            scores = ScoreBar(root, size)
+            field.pack()
+            scores.pack()
+
+            def retained(cells, collected, destroyed):
+                field.draw_cells(cells)
+                scores.draw(collected, destroyed)
+            new = _time(root, retained, _frames(size, frames))
+            field.destroy()
+            scores.destroy()
+            print(f"{size}x{size}: redraw everything {old * 1000:.2f}ms, "
+                  f"retained items {new * 1000:.2f}ms per frame "
+                  f"({old / new:.1f}x)")
+
+        for size in VIEWPORT_GRID_SIZES:
+            field = GameField(root, MAX_VIEW_SIZE, MAP_WIDTH, MAP_HEIGHT)
+            field.pack()
+            frame = _time(root, lambda cells, *scores: field.draw_cells(cells),
+                          _frames(size, frames, MAX_VIEW_SIZE))
+            field.destroy()
+            print(f"{size}x{size} through a {MAX_VIEW_SIZE}x{MAX_VIEW_SIZE} "
+                  f"viewport: {frame * 1000:.2f}ms per frame")
+    finally:
+        root.destroy()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FRAMES,
+        [int(arg) for arg in sys.argv[2:]] or DEFAULT_SIZES)
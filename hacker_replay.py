@@ -0,0 +1,296 @@
+"""
+Recording and replaying Hacker games from compact binary input logs.
+
+A game seeded with random.Random(seed) is reproduced exactly by replaying its
+actions between the same steps, so a log only holds the seed and the
+actions, each tagged with the number of steps made before it. A checksum of
+the game state is logged after every step and at the end, so a replay can
+check that it really reproduces the recorded game.
+
+Log format (little-endian), written append-only:
+    header  HEADER: magic b"HKRL", version, grid size, seed
+    records RECORD: kind, tick, value, checksum
+        ACTION_RECORD  value is the index of the action in ACTIONS
+        STEP_RECORD    checksum of the state after the step
+        END_RECORD     value is END_WON or END_LOST, checksum of the state
+
+A log that ends in a partial record is rejected, unless it is read with
+partial=True (replay --partial), as for a log cut short by a crash, which
+replays up to its last complete record.
+
+Usage:
+    python hacker_replay.py record DIRECTORY [--games N] [--ticks T]
+    python hacker_replay.py replay LOG... [--workers W] [--partial]
+"""
+import argparse
+import os
+import random
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterable, List, NamedTuple, Optional, Tuple
+
+from hacker_game_support import *
+from hacker_model import Game
+from hacker_simulation import ACTIONS, NOOP, Simulation, random_policy
+
+LOG_MAGIC = b"HKRL"
+LOG_VERSION = 1
+LOG_SUFFIX = ".hkr"
+HEADER = struct.Struct("<4sBHQ")
+RECORD = struct.Struct("<BIBI")
+COUNTERS = struct.Struct("<III")
+ACTION_RECORD, STEP_RECORD, END_RECORD = 1, 2, 3
+END_WON, END_LOST = 1, 2
+SEED_BITS = 63
+BATCH_CHUNK = 16
+
+
+def state_checksum(game: Game) -> int:
+    """(int): Return the CRC-32 of game's grid (in logical order) and shot
+    counters."""
+    grid = game.get_grid()
+    checksum = 0
+    for y in range(grid.get_size()):
+        checksum = zlib.crc32(grid.get_row(y), checksum)
+    return zlib.crc32(COUNTERS.pack(game.get_num_collected(),
+                                    game.get_num_destroyed(),
+                                    game.get_total_shots()), checksum)
+
+
+def new_seed() -> int:
+    """(int): Return a fresh random seed for a recorded game."""
+    return random.SystemRandom().getrandbits(SEED_BITS)
+
+
+class GameRecorder:
+    """Appends the actions and steps of one game to a log file."""
+
+    def __init__(self, path: str, size: int, seed: int) -> None:
+        """Creates the log and writes its header.
+
+        Parameters:
+            path (str): The log file to create.
+            size (int): The grid size of the game.
+            seed (int): The seed of the game's random.Random.
+        """
+        self._path = path
+        self._file: Optional[BinaryIO] = open(path, "wb")
+        self._file.write(HEADER.pack(LOG_MAGIC, LOG_VERSION, size, seed))
+        self._tick = 0
+
+    def get_path(self) -> str:
+        """(str): Return the path of the log."""
+        return self._path
+
+    def record_action(self, action: str) -> None:
+        """Logs an action made before the next step."""
+        self._write(ACTION_RECORD, ACTIONS.index(action), 0)
+
+    def record_step(self, game: Game) -> None:
+        """Logs a step that has just been made, with the resulting state.
+        The log is flushed so a crash loses at most the current tick."""
+        self._write(STEP_RECORD, 0, state_checksum(game))
+        self._tick += 1
+        if self._file is not None:
+            self._file.flush()
+
+    def record_end(self, game: Game) -> None:
+        """Logs the result of a finished game and closes the log."""
+        self._write(END_RECORD, END_WON if game.has_won() else END_LOST,
+                    state_checksum(game))
+        self.close()
+
+    def close(self) -> None:
+        """Closes the log; later records are ignored."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, kind: int, value: int, checksum: int) -> None:
+        """Appends a record if the log is still open."""
+        if self._file is not None:
+            self._file.write(RECORD.pack(kind, self._tick, value, checksum))
+
+
+def read_log(path: str, partial: bool = False
+             ) -> Tuple[int, int, List[Tuple[int, int, int, int]]]:
+    """Reads a log.
+
+    Parameters:
+        path (str): The log file.
+        partial (bool): If True, a partial record at the end of the log is
+            ignored rather than rejected.
+
+    Returns:
+        (tuple): The grid size, the seed and the (kind, tick, value,
+            checksum) records.
+
+    Raises:
+        ValueError: If the file isn't a log of this version, or ends in a
+            partial record and partial is False.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is too short to be a game log")
+    magic, version, size, seed = HEADER.unpack_from(data)
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        raise ValueError(f"{path} is not a version {LOG_VERSION} game log")
+    end = HEADER.size + (len(data) - HEADER.size) // RECORD.size * RECORD.size
+    if end != len(data) and not partial:
+        raise ValueError(f"{path} ends in a partial record")
+    return size, seed, list(RECORD.iter_unpack(data[HEADER.size:end]))
+
+
+class ReplayResult(NamedTuple):
+    """The outcome of replaying one log."""
+    path: str
+    ticks: int
+    ok: bool
+    mismatch_tick: Optional[int]
+    finished: bool
+    won: bool
+    lost: bool
+    seconds: float
+
+
+def replay_log(path: str, partial: bool = False) -> ReplayResult:
+    """Replays a log headlessly, checking every logged checksum. A record
+    that isn't valid where it is counts as a mismatch.
+
+    Parameters:
+        path (str): The log file.
+        partial (bool): If True, a partial record at the end of the log is
+            ignored (see read_log).
+
+    Returns:
+        (ReplayResult): Whether the replay matched, and the first tick that
+            didn't if not.
+
+    Raises:
+        ValueError: If the file isn't a complete log of this version.
+    """
+    start = time.perf_counter()
+    size, seed, records = read_log(path, partial)
+    game = Game(size, random.Random(seed))
+    tick = 0
+    mismatch = None
+    finished = False
+    for kind, record_tick, value, checksum in records:
+        if record_tick != tick:
+            mismatch = tick
+            break
+        if kind == ACTION_RECORD:
+            if value >= len(ACTIONS):
+                mismatch = tick
+                break
+            action = ACTIONS[value]
+            if action in DIRECTIONS:
+                game.rotate_grid(action)
+            elif action in SHOT_TYPES:
+                game.fire(action)
+        elif kind == STEP_RECORD:
+            game.step()
+            tick += 1
+            if state_checksum(game) != checksum:
+                mismatch = tick
+                break
+        elif kind == END_RECORD:
+            finished = True
+            won = game.has_won()
+            if (state_checksum(game) != checksum or won != (value == END_WON)
+                    or not (won or game.has_lost())):
+                mismatch = tick
+            break
+        else:
+            mismatch = tick
+            break
+    return ReplayResult(path, tick, mismatch is None, mismatch, finished,
+                        game.has_won(), game.has_lost(),
+                        time.perf_counter() - start)
+
+
+def replay_logs(paths: Iterable[str], workers: int = 1,
+                partial: bool = False) -> List[ReplayResult]:
+    """Replays many logs, in parallel over worker processes if workers > 1.
+
+    Parameters:
+        paths (Iterable[str]): The log files.
+        workers (int): The number of worker processes.
+        partial (bool): If True, partial records at the ends of logs are
+            ignored (see read_log).
+    """
+    paths = list(paths)
+    if workers == 1:
+        return [replay_log(path, partial) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(replay_log, paths, [partial] * len(paths),
+                             chunksize=BATCH_CHUNK))
+
+
+def record_simulation(path: str, size: int, seed: int, ticks: int,
+                      policy_seed: Optional[int] = None) -> None:
+    """Plays a game with random actions for up to ticks ticks, recording it
+    to path as the controller would."""
+    simulation = Simulation(size, seed)
+    game = simulation.get_game()
+    policy = random_policy(policy_seed)
+    recorder = GameRecorder(path, size, seed)
+    for _ in range(ticks):
+        action = policy(game)
+        if action != NOOP:
+            recorder.record_action(action)
+        if simulation.tick(action):
+            recorder.record_end(game)
+            return
+        recorder.record_step(game)
+    recorder.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="record random games")
+    record.add_argument("directory")
+    record.add_argument("--games", type=int, default=1000)
+    record.add_argument("--ticks", type=int, default=1000)
+    record.add_argument("--size", type=int, default=GRID_SIZE)
+    replay = commands.add_parser("replay", help="replay and check logs")
+    replay.add_argument("logs", nargs="+")
+    replay.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    replay.add_argument("--partial", action="store_true",
+                        help="replay logs cut short by a crash")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        os.makedirs(args.directory, exist_ok=True)
+        for index in range(args.games):
+            record_simulation(
+                os.path.join(args.directory, f"game_{index:06d}{LOG_SUFFIX}"),
+                args.size, new_seed(), args.ticks, index)
+        print(f"Recorded {args.games} games in {args.directory}")
+    else:
+        paths = []
+        for log in args.logs:
+            if os.path.isdir(log):
+                paths.extend(os.path.join(log, name)
+                             for name in sorted(os.listdir(log))
+                             if name.endswith(LOG_SUFFIX))
+            else:
+                paths.append(log)
+        start = time.perf_counter()
+        results = replay_logs(paths, args.workers, args.partial)
+        elapsed = time.perf_counter() - start
+        ticks = sum(result.ticks for result in results)
+        for result in results:
+            if not result.ok:
+                print(f"{result.path}: diverged at tick {result.mismatch_tick}")
+        print(f"Replayed {len(results)} logs ({ticks} ticks) in {elapsed:.2f}s"
+              f" ({ticks / elapsed:.0f} ticks/s): "
+              f"{sum(result.ok for result in results)} matched")
+
+
+if __name__ == "__main__":
+    main()
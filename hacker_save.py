@@ -0,0 +1,239 @@
+"""
+Versioned binary save files for the Hacker game.
+
+A save holds the grid as one entity code per cell (see
+hacker_model.ENTITY_CODES), compressed with zlib, and the game's counters,
+timer and pause state. It is read without eval, and written to a temporary
+file that is renamed over the old save, so an interrupted save never leaves
+a broken file behind.
+
+Format (little-endian):
+    HEADER: magic b"HKSV", version, grid size, time count, shots, collected,
+            destroyed, paused
+    zlib-compressed cells (grid size * grid size codes, row by row)
+    CRC-32 of everything before it
+
+Saves in the original text format (the repr of the entity dict and one
+counter per line, written by earlier versions of save_game) are still read
+by read_legacy_save.
+
+Usage:
+    python hacker_save.py [SIZE...]
+"""
+import os
+import random
+import re
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from typing import NamedTuple
+
+from hacker_game_support import *
+import hacker_model
+from hacker_model import CODE_ENTITIES, Game
+
+SAVE_MAGIC = b"HKSV"
+SAVE_VERSION = 1
+HEADER = struct.Struct("<4sBIIIIIB")
+CHECKSUM = struct.Struct("<I")
+COMPRESSION_LEVEL = 6
+LEGACY_ENTITY = re.compile(r"Position\((\d+), (\d+)\): (\w+)\(\)")
+LEGACY_CODES = {entity.__class__.__name__: code
+                for code, entity in CODE_ENTITIES.items()}
+BENCHMARK_SIZES = (7, 100, 1000, 3000)
+BENCHMARK_REPEATS = 5
+
+
+class SaveData(NamedTuple):
+    """Everything a save file holds."""
+    size: int
+    cells: bytes
+    time_count: int
+    shots: int
+    collected: int
+    destroyed: int
+    paused: bool
+
+    @classmethod
+    def from_game(cls, game: Game, time_count: int,
+                  paused: bool) -> "SaveData":
+        """Returns the save data of game.
+
+        Parameters:
+            game (Game): The game to save.
+            time_count (int): The seconds the game has been played.
+            paused (bool): True iff the game was paused before saving.
+        """
+        grid = game.get_grid()
+        return cls(grid.get_size(), grid.get_cells(), time_count,
+                   game.get_total_shots(), game.get_num_collected(),
+                   game.get_num_destroyed(), paused)
+
+    def to_game(self) -> Game:
+        """(Game): Return a new game in the saved state."""
+        game = Game(self.size)
+        game.get_grid().set_cells(self.cells)
+        game.set_counts(self.collected, self.destroyed, self.shots)
+        return game
+
+
+def encode_save(data: SaveData) -> bytes:
+    """(bytes): Return the contents of a save file holding data."""
+    body = HEADER.pack(SAVE_MAGIC, SAVE_VERSION, data.size, data.time_count,
+                       data.shots, data.collected, data.destroyed,
+                       data.paused) + zlib.compress(data.cells,
+                                                    COMPRESSION_LEVEL)
+    return body + CHECKSUM.pack(zlib.crc32(body))
+
+
+def decode_save(contents: bytes) -> SaveData:
+    """Returns the data held by the contents of a save file.
+
+    Raises:
+        ValueError: If the contents aren't a valid save of this version.
+    """
+    if len(contents) < HEADER.size + CHECKSUM.size:
+        raise ValueError("The file is too short to be a save")
+    body = contents[:-CHECKSUM.size]
+    if CHECKSUM.unpack(contents[-CHECKSUM.size:])[0] != zlib.crc32(body):
+        raise ValueError("The save is corrupted")
+    magic, version, size, time_count, shots, collected, destroyed, paused = \
+        HEADER.unpack_from(body)
+    if magic != SAVE_MAGIC or version != SAVE_VERSION:
+        raise ValueError(f"Not a version {SAVE_VERSION} save")
+    try:
+        cells = zlib.decompress(body[HEADER.size:])
+    except zlib.error as error:
+        raise ValueError(f"The save is corrupted: {error}") from None
+    if len(cells) != size * size:
+        raise ValueError("The save's grid doesn't match its size")
+    return SaveData(size, cells, time_count, shots, collected, destroyed,
+                    bool(paused))
+
+
+def is_legacy_save(contents: bytes) -> bool:
+    """(bool): Return True iff contents look like a text-format save."""
+    return contents.lstrip().startswith(b"{")
+
+
+def read_legacy_save(text: str, size: int) -> SaveData:
+    """Parses a save written in the original text format, without eval.
+
+    Parameters:
+        text (str): The contents of the save.
+        size (int): The grid size of the game (the text format doesn't
+            record it).
+
+    Raises:
+        ValueError: If the text isn't a valid text-format save.
+    """
+    lines = text.splitlines()
+    if len(lines) < 6:
+        raise ValueError("A text save has 6 lines")
+    cells = bytearray(size * size)
+    for x, y, name in LEGACY_ENTITY.findall(lines[0]):
+        x, y = int(x), int(y)
+        if name not in LEGACY_CODES:
+            raise ValueError(f"Unknown entity {name}")
+        if 0 <= x < size and 0 <= y < size:
+            cells[y * size + x] = LEGACY_CODES[name]
+    if lines[3] not in ("True", "False"):
+        raise ValueError(f"Invalid pause state {lines[3]!r}")
+    return SaveData(size, bytes(cells), int(lines[1]), int(lines[2]),
+                    int(lines[4]), int(lines[5]), lines[3] == "True")
+
+
+def load_save(path: str, size: int) -> SaveData:
+    """Reads a save file in either format.
+
+    Parameters:
+        path (str): The save file.
+        size (int): The grid size to assume for a text-format save.
+
+    Raises:
+        ValueError: If the file isn't a valid save.
+    """
+    with open(path, "rb") as file:
+        contents = file.read()
+    if is_legacy_save(contents):
+        return read_legacy_save(contents.decode(), size)
+    return decode_save(contents)
+
+
+def write_save(path: str, data: SaveData) -> None:
+    """Writes a save file atomically: the new save is written and synced to
+    a temporary file next to path, which then replaces path.
+
+    Parameters:
+        path (str): The save file.
+        data (SaveData): The data to save.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temporary = tempfile.mkstemp(dir=directory, prefix=".save-")
+    try:
+        with os.fdopen(handle, "wb") as file:
+            file.write(encode_save(data))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def _legacy_text(game: Game, data: SaveData) -> str:
+    """(str): Return a save of game in the text format, as save_game used to
+    write it."""
+    return "\n".join([str(game.get_grid().get_entities()),
+                      str(data.time_count), str(data.shots),
+                      str(data.paused), str(data.collected),
+                      str(data.destroyed)])
+
+
+def benchmark(sizes=BENCHMARK_SIZES) -> None:
+    """Prints the save and load times and file sizes of filled grids, in the
+    binary format and the old text format."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "save")
+        for size in sizes:
+            game = Game(size, random.Random(size))
+            for _ in range(size):
+                game.step()
+            data = SaveData.from_game(game, 100, False)
+
+            start = time.perf_counter()
+            for _ in range(BENCHMARK_REPEATS):
+                write_save(path, SaveData.from_game(game, 100, False))
+            save_time = (time.perf_counter() - start) / BENCHMARK_REPEATS
+            start = time.perf_counter()
+            for _ in range(BENCHMARK_REPEATS):
+                load_save(path, size).to_game()
+            load_time = (time.perf_counter() - start) / BENCHMARK_REPEATS
+            binary_bytes = os.path.getsize(path)
+
+            start = time.perf_counter()
+            text = _legacy_text(game, data)
+            with open(path, "w") as file:
+                file.write(text)
+            text_save_time = time.perf_counter() - start
+            start = time.perf_counter()
+            load_save(path, size).to_game()
+            migrate_time = time.perf_counter() - start
+            # The old loader: eval the entity dict into a new grid
+            start = time.perf_counter()
+            with open(path) as file:
+                entities = eval(file.readline(), vars(hacker_model))
+            Game(size).get_grid().set_entities(entities)
+            eval_time = time.perf_counter() - start
+
+            print(f"{size}x{size}: binary save {save_time * 1000:.2f}ms, "
+                  f"load {load_time * 1000:.2f}ms, {binary_bytes} bytes; "
+                  f"text save {text_save_time * 1000:.2f}ms, "
+                  f"{len(text)} bytes, eval load {eval_time * 1000:.2f}ms, "
+                  f"migration load {migrate_time * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    benchmark([int(arg) for arg in sys.argv[1:]] or BENCHMARK_SIZES)
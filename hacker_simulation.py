@@ -0,0 +1,175 @@
+"""
+Headless, deterministic simulation of the Hacker game.
+
+A Simulation runs a hacker_model.Game with its own seeded random source and
+applies one explicit action per tick, so the same seed and actions always
+give the same game. Nothing here imports tkinter or PIL, and ticks run as fast
+as the CPU allows rather than every 2 seconds.
+
+Usage:
+    python hacker_simulation.py [TICKS] [SIZE] [SEED]
+"""
+import random
+import sys
+import time
+from typing import Callable, Dict, NamedTuple, Optional
+
+from hacker_game_support import *
+from hacker_model import Game
+
+NOOP = "NOOP"
+ACTIONS = (NOOP, LEFT, RIGHT, COLLECT, DESTROY)
+DEFAULT_SEED = 0
+DEFAULT_TICKS = 100000
+
+Policy = Callable[[Game], str]
+
+
+class SimulationResult(NamedTuple):
+    """The outcome of Simulation.run."""
+    won: bool
+    lost: bool
+    ticks: int
+    seconds: float
+    stats: Dict[str, int]
+
+    def ticks_per_second(self) -> float:
+        """(float): Return the simulation speed."""
+        return self.ticks / self.seconds if self.seconds else 0.0
+
+
+class Simulation:
+    """Steps a Game with one action per tick, without a display.
+
+    A tick does what the controller does between two scheduled steps: the
+    action is applied, the game is checked for a win or loss, and if it's
+    still going the grid is stepped.
+    """
+
+    def __init__(self, size: int = GRID_SIZE,
+                 seed: Optional[int] = DEFAULT_SEED) -> None:
+        """
+        Parameters:
+            size (int): The number of rows (columns) of the grid.
+            seed (int | None): The seed of the game's random source.
+        """
+        self._size = size
+        self.reset(seed)
+
+    def reset(self, seed: Optional[int] = None) -> Game:
+        """Starts a new game and returns it.
+
+        Parameters:
+            seed (int | None): The new seed, or the current one if not given.
+        """
+        if seed is not None:
+            self._seed = seed
+        self._game = Game(self._size, random.Random(self._seed))
+        self._ticks = 0
+        self._over = False
+        return self._game
+
+    def get_game(self) -> Game:
+        """(Game): Return the game being simulated."""
+        return self._game
+
+    def get_seed(self) -> int:
+        """(int): Return the seed of the current game."""
+        return self._seed
+
+    def get_ticks(self) -> int:
+        """(int): Return the number of ticks played in the current game."""
+        return self._ticks
+
+    def is_over(self) -> bool:
+        """(bool): Return True iff the game has been won or lost."""
+        return self._over
+
+    def act(self, action: str) -> None:
+        """Applies action without advancing the game, like a key press
+        between two steps.
+
+        Parameters:
+            action (str): One of ACTIONS.
+        """
+        game = self._game
+        if action in DIRECTIONS:
+            game.rotate_grid(action)
+        elif action in SHOT_TYPES:
+            game.fire(action)
+        elif action != NOOP:
+            raise ValueError(f"Unknown action {action!r}")
+
+    def tick(self, action: str = NOOP) -> bool:
+        """Applies action and advances the game by one step.
+
+        Parameters:
+            action (str): One of ACTIONS.
+
+        Returns:
+            (bool): True iff the game is over, in which case it isn't stepped.
+        """
+        if self._over:
+            return True
+        self.act(action)
+        game = self._game
+        self._ticks += 1
+
+        if game.has_lost() or game.has_won():
+            self._over = True
+        else:
+            game.step()
+        return self._over
+
+    def run(self, policy: Policy, max_ticks: int) -> SimulationResult:
+        """Plays the current game with policy until it's over or max_ticks
+        ticks have been played.
+
+        Parameters:
+            policy (Policy): Chooses the action for each tick from the game.
+            max_ticks (int): The tick limit.
+        """
+        game = self._game
+        start = time.perf_counter()
+        ticks = 0
+        while ticks < max_ticks and not self._over:
+            self.tick(policy(game))
+            ticks += 1
+        return SimulationResult(game.has_won(), game.has_lost(), ticks,
+                                time.perf_counter() - start, game.stats())
+
+
+def random_policy(seed: Optional[int] = None) -> Policy:
+    """Returns a policy that picks uniformly random actions."""
+    rng = random.Random(seed)
+    return lambda game: rng.choice(ACTIONS)
+
+
+def noop_policy(game: Game) -> str:
+    """A policy that never acts."""
+    return NOOP
+
+
+def benchmark(ticks: int = DEFAULT_TICKS, size: int = GRID_SIZE,
+              seed: int = DEFAULT_SEED) -> None:
+    """Prints the speed of ticks random-policy ticks, restarting finished
+    games, and how the games ended."""
+    simulation = Simulation(size, seed)
+    policy = random_policy(seed)
+    results = {"won": 0, "lost": 0}
+    played = 0
+    seconds = 0.0
+    while played < ticks:
+        result = simulation.run(policy, ticks - played)
+        played += result.ticks
+        seconds += result.seconds
+        if result.won or result.lost:
+            results["won" if result.won else "lost"] += 1
+            simulation.reset(simulation.get_seed() + 1)
+    print(f"{played} ticks on a {size}x{size} grid in {seconds:.3f}s "
+          f"({played / seconds:.0f} ticks/s): {results['won']} won, "
+          f"{results['lost']} lost")
+
+
+if __name__ == "__main__":
+    benchmark(*(int(arg) for arg in sys.argv[1:4]))
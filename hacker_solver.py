@@ -0,0 +1,194 @@
+"""
+Offline solver finding the best play of a Hacker game with known spawns.
+
+generate_entities only draws from the game's random source, so the rows a
+seed spawns don't depend on how the game is played. record_spawns replays
+them, and solve searches every way of playing against them by dynamic
+programming over ticks: each layer holds the compact states (see hacker_bot)
+reachable at the start of a tick without losing, keyed by their grid so that
+of two states with the same grid only the one with more collectables is kept
+(it dominates the other). A layer larger than max_states is cut back to the
+max_states most promising states, in which case the result is a lower bound
+rather than the optimum.
+
+Usage:
+    python hacker_solver.py [SEED] [TICKS] [SIZE] [ACTIONS_PER_TICK]
+"""
+import random
+import sys
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from hacker_game_support import *
+from hacker_model import Game
+from hacker_simulation import ACTIONS, DEFAULT_SEED, NOOP, Simulation
+from hacker_bot import (DEFAULT_ACTIONS_PER_TICK, State, apply_action,
+                        evaluate, is_lost, step_state)
+
+DEFAULT_TICKS = 40
+DEFAULT_MAX_STATES = 20000
+PLAYER_ACTIONS = tuple(action for action in ACTIONS if action != NOOP)
+
+# A layer maps a grid to (collected, parent grid, actions from the parent)
+Layer = Dict[bytes, Tuple[int, Optional[bytes], Tuple[str, ...]]]
+
+
+def record_spawns(size: int, seed: int, ticks: int) -> List[bytes]:
+    """Returns the rows of entity codes generated by the first ticks steps of
+    a game seeded with seed (as hacker_simulation.Simulation seeds it).
+
+    Parameters:
+        size (int): The number of rows (columns) of the grid.
+        seed (int): The seed of the game.
+        ticks (int): The number of steps to record.
+    """
+    game = Game(size, random.Random(seed))
+    grid = game.get_grid()
+    spawns = []
+    for _ in range(ticks):
+        game.step()
+        spawns.append(grid.get_row(size - 1))
+    return spawns
+
+
+class Solution(NamedTuple):
+    """The best play found by solve."""
+    collected: int
+    won: bool
+    survived: bool
+    ticks: int
+    actions: List[Tuple[str, ...]]
+    states: int
+    seconds: float
+    exact: bool
+
+    def states_per_second(self) -> float:
+        """(float): Return the search speed."""
+        return self.states / self.seconds if self.seconds else 0.0
+
+
+def _tick_outcomes(state: State, actions_per_tick: int, size: int
+                   ) -> Dict[State, Tuple[str, ...]]:
+    """Returns every state reachable from state by actions_per_tick actions
+    (fewer actions stand for the rest being NOOP), with the shortest action
+    sequence reaching it."""
+    frontier: Dict[State, Tuple[str, ...]] = {state: ()}
+    reached = dict(frontier)
+    for _ in range(actions_per_tick):
+        next_frontier = {}
+        for current, path in frontier.items():
+            for action in PLAYER_ACTIONS:
+                following = apply_action(current, action, size)
+                if following not in reached:
+                    reached[following] = next_frontier[following] = \
+                        path + (action,)
+        frontier = next_frontier
+    return reached
+
+
+def solve(spawns: List[bytes], size: int = GRID_SIZE,
+          actions_per_tick: int = DEFAULT_ACTIONS_PER_TICK,
+          start: Optional[State] = None,
+          max_states: int = DEFAULT_MAX_STATES) -> Solution:
+    """Finds the play collecting the most entities against spawns, winning as
+    early as possible if the game can be won.
+
+    Parameters:
+        spawns (list): The row spawned by each step (see record_spawns); the
+            search lasts len(spawns) ticks.
+        size (int): The number of rows (columns) of the grid.
+        actions_per_tick (int): The actions played before each step.
+        start (State | None): The starting state; an empty grid by default.
+        max_states (int): The most states kept in a layer.
+
+    Returns:
+        (Solution): The best result with the actions of each tick.
+    """
+    began = time.perf_counter()
+    if start is None:
+        start = (bytes(size * size), 0)
+    layers: List[Layer] = [{start[0]: (start[1], None, ())}]
+    explored = 0
+    exact = True
+    winner: Optional[Tuple[bytes, int, Tuple[str, ...]]] = None
+
+    for spawn in spawns:
+        layer = layers[-1]
+        next_layer: Layer = {}
+        for cells, (collected, _, _) in layer.items():
+            outcomes = _tick_outcomes((cells, collected), actions_per_tick,
+                                      size)
+            explored += len(outcomes)
+            for state, actions in outcomes.items():
+                if is_lost(state, size):
+                    continue
+                if state[1] >= COLLECTION_TARGET:
+                    if winner is None or state[1] > winner[1]:
+                        winner = (cells, state[1], actions)
+                    continue
+                following, count = step_state(state, spawn, size)
+                kept = next_layer.get(following)
+                if kept is None or count > kept[0]:
+                    next_layer[following] = (count, cells, actions)
+        if winner is not None or not next_layer:
+            break
+        if len(next_layer) > max_states:
+            exact = False
+            best = sorted(next_layer.items(), key=lambda item: evaluate(
+                (item[0], item[1][0]), size), reverse=True)[:max_states]
+            next_layer = dict(best)
+        layers.append(next_layer)
+
+    if winner is not None:
+        parent, collected, last_actions = winner
+        plan = [last_actions]
+        ticks = len(layers)
+    else:
+        parent = max(layers[-1], key=lambda cells: layers[-1][cells][0])
+        collected = layers[-1][parent][0]
+        plan = []
+        ticks = len(layers) - 1
+    for layer in reversed(layers[1:]):
+        _, grandparent, actions = layer[parent]
+        plan.append(actions)
+        parent = grandparent
+    plan.reverse()
+
+    survived = winner is not None or len(layers) == len(spawns) + 1
+    return Solution(collected, winner is not None, survived, ticks, plan,
+                    explored, time.perf_counter() - began, exact)
+
+
+def replay(solution: Solution, size: int, seed: int) -> Simulation:
+    """Plays the actions of solution in a simulation of the seeded game and
+    returns it, checking the solver's model of the game."""
+    simulation = Simulation(size, seed)
+    for actions in solution.actions:
+        for action in actions:
+            simulation.act(action)
+        simulation.tick()
+    return simulation
+
+
+def main(seed: int = DEFAULT_SEED, ticks: int = DEFAULT_TICKS,
+         size: int = GRID_SIZE,
+         actions_per_tick: int = DEFAULT_ACTIONS_PER_TICK) -> None:
+    """Solves a seed and prints the best result."""
+    solution = solve(record_spawns(size, seed, ticks), size, actions_per_tick)
+    if solution.won or solution.survived:
+        outcome = "won" if solution.won else "loss avoided"
+    else:
+        outcome = "loss unavoidable" if solution.exact \
+            else "no way found to avoid a loss"
+    quality = "optimal" if solution.exact else "lower bound"
+    print(f"Seed {seed}: {solution.collected} collected, {outcome} after "
+          f"{solution.ticks} ticks ({quality}); "
+          f"{solution.states} states in {solution.seconds:.2f}s "
+          f"({solution.states_per_second():.0f} states/s)")
+    game = replay(solution, size, seed).get_game()
+    print(f"Replayed: {game.get_num_collected()} collected, "
+          f"won {game.has_won()}, lost {game.has_lost()}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:5]))
@@ -0,0 +1,134 @@
+"""
+A process-wide cache of the Hacker game's entity sprites.
+
+Each sprite listed in IMAGES is decoded from disk once, the first time it is
+needed. Resized variants are keyed by (entity, cell size) and prepared on
+worker threads, so building a view never waits on image I/O: until a
+variant is ready, SpriteCache.photo returns None and the view polls again
+later. The SPRITE_CACHE_SIZE most recently used variants are kept.
+
+Tk images can only be created on the Tk thread, so the conversion of a
+prepared variant into a PhotoImage happens in photo, which must be called
+from that thread.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageTk
+
+from hacker_game_support import *
+
+IMAGE_DIRECTORY = "images"
+SPRITE_CACHE_SIZE = 32
+SPRITE_WORKERS = 2
+
+
+class SpriteCache:
+    """Decoded entity sprites and their resized variants, evicted least
+    recently used first."""
+
+    def __init__(self, directory: str = IMAGE_DIRECTORY,
+                 capacity: int = SPRITE_CACHE_SIZE,
+                 workers: int = SPRITE_WORKERS) -> None:
+        """
+        Parameters:
+            directory (str): The directory holding the files named in IMAGES.
+            capacity (int): The number of resized variants to keep.
+            workers (int): The number of threads preparing variants.
+        """
+        self._directory = directory
+        self._capacity = capacity
+        self._lock = threading.Lock()
+        self._sources: Dict[str, Image.Image] = {}
+        self._variants: "OrderedDict[Tuple[str, int], Future]" = OrderedDict()
+        self._photos: "OrderedDict[Tuple[str, int], ImageTk.PhotoImage]" = \
+            OrderedDict()
+        self._executor = ThreadPoolExecutor(workers,
+                                            thread_name_prefix="sprites")
+        self.hits = 0
+        self.misses = 0
+
+    def _source(self, display: str) -> Image.Image:
+        """(Image): Return the decoded sprite of an entity, reading it from
+        disk the first time."""
+        with self._lock:
+            image = self._sources.get(display)
+        if image is None:
+            image = Image.open(os.path.join(self._directory,
+                                            IMAGES[display]))
+            image.load()
+            with self._lock:
+                image = self._sources.setdefault(display, image)
+        return image
+
+    def _resize(self, display: str, size: int) -> Image.Image:
+        """(Image): Return the sprite of an entity resized to a size x size
+        cell."""
+        return self._source(display).resize((size, size))
+
+    def prepare(self, display: str, size: int) -> Future:
+        """Starts preparing the variant of an entity's sprite for a cell
+        size on a worker thread, unless it is cached already.
+
+        Parameters:
+            display (str): The display character of the entity.
+            size (int): The width and height of a cell in pixels.
+
+        Returns:
+            (Future): The future of the resized image.
+        """
+        key = (display, size)
+        with self._lock:
+            future = self._variants.get(key)
+            if future is not None:
+                self._variants.move_to_end(key)
+                return future
+            future = self._executor.submit(self._resize, display, size)
+            self._variants[key] = future
+            while len(self._variants) > self._capacity:
+                self._variants.popitem(last=False)
+        return future
+
+    def prepare_all(self, size: int) -> List[Future]:
+        """Starts preparing every entity's sprite for a cell size.
+
+        Parameters:
+            size (int): The width and height of a cell in pixels.
+        """
+        return [self.prepare(display, size) for display in IMAGES]
+
+    def photo(self, display: str, size: int) -> Optional[ImageTk.PhotoImage]:
+        """Returns the Tk image of an entity's sprite for a cell size, or
+        None if it is still being prepared (preparing it if needed). Call
+        only from the Tk thread. Views should keep a reference to the images
+        they show, since an evicted image is deleted once unreferenced.
+
+        Parameters:
+            display (str): The display character of the entity.
+            size (int): The width and height of a cell in pixels.
+
+        Raises:
+            OSError: If the sprite's file can't be read.
+        """
+        key = (display, size)
+        photo = self._photos.get(key)
+        if photo is not None:
+            self._photos.move_to_end(key)
+            self.hits += 1
+            return photo
+
+        future = self.prepare(display, size)
+        if not future.done():
+            return None
+        self.misses += 1
+        photo = ImageTk.PhotoImage(future.result())
+        self._photos[key] = photo
+        while len(self._photos) > self._capacity:
+            self._photos.popitem(last=False)
+        return photo
+
+
+SPRITES = SpriteCache()
@@ -0,0 +1,246 @@
+"""
+Many Hacker games stepped in lockstep with NumPy.
+
+VectorEnv holds N games as one N x size x size array of entity codes (the
+codes of hacker_model.ENTITY_CODES) and per-game counter arrays, and applies
+one action per game per tick with array operations instead of a Python loop
+over games. A tick follows hacker_simulation.Simulation.tick: the actions
+are applied (Game.rotate_grid and Game.fire), finished games are detected
+(Game.has_won and Game.has_lost), and the other games are stepped (Game.step
+and Game.generate_entities, drawing from the same distributions). Finished
+games are reset to an empty grid and carry on from the next tick.
+
+Actions are indices into hacker_simulation.ACTIONS.
+
+Usage:
+    python hacker_vector_env.py [TICKS] [SIZE]
+"""
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from hacker_game_support import *
+from hacker_model import EMPTY_CELL, ENTITY_CODES, YCOORD_BOUND
+from hacker_simulation import ACTIONS, DEFAULT_SEED
+
+NOOP_ACTION, LEFT_ACTION, RIGHT_ACTION, COLLECT_ACTION, DESTROY_ACTION = \
+    range(len(ACTIONS))
+COLLECTABLE_CODE = ENTITY_CODES[COLLECTABLE]
+DESTROYABLE_CODE = ENTITY_CODES[DESTROYABLE]
+BLOCKER_CODE = ENTITY_CODES[BLOCKER]
+BENCHMARK_SIZES = (1, 64, 1024, 16384)
+DEFAULT_TICKS = 2000
+
+
+class VectorEnv:
+    """N Hacker games advanced together.
+
+    Every game scrolls on every tick (a finished game is reset to an empty
+    grid, which a scroll leaves empty), so one row origin is shared by all
+    games: storage row (y + origin) % size holds row y of every grid, as in
+    hacker_model.Grid. Rotations differ between games, so each game has its
+    own column origin.
+    """
+
+    def __init__(self, count: int, size: int = GRID_SIZE,
+                 seed: Optional[int] = DEFAULT_SEED) -> None:
+        """
+        Parameters:
+            count (int): The number of games N.
+            size (int): The number of rows (columns) of every grid.
+            seed (int | None): The seed of the random source used to
+                generate entities.
+        """
+        self._count = count
+        self._size = size
+        self._rng = np.random.default_rng(seed)
+        self._games = np.arange(count)
+        self._ranks = np.arange(size)
+        self._cells = np.zeros((count, size, size), dtype=np.uint8)
+        self._row_origin = 0
+        self._column_origins = np.zeros(count, dtype=np.int64)
+        self._collected = np.zeros(count, dtype=np.int64)
+        self._destroyed = np.zeros(count, dtype=np.int64)
+        self._shots = np.zeros(count, dtype=np.int64)
+        self._ticks = np.zeros(count, dtype=np.int64)
+        self._wins = 0
+        self._losses = 0
+
+    def get_count(self) -> int:
+        """(int): Return the number of games."""
+        return self._count
+
+    def get_size(self) -> int:
+        """(int): Return the number of rows (columns) of every grid."""
+        return self._size
+
+    def get_collected(self) -> np.ndarray:
+        """(np.ndarray): Return the collectables acquired in each game."""
+        return self._collected
+
+    def get_destroyed(self) -> np.ndarray:
+        """(np.ndarray): Return the entities destroyed in each game."""
+        return self._destroyed
+
+    def get_shots(self) -> np.ndarray:
+        """(np.ndarray): Return the shots taken in each game."""
+        return self._shots
+
+    def get_ticks(self) -> np.ndarray:
+        """(np.ndarray): Return the ticks played in each current game."""
+        return self._ticks
+
+    def get_cells(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Returns the entity codes of every grid in logical order, indexed
+        [game, y, x].
+
+        Parameters:
+            out (np.ndarray | None): An N x size x size uint8 array to write
+                the codes into instead of allocating a new one.
+        """
+        size = self._size
+        rows = (self._ranks + self._row_origin) % size
+        columns = (self._ranks[None, :] + self._column_origins[:, None]) % size
+        indices = (self._games[:, None, None] * size * size
+                   + rows[None, :, None] * size + columns[:, None, :])
+        return np.take(self._cells, indices, out=out)
+
+    def stats(self) -> Dict[str, np.ndarray]:
+        """(dict): Return the statistics of Game.stats for every game."""
+        danger = self._cells[:, (YCOORD_BOUND + self._row_origin) % self._size]
+        return {
+            "collectables": np.count_nonzero(
+                self._cells == COLLECTABLE_CODE, axis=(1, 2)),
+            "destroyables": np.count_nonzero(
+                self._cells == DESTROYABLE_CODE, axis=(1, 2)),
+            "blockers": np.count_nonzero(
+                self._cells == BLOCKER_CODE, axis=(1, 2)),
+            "danger": np.count_nonzero(danger == DESTROYABLE_CODE, axis=1),
+            "collected": self._collected.copy(),
+            "destroyed": self._destroyed.copy(),
+            "shots": self._shots.copy(),
+        }
+
+    def get_results(self) -> Tuple[int, int]:
+        """(tuple): Return the number of games won and lost so far."""
+        return self._wins, self._losses
+
+    def tick(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Applies one action to every game and advances them by one step.
+
+        Parameters:
+            actions (np.ndarray): N indices into ACTIONS.
+
+        Returns:
+            (tuple): Boolean arrays of the games won and lost on this tick.
+                These games have been reset and aren't stepped.
+        """
+        actions = np.asarray(actions)
+        self._ticks += 1
+        self._rotate(actions)
+        self._fire(actions)
+
+        danger = self._cells[:, (YCOORD_BOUND + self._row_origin) % self._size]
+        lost = (danger == DESTROYABLE_CODE).any(axis=1)
+        won = self._collected >= COLLECTION_TARGET
+        finished = won | lost
+        if finished.any():
+            self._wins += int(np.count_nonzero(won))
+            self._losses += int(np.count_nonzero(lost))
+            self._reset(finished)
+        self._step(~finished)
+        return won, lost
+
+    def _rotate(self, actions: np.ndarray) -> None:
+        """Rotates the grids of the games rotating left or right."""
+        left_change = ROTATIONS[DIRECTIONS.index(LEFT)][0]
+        right_change = ROTATIONS[DIRECTIONS.index(RIGHT)][0]
+        self._column_origins -= np.where(
+            actions == LEFT_ACTION, left_change,
+            np.where(actions == RIGHT_ACTION, right_change, 0))
+        self._column_origins %= self._size
+
+    def _fire(self, actions: np.ndarray) -> None:
+        """Fires the shots of the games collecting or destroying at the
+        nearest entity in the player's column."""
+        collect = actions == COLLECT_ACTION
+        destroy = actions == DESTROY_ACTION
+        shooting = np.flatnonzero(collect | destroy)
+        if not shooting.size:
+            return
+        self._shots[shooting] += 1
+
+        size = self._size
+        rows = (self._ranks + self._row_origin) % size
+        columns = (size // 2 + self._column_origins[shooting]) % size
+        # Column codes of each shooting game in logical row order
+        targets = self._cells[shooting[:, None], rows[None, :],
+                              columns[:, None]]
+        nearest = np.argmax(targets != EMPTY_CELL, axis=1)
+        codes = targets[np.arange(shooting.size), nearest]
+
+        collected = collect[shooting] & (codes == COLLECTABLE_CODE)
+        destroyed = destroy[shooting] & ((codes == COLLECTABLE_CODE)
+                                         | (codes == DESTROYABLE_CODE))
+        hit = collected | destroyed
+        self._collected[shooting[collected]] += 1
+        self._destroyed[shooting[destroyed]] += 1
+        self._cells[shooting[hit], rows[nearest[hit]], columns[hit]] = \
+            EMPTY_CELL
+
+    def _reset(self, games: np.ndarray) -> None:
+        """Starts new games in place of the masked ones."""
+        self._cells[games] = EMPTY_CELL
+        self._column_origins[games] = 0
+        self._collected[games] = 0
+        self._destroyed[games] = 0
+        self._shots[games] = 0
+        self._ticks[games] = 0
+
+    def _step(self, games: np.ndarray) -> None:
+        """Scrolls every grid and generates entities in the masked games."""
+        size = self._size
+        self._cells[:, (YCOORD_BOUND + self._row_origin) % size] = EMPTY_CELL
+        self._row_origin = (self._row_origin + 1) % size
+
+        # As in Game.generate_entities: 0 to size - 3 collectables or
+        # destroyables, a blocker 1 time in 4, in distinct random columns
+        rng = self._rng
+        counts = rng.integers(0, size - 2, self._count)
+        blockers = rng.integers(1, 5, self._count) % 4 == 0
+        kinds = np.where(rng.integers(0, 2, (self._count, size)) == 0,
+                         COLLECTABLE_CODE, DESTROYABLE_CODE)
+        ranks = self._ranks[None, :]
+        codes = np.where(ranks < counts[:, None], kinds,
+                         np.where((ranks == counts[:, None])
+                                  & blockers[:, None], BLOCKER_CODE,
+                                  EMPTY_CELL))
+        codes[~games] = EMPTY_CELL
+        positions = np.argsort(rng.random((self._count, size)), axis=1)
+        columns = (positions + self._column_origins[:, None]) % size
+        top = self._cells[:, (size - 1 + self._row_origin) % size]
+        np.put_along_axis(top, columns, codes.astype(np.uint8), axis=1)
+
+
+def benchmark(ticks: int = DEFAULT_TICKS, size: int = GRID_SIZE) -> None:
+    """Prints the speed of random-action ticks for each of BENCHMARK_SIZES
+    games."""
+    for count in BENCHMARK_SIZES:
+        env = VectorEnv(count, size)
+        rng = np.random.default_rng(DEFAULT_SEED)
+        actions = rng.integers(0, len(ACTIONS), (ticks, count))
+        start = time.perf_counter()
+        for tick_actions in actions:
+            env.tick(tick_actions)
+        elapsed = time.perf_counter() - start
+        wins, losses = env.get_results()
+        print(f"N={count:>5}: {ticks} ticks in {elapsed:.3f}s, "
+              f"{ticks / elapsed:.0f} vector ticks/s, "
+              f"{ticks * count / elapsed:.0f} game ticks/s "
+              f"({wins} won, {losses} lost)")
+
+
+if __name__ == "__main__":
+    benchmark(*(int(arg) for arg in sys.argv[1:3]))
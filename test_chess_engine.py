@@ -0,0 +1,70 @@
+"""
+Checks that chess_engine.Engine reports mates at the right distance, however
+warm its transposition table is.
+
+Usage:
+    python -m unittest test_chess_engine
+"""
+import unittest
+
+from chess import update_board
+from chess_engine import (MATE_SCORE, MATE_THRESHOLD, Engine,
+                          score_from_table, score_to_table)
+from chess_positions import parse_move
+
+#White mates in 2: Ra7, then Rb8 (a rook ladder)
+ROOK_LADDER = tuple(".......k/......../......../......../......../......../"
+                    "......../RR..K...".split("/"))
+
+
+def mate_in(plies: int) -> int:
+    """(int): Return the score of a mate plies plies from the root."""
+    return MATE_SCORE - plies
+
+
+class MateScoreTest(unittest.TestCase):
+    """Mate scores through the transposition table."""
+
+    def test_table_scores_round_trip(self):
+        for score in (0, 250, -250, mate_in(1), mate_in(7), -mate_in(4),
+                      MATE_THRESHOLD, -MATE_THRESHOLD):
+            for ply in (0, 1, 5):
+                self.assertEqual(score_from_table(score_to_table(score, ply),
+                                                  ply), score)
+        #A mate one ply after a node at ply 3 is one ply from that node
+        self.assertEqual(score_to_table(mate_in(4), 3), mate_in(1))
+        self.assertEqual(score_from_table(mate_in(1), 3), mate_in(4))
+        self.assertEqual(score_to_table(-mate_in(4), 3), -mate_in(1))
+        self.assertEqual(score_from_table(-mate_in(1), 3), -mate_in(4))
+
+    def test_fresh_search(self):
+        result = Engine().search(ROOK_LADDER, True, 4)
+        self.assertEqual(result.score, mate_in(3))
+
+    def test_later_position_searched_first(self):
+        #As when pondering: the mate in 1 reached after Ra7 Kg8 is in the
+        #table before the position two plies earlier is searched
+        engine = Engine()
+        later = ROOK_LADDER
+        for move in ("a1a7", "h8g8"):
+            later = update_board(later, parse_move(move))
+        self.assertEqual(engine.search(later, True, 2).score, mate_in(1))
+
+        result = engine.search(ROOK_LADDER, True, 4)
+        self.assertEqual(result.score, mate_in(3))
+        self.assertEqual(result.move, parse_move("a1a7"))
+
+    def test_earlier_position_searched_first(self):
+        engine = Engine()
+        self.assertEqual(engine.search(ROOK_LADDER, True, 4).score,
+                         mate_in(3))
+        after_rook = update_board(ROOK_LADDER, parse_move("a1a7"))
+        self.assertEqual(engine.search(after_rook, False, 3).score,
+                         -mate_in(2))
+        after_king = update_board(after_rook, parse_move("h8g8"))
+        self.assertEqual(engine.search(after_king, True, 2).score,
+                         mate_in(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
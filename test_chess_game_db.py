@@ -0,0 +1,166 @@
+"""
+Checks chess_game_db.GameDatabase round trips: building, adding, finding,
+compacting and recovering from an interrupted add.
+
+Usage:
+    python -m unittest test_chess_game_db
+"""
+import os
+import tempfile
+import unittest
+from typing import List, Tuple
+
+from chess import initial_state
+from chess_game_db import (BLACK_WIN, DRAW, GAMES_NAME, OFFSETS_NAME,
+                           RESULTS_NAME, UNKNOWN_RESULT, WHITE_WIN,
+                           GameDatabase, MoveStatistics, Occurrence,
+                           play_moves, read_games)
+from chess_positions import parse_move
+
+GAMES = [
+    ("e2e4 e7e5 g1f3 b8c6", WHITE_WIN),
+    ("e2e4 e7e5 f1c4", DRAW),
+    ("e2e4 c7c5", BLACK_WIN),
+    ("d2d4 d7d5", UNKNOWN_RESULT),
+    ("g1f3 g8f6 g2g3", WHITE_WIN),
+]
+MORE_GAMES = [
+    ("e2e4 e7e5 g1f3 g8f6", BLACK_WIN),
+    ("d2d4 g8f6", DRAW),
+]
+
+
+def parsed(games: List[Tuple[str, int]]):
+    """(list): Return games as (moves, result) pairs, as read_games does."""
+    return [([parse_move(move) for move in moves.split()], result)
+            for moves, result in games]
+
+
+class GameDatabaseTest(unittest.TestCase):
+    """Databases built in a temporary directory."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "db")
+
+    def build(self, games=GAMES, batch_games: int = 2) -> GameDatabase:
+        """Returns a new database holding games, one segment per batch."""
+        database = GameDatabase(self.path)
+        self.assertEqual(database.add_games(iter(parsed(games)), workers=1,
+                                            batch_games=batch_games,
+                                            chunk_games=1), len(games))
+        return database
+
+    def occurrences(self, database: GameDatabase,
+                    moves: str) -> List[Occurrence]:
+        """Returns the occurrences of the position after moves, sorted."""
+        return sorted(database.find(*play_moves(moves.split())))
+
+    def test_build_and_find(self):
+        database = self.build()
+        self.assertEqual(database.get_num_games(), len(GAMES))
+        for game, (moves, _) in enumerate(GAMES):
+            self.assertEqual(database.get_game(game), parsed(GAMES)[game][0])
+
+        self.assertEqual(len(self.occurrences(database, "")), len(GAMES))
+        self.assertEqual(self.occurrences(database, "e2e4 e7e5"), [
+            Occurrence(0, 2, parse_move("g1f3")),
+            Occurrence(1, 2, parse_move("f1c4"))])
+        self.assertEqual(self.occurrences(database, "d2d4 d7d5"),
+                         [Occurrence(3, 2, None)])
+        self.assertEqual(self.occurrences(database, "h2h4"), [])
+
+        statistics = database.next_move_statistics(*play_moves(["e2e4"]))
+        self.assertEqual(statistics, {parse_move("e7e5"):
+                                      MoveStatistics(2, 1, 1, 0),
+                                      parse_move("c7c5"):
+                                      MoveStatistics(1, 0, 0, 1)})
+
+    def test_reopen_and_add(self):
+        self.build()
+        database = GameDatabase(self.path)
+        self.assertEqual(database.get_num_games(), len(GAMES))
+        database.add_games(iter(parsed(MORE_GAMES)), workers=1)
+        self.assertEqual(database.get_num_games(),
+                         len(GAMES) + len(MORE_GAMES))
+        self.assertEqual(database.get_game(len(GAMES)),
+                         parsed(MORE_GAMES)[0][0])
+        self.assertEqual([occurrence.game for occurrence in
+                          self.occurrences(database, "e2e4 e7e5 g1f3")],
+                         [0, len(GAMES)])
+
+    def test_compact_keeps_every_occurrence(self):
+        database = self.build(batch_games=1)
+        positions = ["", "e2e4", "e2e4 e7e5", "d2d4", "g1f3 g8f6"]
+        before = {moves: self.occurrences(database, moves)
+                  for moves in positions}
+        segments = sorted(name for name in os.listdir(self.path)
+                          if name.startswith("index_"))
+        self.assertEqual(len(segments), len(GAMES))
+
+        database.compact()
+        self.assertEqual(len([name for name in os.listdir(self.path)
+                              if name.startswith("index_")]), 1)
+        for moves in positions:
+            self.assertEqual(self.occurrences(database, moves),
+                             before[moves], moves)
+        reopened = GameDatabase(self.path)
+        self.assertEqual(self.occurrences(reopened, "e2e4"),
+                         before["e2e4"])
+
+    def test_illegal_game_is_rejected(self):
+        database = GameDatabase(self.path)
+        with self.assertRaises(ValueError):
+            database.add_games(iter(parsed([("e2e4 e7e5 e1e3", DRAW)])),
+                               workers=1)
+        self.assertEqual(database.get_num_games(), 0)
+
+    def test_interrupted_add_is_rolled_back(self):
+        self.build()
+        sizes = {name: os.path.getsize(os.path.join(self.path, name))
+                 for name in (GAMES_NAME, OFFSETS_NAME, RESULTS_NAME)}
+
+        #An add that appended its games but crashed before the manifest
+        database = GameDatabase(self.path)
+        database._append_games(parsed(MORE_GAMES))
+
+        database = GameDatabase(self.path)
+        self.assertEqual(database.get_num_games(), len(GAMES))
+        for name, size in sizes.items():
+            self.assertEqual(os.path.getsize(os.path.join(self.path, name)),
+                             size, name)
+
+        #New games get ids that match their offsets again
+        database.add_games(iter(parsed(MORE_GAMES)), workers=1)
+        for game, (moves, _) in enumerate(parsed(MORE_GAMES), len(GAMES)):
+            self.assertEqual(database.get_game(game), moves)
+        self.assertEqual([occurrence.game for occurrence in
+                          self.occurrences(database, "d2d4 g8f6")],
+                         [len(GAMES) + 1])
+
+    def test_missing_games_are_reported(self):
+        self.build()
+        os.truncate(os.path.join(self.path, RESULTS_NAME), 2)
+        with self.assertRaises(ValueError):
+            GameDatabase(self.path)
+
+    def test_read_games(self):
+        path = os.path.join(os.path.dirname(self.path), "games.txt")
+        with open(path, "w") as file:
+            file.write("e2e4 e7e5 1-0\n\nd2d4\ng1f3 1/2-1/2\n")
+        self.assertEqual(list(read_games(path)), parsed([
+            ("e2e4 e7e5", WHITE_WIN), ("d2d4", UNKNOWN_RESULT),
+            ("g1f3", DRAW)]))
+
+    def test_play_moves(self):
+        self.assertEqual(play_moves([]), (initial_state(), True))
+        board, whites_turn = play_moves(["e2e4", "e7e5"])
+        self.assertTrue(whites_turn)
+        for moves in (["e2e5"], ["e2e4", "e2e4"], ["e2"]):
+            with self.assertRaises(ValueError, msg=moves):
+                play_moves(moves)
+
+
+if __name__ == "__main__":
+    unittest.main()
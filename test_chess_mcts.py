@@ -0,0 +1,54 @@
+"""
+Checks that chess_mcts.MCTSPlayer always chooses a legal move while there is
+one, however small its budget.
+
+Usage:
+    python -m unittest test_chess_mcts
+"""
+import unittest
+
+from chess import initial_state, update_board
+from chess_mcts import MCTSPlayer
+from chess_positions import legal_moves, parse_move
+
+#Fool's mate: white is checkmated
+FOOLS_MATE = ["f2f3", "e7e5", "g2g4", "d8h4"]
+
+
+class ChooseMoveTest(unittest.TestCase):
+    """MCTSPlayer.choose_move with small and invalid budgets."""
+
+    def setUp(self):
+        self.player = MCTSPlayer(seed=29)
+        self.addCleanup(self.player.close)
+
+    def test_zero_seconds_still_plays_a_move(self):
+        board = initial_state()
+        for seconds in (0, 1e-9):
+            result = self.player.choose_move(board, True, seconds=seconds)
+            self.assertEqual(result.playouts, 1)
+            self.assertIn(result.move, legal_moves(board, True))
+
+    def test_one_playout(self):
+        board = update_board(initial_state(), parse_move("e2e4"))
+        result = self.player.choose_move(board, False, playouts=1)
+        self.assertEqual(result.playouts, 1)
+        self.assertIn(result.move, legal_moves(board, False))
+
+    def test_no_legal_move(self):
+        board = initial_state()
+        for move in FOOLS_MATE:
+            board = update_board(board, parse_move(move))
+        result = self.player.choose_move(board, True, seconds=0)
+        self.assertIsNone(result.move)
+
+    def test_invalid_budgets(self):
+        board = initial_state()
+        for playouts, seconds in ((None, None), (0, None), (-1, None),
+                                  (None, -0.5)):
+            with self.assertRaises(ValueError):
+                self.player.choose_move(board, True, playouts, seconds)
+
+
+if __name__ == "__main__":
+    unittest.main()
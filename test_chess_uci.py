@@ -0,0 +1,202 @@
+"""
+Drives chess_uci.ProtocolHandler through in-memory streams and checks its
+replies, and checks that GameState reuses the moves it already holds.
+
+Usage:
+    python -m unittest test_chess_uci
+"""
+import io
+import unittest
+from typing import List
+
+from chess import initial_state, update_board
+from chess_positions import legal_moves, parse_move, position_hash
+from chess_uci import GameState, ProtocolHandler, run
+
+OPENING = ["e2e4", "e7e5", "g1f3", "b8c6"]
+
+
+def board_after(moves: List[str]):
+    """(Board): Return the board after moves from the initial state."""
+    board = initial_state()
+    for move in moves:
+        board = update_board(board, parse_move(move))
+    return board
+
+
+def hash_text(board, whites_turn: bool) -> str:
+    """(str): Return the hash of a position as the "d" command prints it."""
+    return f"{position_hash(board, whites_turn):016x}"
+
+
+class CountingState(GameState):
+    """A GameState that counts the moves it makes and takes back."""
+
+    def __init__(self) -> None:
+        self.pushes = self.pops = 0
+        super().__init__()
+
+    def push(self, move) -> None:
+        self.pushes += 1
+        super().push(move)
+
+    def pop(self) -> None:
+        self.pops += 1
+        super().pop()
+
+
+class GameStateTest(unittest.TestCase):
+    """Moving GameState between positions."""
+
+    def test_set_moves_reuses_the_common_prefix(self):
+        state = CountingState()
+        state.set_moves([parse_move(move) for move in OPENING[:2]])
+        self.assertEqual((state.pushes, state.pops), (2, 0))
+
+        #Extending the game only applies the new moves
+        state.set_moves([parse_move(move) for move in OPENING])
+        self.assertEqual((state.pushes, state.pops), (4, 0))
+
+        #Taking moves back only pops them, a new branch only pushes its own
+        state.set_moves([parse_move(move) for move in OPENING[:3]])
+        self.assertEqual((state.pushes, state.pops), (4, 1))
+        state.set_moves([parse_move(move)
+                         for move in OPENING[:3] + ["g8f6"]])
+        self.assertEqual((state.pushes, state.pops), (5, 1))
+        self.assertEqual(state.get_board(), board_after(OPENING[:3]
+                                                        + ["g8f6"]))
+        self.assertTrue(state.is_whites_turn())
+
+    def test_illegal_move_restores_the_position(self):
+        state = GameState()
+        moves = [parse_move(move) for move in OPENING]
+        state.set_moves(moves)
+        key = state.get_hash()
+        with self.assertRaises(ValueError):
+            state.set_moves(moves[:2] + [parse_move("e1e3")])
+        self.assertEqual(state.get_board(), board_after(OPENING))
+        self.assertEqual(state.get_hash(), key)
+
+        #The restored moves are reused as before
+        state.set_moves(moves + [parse_move("f1c4")])
+        self.assertEqual(state.get_board(), board_after(OPENING + ["f1c4"]))
+
+
+class ProtocolTest(unittest.TestCase):
+    """Commands sent to a ProtocolHandler one at a time."""
+
+    def setUp(self):
+        self.output = io.StringIO()
+        self.handler = ProtocolHandler(self.output)
+        self.addCleanup(self.handler.stop)
+
+    def send(self, *lines: str) -> List[str]:
+        """Handles lines, waits for any search and returns the new output."""
+        start = self.output.tell()
+        for line in lines:
+            self.assertTrue(self.handler.handle(line))
+        self.handler.wait()
+        self.output.seek(start)
+        replies = self.output.read().splitlines()
+        self.output.seek(0, io.SEEK_END)
+        return replies
+
+    def position_hash(self) -> str:
+        """(str): Return the hash the "d" command prints."""
+        return self.send("d")[-1].split()[-1]
+
+    def test_handshake(self):
+        replies = self.send("uci")
+        self.assertTrue(replies[0].startswith("id name "))
+        self.assertIn("option name Engine type combo default AlphaBeta "
+                      "var AlphaBeta var MCTS", replies)
+        self.assertEqual(replies[-1], "uciok")
+        self.assertEqual(self.send("isready"), ["readyok"])
+        self.assertEqual(self.send("", "   "), [])
+
+    def test_position_moves(self):
+        self.assertEqual(self.send("position startpos moves e2e4 e7e5"), [])
+        self.assertEqual(self.position_hash(),
+                         hash_text(board_after(OPENING[:2]), True))
+        self.send("position startpos moves " + " ".join(OPENING))
+        self.assertEqual(self.position_hash(),
+                         hash_text(board_after(OPENING), True))
+        self.send("position startpos moves e2e4")
+        self.assertEqual(self.position_hash(),
+                         hash_text(board_after(OPENING[:1]), False))
+        self.send("position startpos")
+        self.assertEqual(self.position_hash(),
+                         hash_text(initial_state(), True))
+
+    def test_position_board(self):
+        board = board_after(OPENING)
+        self.send(f"position board {'/'.join(board)} b moves f8c5")
+        self.assertEqual(self.position_hash(),
+                         hash_text(board_after(OPENING + ["f8c5"]), True))
+
+    def test_bad_positions(self):
+        self.send("position startpos moves " + " ".join(OPENING))
+        before = self.position_hash()
+        for command in ("position startpos moves e2e4 e7e5 e1e3",
+                        "position startpos moves e2e4 e9e5",
+                        "position board k7/8 w",
+                        "position board " + "/".join(["rnbqkbnx"] + [
+                            "........"] * 7) + " w",
+                        "position board " + "/".join(initial_state())
+                        + " x",
+                        "position sideways"):
+            replies = self.send(command)
+            self.assertEqual(len(replies), 1, command)
+            self.assertTrue(replies[0].startswith("info string "), command)
+            self.assertEqual(self.position_hash(), before, command)
+
+    def test_go_depth(self):
+        self.send("position startpos moves e2e4")
+        replies = self.send("go depth 2")
+        self.assertTrue(any(reply.startswith("info depth 1 score ")
+                            for reply in replies))
+        self.assertTrue(any(reply.startswith("info depth 2 ")
+                            for reply in replies))
+        self.assertEqual(replies[-1].split()[0], "bestmove")
+        move = parse_move(replies[-1].split()[1])
+        self.assertIn(move, legal_moves(board_after(["e2e4"]), False))
+
+    def test_stop(self):
+        #The first iteration checks for a stop too rarely to be cut short,
+        #so there is always a move to report
+        self.handler.handle("go infinite")
+        self.handler.stop()
+        self.output.seek(0)
+        replies = self.output.read().splitlines()
+        self.assertEqual(replies[-1].split()[0], "bestmove")
+        self.assertIn(parse_move(replies[-1].split()[1]),
+                      legal_moves(initial_state(), True))
+        self.assertEqual(self.send("stop"), [])
+
+    def test_bad_go_arguments(self):
+        for command in ("go depth x", "go depth 0", "go depth -1",
+                        "go movetime 1.5", "go movetime 0"):
+            replies = self.send(command)
+            self.assertEqual(len(replies), 1, command)
+            self.assertTrue(replies[0].startswith("info string "), command)
+        self.assertEqual(self.send("isready"), ["readyok"])
+
+    def test_missing_go_values_use_the_defaults(self):
+        for command in ("go depth", "go movetime"):
+            replies = self.send(command)
+            self.assertEqual(replies[-1].split()[0], "bestmove", command)
+
+    def test_unknown_command(self):
+        self.assertEqual(self.send("fly"), ["info string Unknown command: fly"])
+
+    def test_run_session(self):
+        output = io.StringIO()
+        run(io.StringIO("uci\nposition startpos moves e2e4\ngo depth 1\n"
+                        "quit\nisready\n"), output)
+        replies = output.getvalue().splitlines()
+        self.assertEqual(replies[-1].split()[0], "bestmove")
+        self.assertNotIn("readyok", replies)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Checks that hacker_autosave keeps the autosaves of an unfinished game and
+deletes them once the game ends normally.
+
+Usage:
+    python -m unittest test_hacker_autosave
+"""
+import os
+import random
+import tempfile
+import unittest
+
+from hacker_autosave import Autosaver, list_autosaves, newest_autosave
+from hacker_model import Game
+from hacker_save import load_save
+
+
+class AutosaverTest(unittest.TestCase):
+    """Autosaves written by an Autosaver with no interval."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.game = Game(7, random.Random(45))
+        self.game.step()
+
+    def test_close_keeps_the_newest_autosaves(self):
+        autosaver = Autosaver(self.directory, keep=2, interval=0)
+        for time_count in range(4):
+            self.assertTrue(autosaver.offer(self.game, time_count, False))
+            self.game.step()
+        autosaver.close()
+        #Snapshots offered while the worker was busy may have been dropped
+        self.assertEqual(autosaver.saves_written
+                         + autosaver.snapshots_dropped, 4)
+        self.assertLessEqual(len(list_autosaves(self.directory)), 2)
+        self.assertEqual(load_save(newest_autosave(self.directory),
+                                   7).time_count, 3)
+
+        #A new autosaver carries on the numbering
+        autosaver = Autosaver(self.directory, keep=2, interval=0)
+        autosaver.offer(self.game, 4, False)
+        autosaver.close()
+        self.assertEqual(load_save(newest_autosave(self.directory),
+                                   7).time_count, 4)
+
+    def test_finish_deletes_the_autosaves(self):
+        autosaver = Autosaver(self.directory, interval=0)
+        autosaver.offer(self.game, 1, False)
+        autosaver.offer(self.game, 2, False)
+        autosaver.finish()
+        self.assertEqual(list_autosaves(self.directory), [])
+        self.assertIsNone(newest_autosave(self.directory))
+        self.assertEqual(autosaver.errors, [])
+
+    def test_interval(self):
+        autosaver = Autosaver(self.directory, interval=3600)
+        self.assertTrue(autosaver.offer(self.game, 1, False))
+        self.assertFalse(autosaver.offer(self.game, 2, False))
+        self.assertTrue(autosaver.offer(self.game, 3, True, force=True))
+        autosaver.close()
+        save = load_save(newest_autosave(self.directory), 7)
+        self.assertEqual((save.time_count, save.paused), (3, True))
+        self.assertFalse(any(name.startswith(".save-")
+                             for name in os.listdir(self.directory)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+"""
+Checks hacker_loop.GameLoop against a fake clock and a fake after, so that
+catching up, dropping ticks and pausing are tested without waiting.
+
+Usage:
+    python -m unittest test_hacker_loop
+"""
+import unittest
+from typing import Callable, Dict, Tuple
+
+from hacker_loop import GameLoop
+
+
+class FakeScheduler:
+    """A clock that only moves when told to, and an after that runs its
+    callbacks once the clock reaches their time."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self._jobs: Dict[int, Tuple[float, Callable]] = {}
+        self._next_job = 0
+
+    def clock(self) -> float:
+        return self.now
+
+    def after(self, ms: int, callback: Callable) -> int:
+        self._next_job += 1
+        self._jobs[self._next_job] = (self.now + ms / 1000, callback)
+        return self._next_job
+
+    def cancel(self, job: int) -> None:
+        del self._jobs[job]
+
+    def pending(self) -> int:
+        """(int): Return the number of scheduled callbacks."""
+        return len(self._jobs)
+
+    def advance_to(self, time: float) -> None:
+        """Moves the clock to time, running the callbacks due on the way at
+        their scheduled times."""
+        while self._jobs:
+            job = min(self._jobs, key=lambda job: self._jobs[job][0])
+            at, callback = self._jobs[job]
+            if at > time:
+                break
+            del self._jobs[job]
+            self.now = max(self.now, at)
+            callback()
+        self.now = time
+
+    def jump_to(self, time: float) -> None:
+        """Moves the clock to time, then runs the callbacks that are due,
+        as when the Tk thread was busy until time."""
+        self.now = time
+        self.advance_to(time)
+
+
+class GameLoopTest(unittest.TestCase):
+    """GameLoop ticking, rendering and pausing on a fake clock."""
+
+    def make_loop(self, tick_rate: float = 2.0, max_catch_up: int = 5,
+                  tick: Callable = None) -> GameLoop:
+        """Returns a loop on self.scheduler counting ticks and renders."""
+        self.scheduler = FakeScheduler()
+        self.renders = 0
+
+        def render():
+            self.renders += 1
+        return GameLoop(self.scheduler.after, self.scheduler.cancel,
+                        tick or (lambda: None), render, tick_rate,
+                        max_catch_up, self.scheduler.clock)
+
+    def test_ticks_at_the_tick_rate(self):
+        loop = self.make_loop(tick_rate=2.0)
+        self.assertEqual(loop.get_period(), 0.5)
+        loop.start()
+        self.scheduler.advance_to(0.49)
+        self.assertEqual(loop.ticks, 0)
+        self.scheduler.advance_to(0.5)
+        self.assertEqual((loop.ticks, self.renders), (1, 1))
+        self.scheduler.advance_to(10.2)
+        self.assertEqual((loop.ticks, self.renders), (20, 20))
+        self.assertEqual(loop.dropped_ticks, 0)
+        self.assertAlmostEqual(loop.elapsed(), 10.2)
+
+    def test_catch_up_is_capped(self):
+        loop = self.make_loop(tick_rate=2.0, max_catch_up=3)
+        loop.start()
+        #The Tk thread is busy for 10 seconds: 20 ticks are due at once
+        self.scheduler.jump_to(10.0)
+        self.assertEqual(loop.ticks, 3)
+        self.assertEqual(loop.dropped_ticks, 17)
+        self.assertEqual(self.renders, 1)
+
+        #The loop carries on from the next tick time after the drop
+        self.scheduler.advance_to(10.49)
+        self.assertEqual(loop.ticks, 3)
+        self.scheduler.advance_to(10.5)
+        self.assertEqual((loop.ticks, loop.dropped_ticks), (4, 17))
+
+    def test_catch_up_within_the_cap(self):
+        loop = self.make_loop(tick_rate=2.0, max_catch_up=5)
+        loop.start()
+        self.scheduler.jump_to(2.2)
+        self.assertEqual((loop.ticks, loop.dropped_ticks), (4, 0))
+        self.assertEqual(self.renders, 1)
+        self.scheduler.advance_to(2.5)
+        self.assertEqual(loop.ticks, 5)
+
+    def test_pause_and_resume(self):
+        loop = self.make_loop(tick_rate=2.0)
+        loop.start()
+        self.scheduler.advance_to(1.2)
+        self.assertEqual(loop.ticks, 2)
+        loop.pause()
+        self.assertFalse(loop.is_running())
+        self.assertEqual(self.scheduler.pending(), 0)
+        self.assertAlmostEqual(loop.elapsed(), 1.2)
+
+        #Paused time neither ticks nor counts as elapsed
+        self.scheduler.advance_to(100.0)
+        self.assertEqual((loop.ticks, loop.dropped_ticks), (2, 0))
+        self.assertAlmostEqual(loop.elapsed(), 1.2)
+
+        #The 0.3 seconds left of the period are kept
+        loop.resume()
+        self.assertTrue(loop.is_running())
+        self.scheduler.advance_to(100.29)
+        self.assertEqual(loop.ticks, 2)
+        self.scheduler.advance_to(100.3)
+        self.assertEqual(loop.ticks, 3)
+        self.scheduler.advance_to(101.0)
+        self.assertAlmostEqual(loop.elapsed(), 2.2)
+
+        #Pausing or resuming twice changes nothing
+        loop.pause()
+        loop.pause()
+        self.assertAlmostEqual(loop.elapsed(), 2.2)
+        loop.resume()
+        loop.resume()
+        self.assertEqual(self.scheduler.pending(), 1)
+
+    def test_tick_that_pauses(self):
+        loop = self.make_loop(tick=lambda: loop.pause())
+        loop.start()
+        self.scheduler.jump_to(5.0)
+        self.assertEqual((loop.ticks, self.renders), (1, 1))
+        self.assertEqual(self.scheduler.pending(), 0)
+
+    def test_set_elapsed(self):
+        loop = self.make_loop(tick_rate=2.0)
+        loop.start()
+        self.scheduler.advance_to(0.7)
+        loop.set_elapsed(30.0)
+        self.assertAlmostEqual(loop.elapsed(), 30.0)
+        self.assertEqual(self.scheduler.pending(), 1)
+        #The next tick is a whole period away
+        self.scheduler.advance_to(1.19)
+        self.assertEqual(loop.ticks, 1)
+        self.scheduler.advance_to(1.2)
+        self.assertEqual(loop.ticks, 2)
+        self.assertAlmostEqual(loop.elapsed(), 30.5)
+
+    def test_invalid_arguments(self):
+        scheduler = FakeScheduler()
+        for tick_rate, max_catch_up in ((0, 5), (-1.0, 5), (float("nan"), 5),
+                                        (1.0, 0)):
+            with self.assertRaises(ValueError):
+                GameLoop(scheduler.after, scheduler.cancel, lambda: None,
+                         lambda: None, tick_rate, max_catch_up,
+                         scheduler.clock)
+
+
+if __name__ == "__main__":
+    unittest.main()
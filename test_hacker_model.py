@@ -0,0 +1,219 @@
+"""
+Checks that the circular row and column origins of the hacker Grid place
+entities exactly where the original list-shifting model put them, and that
+its live entity counters agree with a full recount of the grid.
+
+The reference model below is the original one: a dict from (x, y) to the
+entity's display character, rotated by moving every entity one column and
+wrapping it to the other edge, and stepped by moving every entity one row up
+and dropping the ones that leave the grid.
+
+Usage:
+    python -m unittest test_hacker_model
+"""
+import random
+import unittest
+from typing import Dict, Tuple
+
+from hacker_game_support import *
+from hacker_model import (CODE_DISPLAYS, CODE_ENTITIES, ENTITY_CODES,
+                          EMPTY_CELL, YCOORD_BOUND, Game, Grid)
+
+Cells = Dict[Tuple[int, int], str]
+
+
+def reference_rotate(entities: Cells, size: int, direction: str) -> Cells:
+    """(dict): Return entities rotated as the original rotate_grid did."""
+    change = ROTATIONS[DIRECTIONS.index(direction)][0]
+    rotated = {}
+    for (x, y), display in entities.items():
+        x += change
+        if x >= size:
+            x = 0
+        elif x < 0:
+            x = size - 1
+        rotated[x, y] = display
+    return rotated
+
+
+def reference_scroll(entities: Cells) -> Cells:
+    """(dict): Return entities moved by MOVE as the original step did,
+    dropping those that leave the grid."""
+    return {(x, y + MOVE[1]): display for (x, y), display in entities.items()
+            if y + MOVE[1] >= YCOORD_BOUND}
+
+
+def reference_row(entities: Cells, size: int, y: int) -> bytes:
+    """(bytes): Return row y of entities as entity codes, as Grid.get_row."""
+    return bytes(ENTITY_CODES[entities[x, y]] if (x, y) in entities
+                 else EMPTY_CELL for x in range(size))
+
+
+def random_entities(rng: random.Random, size: int) -> Cells:
+    """(dict): Return a random filling of the rows below the player."""
+    displays = [COLLECTABLE, DESTROYABLE, BLOCKER]
+    return {(x, y): rng.choice(displays)
+            for y in range(YCOORD_BOUND, size) for x in range(size)
+            if rng.random() < 0.4}
+
+
+def fill_grid(grid: Grid, entities: Cells) -> None:
+    """Adds entities to grid."""
+    for (x, y), display in entities.items():
+        grid.add_entity(Position(x, y), CODE_ENTITIES[ENTITY_CODES[display]])
+
+
+class RotationTest(unittest.TestCase):
+    """The grid's column origin against the original rotation."""
+
+    def assert_matches(self, grid: Grid, entities: Cells) -> None:
+        """Asserts grid holds exactly entities, row by row and overall."""
+        size = grid.get_size()
+        self.assertEqual(grid.serialise(), entities)
+        for y in range(size):
+            self.assertEqual(grid.get_row(y), reference_row(entities, size, y),
+                             f"row {y}")
+
+    def test_repeated_rotations_past_grid_size(self):
+        rng = random.Random(34)
+        for size in (3, 4, 7, 10):
+            game = Game(size)
+            entities = random_entities(rng, size)
+            fill_grid(game.get_grid(), entities)
+            for direction, turns in ((LEFT, 2 * size + 3),
+                                     (RIGHT, 3 * size + 1),
+                                     (LEFT, size), (RIGHT, size - 1)):
+                for _ in range(turns):
+                    game.rotate_grid(direction)
+                    entities = reference_rotate(entities, size, direction)
+                    self.assert_matches(game.get_grid(), entities)
+
+    def test_a_full_turn_restores_the_grid(self):
+        size = 7
+        entities = random_entities(random.Random(7), size)
+        game = Game(size)
+        grid = game.get_grid()
+        fill_grid(grid, entities)
+        for direction in (LEFT, RIGHT):
+            for _ in range(size):
+                game.rotate_grid(direction)
+            self.assert_matches(grid, entities)
+
+    def test_rotate_then_step_then_read_rows(self):
+        for seed in range(5):
+            size = 7 + seed
+            game = Game(size, random.Random(seed))
+            grid = game.get_grid()
+            rng = random.Random(seed + 100)
+            entities: Cells = {}
+            for _ in range(60):
+                for _ in range(rng.randrange(4)):
+                    direction = rng.choice(DIRECTIONS)
+                    game.rotate_grid(direction)
+                    entities = reference_rotate(entities, size, direction)
+                game.step()
+                entities = reference_scroll(entities)
+                #The spawned row is random, so take it from the grid
+                bottom = size - 1
+                for x, code in enumerate(grid.get_row(bottom)):
+                    if code != EMPTY_CELL:
+                        entities[x, bottom] = CODE_DISPLAYS[code]
+                self.assert_matches(grid, entities)
+                for x in range(size):
+                    rows = [y for (column, y) in entities if column == x]
+                    self.assertEqual(grid.nearest_in_column(x),
+                                     min(rows) if rows else None)
+
+    def test_cells_round_trip_after_rotating(self):
+        rng = random.Random(5)
+        for size in (4, 7, 9):
+            game = Game(size, random.Random(size))
+            for _ in range(size + 2):
+                game.step()
+                for _ in range(rng.randrange(size * 2)):
+                    game.rotate_grid(rng.choice(DIRECTIONS))
+            grid = game.get_grid()
+            entities = grid.serialise()
+            cells = grid.get_cells()
+
+            copy = Grid(size)
+            copy.set_cells(cells)
+            self.assertEqual(copy.get_cells(), cells)
+            self.assert_matches(copy, entities)
+
+            #Loading into the rotated grid itself resets its origins
+            grid.set_cells(cells)
+            self.assertEqual(grid.get_cells(), cells)
+            self.assert_matches(grid, entities)
+
+            #And both keep rotating the same way
+            for direction in (LEFT, LEFT, RIGHT, LEFT):
+                game.rotate_grid(direction)
+                copy.rotate(ROTATIONS[DIRECTIONS.index(direction)][0])
+                entities = reference_rotate(entities, size, direction)
+                self.assert_matches(grid, entities)
+                self.assert_matches(copy, entities)
+
+
+class CounterTest(unittest.TestCase):
+    """The live type and row counters against a recount of the grid."""
+
+    def assert_counts(self, game: Game, where: str) -> None:
+        """Asserts game's stats, loss and per-row counts match a recount."""
+        grid = game.get_grid()
+        entities = grid.serialise()
+        displays = list(entities.values())
+        danger = [display for (x, y), display in entities.items()
+                  if y == YCOORD_BOUND]
+        self.assertEqual(game.stats(), {
+            "collectables": displays.count(COLLECTABLE),
+            "destroyables": displays.count(DESTROYABLE),
+            "blockers": displays.count(BLOCKER),
+            "danger": danger.count(DESTROYABLE),
+            "collected": game.get_num_collected(),
+            "destroyed": game.get_num_destroyed(),
+            "shots": game.get_total_shots(),
+        }, where)
+        self.assertEqual(game.has_lost(), DESTROYABLE in danger, where)
+        for y in range(grid.get_size()):
+            row = [display for (x, row_y), display in entities.items()
+                   if row_y == y]
+            for display in (COLLECTABLE, DESTROYABLE, BLOCKER):
+                self.assertEqual(grid.count_in_row(y, display),
+                                 row.count(display), f"{where}, row {y}")
+                self.assertEqual(grid.row_contains(y, display),
+                                 display in row, f"{where}, row {y}")
+
+    def test_counters_follow_every_change(self):
+        for seed in range(4):
+            size = 5 + 2 * seed
+            game = Game(size, random.Random(seed))
+            rng = random.Random(seed + 36)
+            for tick in range(150):
+                action = rng.choice(("step", "step", LEFT, RIGHT, COLLECT,
+                                     DESTROY, "restore", "reload"))
+                if action == "step":
+                    game.step()
+                elif action in DIRECTIONS:
+                    game.rotate_grid(action)
+                elif action in SHOT_TYPES:
+                    game.fire(action)
+                elif action == "restore":
+                    #As a save is loaded: a new grid from the cell codes
+                    cells = game.get_grid().get_cells()
+                    collected = game.get_num_collected()
+                    destroyed = game.get_num_destroyed()
+                    shots = game.get_total_shots()
+                    game = Game(size, random.Random(seed + tick))
+                    game.get_grid().set_cells(cells)
+                    game.set_counts(collected, destroyed, shots)
+                else:
+                    #Reloading the grid's own entities over it
+                    grid = game.get_grid()
+                    grid.set_entities(grid.get_entities())
+                self.assert_counts(game, f"seed {seed}, tick {tick}, "
+                                         f"{action}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Checks that hacker_replay logs of seeded Simulations replay to the recorded
+game, and that damaged logs are rejected.
+
+Usage:
+    python -m unittest test_hacker_replay
+"""
+import os
+import tempfile
+import unittest
+
+from hacker_game_support import *
+from hacker_replay import (ACTION_RECORD, END_RECORD, HEADER, RECORD,
+                           STEP_RECORD, read_log, record_simulation,
+                           replay_log, state_checksum)
+from hacker_simulation import Simulation, random_policy
+
+SEED = 43
+TICKS = 300
+
+
+def play(size: int, seed: int, ticks: int, policy_seed: int) -> Simulation:
+    """(Simulation): Return the simulation record_simulation plays."""
+    simulation = Simulation(size, seed)
+    policy = random_policy(policy_seed)
+    for _ in range(ticks):
+        if simulation.tick(policy(simulation.get_game())):
+            break
+    return simulation
+
+
+class ReplayTest(unittest.TestCase):
+    """Logs written by record_simulation."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "game.hkr")
+
+    def record(self, seed: int = SEED, ticks: int = TICKS) -> bytes:
+        """Records a game to the log and returns the log's contents."""
+        record_simulation(self.path, GRID_SIZE, seed, ticks, seed)
+        with open(self.path, "rb") as file:
+            return file.read()
+
+    def rewrite(self, contents: bytes) -> None:
+        """Replaces the contents of the log."""
+        with open(self.path, "wb") as file:
+            file.write(contents)
+
+    def record_offset(self, kind: int) -> int:
+        """(int): Return the offset in the log of the first record of kind."""
+        _, _, records = read_log(self.path)
+        index = [record[0] for record in records].index(kind)
+        return HEADER.size + index * RECORD.size
+
+    def test_replay_matches_the_recorded_game(self):
+        for seed in range(SEED, SEED + 5):
+            self.record(seed)
+            simulation = play(GRID_SIZE, seed, TICKS, seed)
+            game = simulation.get_game()
+
+            result = replay_log(self.path)
+            self.assertTrue(result.ok, seed)
+            self.assertTrue(result.finished, seed)
+            self.assertEqual((result.won, result.lost),
+                             (game.has_won(), game.has_lost()), seed)
+            #The finishing tick isn't stepped, so it isn't counted
+            self.assertEqual(result.ticks, simulation.get_ticks() - 1, seed)
+
+            size, log_seed, records = read_log(self.path)
+            self.assertEqual((size, log_seed), (GRID_SIZE, seed))
+            self.assertEqual(records[-1][0], END_RECORD)
+            self.assertEqual(records[-1][3], state_checksum(game))
+
+    def test_unfinished_game(self):
+        self.record(ticks=5)
+        result = replay_log(self.path)
+        self.assertTrue(result.ok)
+        self.assertFalse(result.finished)
+        self.assertEqual(result.ticks, 5)
+
+    def test_flipped_bytes(self):
+        contents = self.record()
+        step = self.record_offset(STEP_RECORD)
+        action = self.record_offset(ACTION_RECORD)
+        flips = {
+            "step checksum": step + RECORD.size - 1,
+            "step tick": step + 1,
+            "record kind": step,
+            "action value": action + 5,
+            "seed": HEADER.size - 1,
+        }
+        for name, offset in flips.items():
+            damaged = bytearray(contents)
+            damaged[offset] ^= 0x80
+            self.rewrite(bytes(damaged))
+            self.assertFalse(replay_log(self.path).ok, name)
+
+    def test_damaged_header(self):
+        contents = self.record()
+        for offset in (0, 4):
+            damaged = bytearray(contents)
+            damaged[offset] ^= 0x01
+            self.rewrite(bytes(damaged))
+            with self.assertRaises(ValueError, msg=offset):
+                replay_log(self.path)
+        self.rewrite(contents[:HEADER.size - 1])
+        with self.assertRaises(ValueError):
+            replay_log(self.path)
+
+    def test_truncated(self):
+        contents = self.record()
+        cut = contents[:-RECORD.size // 2]
+        self.rewrite(cut)
+        with self.assertRaises(ValueError):
+            read_log(self.path)
+        with self.assertRaises(ValueError):
+            replay_log(self.path)
+
+        #Read as a crashed log, it replays up to the last complete record
+        result = replay_log(self.path, partial=True)
+        self.assertTrue(result.ok)
+        self.assertFalse(result.finished)
+
+        #A log cut at a record boundary has lost its result
+        self.rewrite(contents[:-RECORD.size])
+        result = replay_log(self.path)
+        self.assertTrue(result.ok)
+        self.assertFalse(result.finished)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Checks the binary save files of hacker_save: a round trip through a file,
+the rejection of damaged files, the migration of text-format saves and the
+atomic replacement of an old save.
+
+Usage:
+    python -m unittest test_hacker_save
+"""
+import os
+import random
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+from hacker_game_support import *
+from hacker_model import Game
+from hacker_save import (CHECKSUM, HEADER, SAVE_VERSION, SaveData,
+                         encode_save, load_save, write_save)
+
+#A save of a 5x5 game in the original text format, as save_game wrote it
+LEGACY_SAVE = ("{Position(3, 1): Collectable(), Position(4, 1): Blocker(), "
+               "Position(0, 3): Blocker(), Position(3, 3): Collectable(), "
+               "Position(0, 4): Destroyable(), Position(4, 4): Collectable()}\n"
+               "42\n17\nTrue\n3\n5")
+
+
+def played_game(size: int, seed: int) -> Game:
+    """(Game): Return a game that has scrolled, rotated and fired."""
+    rng = random.Random(seed)
+    game = Game(size, random.Random(seed))
+    for _ in range(size * 2):
+        game.step()
+        game.rotate_grid(rng.choice(DIRECTIONS))
+        game.fire(rng.choice(SHOT_TYPES))
+    return game
+
+
+class SaveTest(unittest.TestCase):
+    """Save files written and read through hacker_save."""
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.path = os.path.join(self._directory.name, "save")
+
+    def write_contents(self, contents: bytes) -> None:
+        """Writes contents to the save file directly."""
+        with open(self.path, "wb") as file:
+            file.write(contents)
+
+    def test_round_trip(self):
+        for size in (3, 7, 20):
+            game = played_game(size, size)
+            write_save(self.path, SaveData.from_game(game, 123, True))
+            save = load_save(self.path, size)
+            self.assertEqual((save.time_count, save.paused), (123, True))
+
+            loaded = save.to_game()
+            grid, loaded_grid = game.get_grid(), loaded.get_grid()
+            self.assertEqual(loaded_grid.get_cells(), grid.get_cells())
+            self.assertEqual(loaded_grid.serialise(), grid.serialise())
+            self.assertEqual(loaded.stats(), game.stats())
+            self.assertEqual(loaded.has_lost(), game.has_lost())
+            for x in range(size):
+                self.assertEqual(loaded_grid.nearest_in_column(x),
+                                 grid.nearest_in_column(x))
+
+            #The loaded origins differ, but the grids scroll and rotate alike
+            for direction in (LEFT, RIGHT, RIGHT):
+                game.rotate_grid(direction)
+                loaded.rotate_grid(direction)
+                grid.scroll()
+                loaded_grid.scroll()
+                self.assertEqual(loaded_grid.get_cells(), grid.get_cells())
+
+    def test_corrupted_checksum(self):
+        contents = bytearray(encode_save(SaveData.from_game(
+            played_game(7, 1), 0, False)))
+        contents[-1] ^= 0xFF
+        self.write_contents(bytes(contents))
+        with self.assertRaises(ValueError):
+            load_save(self.path, 7)
+
+    def test_flipped_byte(self):
+        contents = bytearray(encode_save(SaveData.from_game(
+            played_game(7, 2), 0, False)))
+        contents[HEADER.size] ^= 0x01
+        self.write_contents(bytes(contents))
+        with self.assertRaises(ValueError):
+            load_save(self.path, 7)
+
+    def test_truncated(self):
+        contents = encode_save(SaveData.from_game(played_game(7, 3), 0, False))
+        for length in (0, 3, HEADER.size, len(contents) - 1):
+            self.write_contents(contents[:length])
+            with self.assertRaises(ValueError, msg=f"{length} bytes"):
+                load_save(self.path, 7)
+
+    def test_wrong_version(self):
+        contents = bytearray(encode_save(SaveData.from_game(
+            played_game(7, 4), 0, False)))
+        contents[4] = SAVE_VERSION + 1
+        body = bytes(contents[:-CHECKSUM.size])
+        #A valid checksum, so only the version is wrong
+        self.write_contents(body + CHECKSUM.pack(zlib.crc32(body)))
+        with self.assertRaisesRegex(ValueError, "version"):
+            load_save(self.path, 7)
+
+    def test_legacy_migration(self):
+        self.write_contents(LEGACY_SAVE.encode())
+        save = load_save(self.path, 5)
+        self.assertEqual((save.size, save.time_count, save.shots, save.paused,
+                          save.collected, save.destroyed),
+                         (5, 42, 17, True, 3, 5))
+        game = save.to_game()
+        self.assertEqual(game.get_grid().serialise(), {
+            (3, 1): COLLECTABLE, (4, 1): BLOCKER, (0, 3): BLOCKER,
+            (3, 3): COLLECTABLE, (0, 4): DESTROYABLE, (4, 4): COLLECTABLE})
+        self.assertEqual((game.get_num_collected(), game.get_num_destroyed(),
+                          game.get_total_shots()), (3, 5, 17))
+
+        #Written again, it is a binary save of the same game
+        write_save(self.path, save)
+        self.assertEqual(load_save(self.path, 5), save)
+
+    def test_bad_legacy_save(self):
+        self.write_contents(b"{Position(1, 1): Dragon()}\n0\n0\nFalse\n0\n0")
+        with self.assertRaises(ValueError):
+            load_save(self.path, 5)
+        self.write_contents(b"{}\n0\n0\n")
+        with self.assertRaises(ValueError):
+            load_save(self.path, 5)
+
+    def test_failed_write_keeps_old_save(self):
+        old = SaveData.from_game(played_game(7, 5), 10, False)
+        write_save(self.path, old)
+        with open(self.path, "rb") as file:
+            contents = file.read()
+
+        new = SaveData.from_game(played_game(7, 6), 20, True)
+        for target in ("os.fsync", "os.replace"):
+            with mock.patch(target, side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    write_save(self.path, new)
+            with open(self.path, "rb") as file:
+                self.assertEqual(file.read(), contents, target)
+            self.assertEqual(os.listdir(self._directory.name), ["save"])
+        self.assertEqual(load_save(self.path, 7), old)
+
+
+if __name__ == "__main__":
+    unittest.main()
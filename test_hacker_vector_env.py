@@ -0,0 +1,118 @@
+"""
+Checks that the NumPy games of hacker_vector_env.VectorEnv play exactly as
+hacker_simulation.Simulation plays the same actions.
+
+The two draw their spawned rows from different random sources, so after
+each tick the row VectorEnv spawned is copied into the Simulation's game in
+place of the one it spawned. Everything else (rotation, firing, scrolling,
+counters, wins, losses and resets) has to match on its own.
+
+Usage:
+    python -m unittest test_hacker_vector_env
+"""
+import random
+import unittest
+from typing import Tuple
+
+from hacker_game_support import *
+from hacker_model import CODE_DISPLAYS, CODE_ENTITIES, EMPTY_CELL, Game
+from hacker_simulation import ACTIONS, Simulation
+from hacker_vector_env import VectorEnv
+
+TICKS = 400
+NOOP_ACTION, LEFT_ACTION, RIGHT_ACTION, COLLECT_ACTION, DESTROY_ACTION = \
+    range(len(ACTIONS))
+
+
+def greedy_action(game: Game, rng: random.Random) -> int:
+    """(int): Return the index of an action that shoots the entity in front
+    of the player when it can, and otherwise rotates at random."""
+    grid = game.get_grid()
+    x = game.get_player_position().get_x()
+    y = grid.nearest_in_column(x)
+    display = None if y is None else CODE_DISPLAYS[grid.get_code(x, y)]
+    if display == COLLECTABLE:
+        return COLLECT_ACTION
+    if display == DESTROYABLE:
+        return DESTROY_ACTION
+    return rng.choice((NOOP_ACTION, LEFT_ACTION, RIGHT_ACTION))
+
+
+def copy_bottom_row(game: Game, codes) -> None:
+    """Replaces the bottom row of game's grid with codes."""
+    grid = game.get_grid()
+    bottom = grid.get_size() - 1
+    for x, code in enumerate(grid.get_row(bottom)):
+        if code != EMPTY_CELL:
+            grid.remove_entity(Position(x, bottom))
+    for x, code in enumerate(codes):
+        if code != EMPTY_CELL:
+            grid.add_entity(Position(x, bottom), CODE_ENTITIES[int(code)])
+
+
+class VectorEnvParityTest(unittest.TestCase):
+    """VectorEnv against one Simulation per game."""
+
+    def assert_parity(self, count: int, size: int, seed: int,
+                      greedy: bool = False, collected: int = 0
+                      ) -> Tuple[int, int]:
+        """Plays count games of the given size with seeded random (or
+        greedy) actions, comparing every game after every tick.
+
+        Parameters:
+            collected (int): The collectables the first games start with.
+
+        Returns:
+            (tuple): The games won and lost.
+        """
+        env = VectorEnv(count, size, seed)
+        simulations = [Simulation(size, seed + game) for game in range(count)]
+        env.get_collected()[:] = collected
+        for simulation in simulations:
+            simulation.get_game().set_counts(collected, 0, 0)
+        rng = random.Random(seed)
+        for tick in range(TICKS):
+            if greedy:
+                actions = [greedy_action(simulation.get_game(), rng)
+                           for simulation in simulations]
+            else:
+                actions = rng.choices(range(len(ACTIONS)), k=count)
+            won, lost = env.tick(actions)
+            cells = env.get_cells()
+            stats = env.stats()
+            for game, simulation in enumerate(simulations):
+                where = f"game {game}, tick {tick}"
+                over = simulation.tick(ACTIONS[actions[game]])
+                self.assertEqual((bool(won[game]), bool(lost[game])),
+                                 (over and simulation.get_game().has_won(),
+                                  over and simulation.get_game().has_lost()),
+                                 where)
+                if over:
+                    simulation.reset()
+                else:
+                    copy_bottom_row(simulation.get_game(), cells[game, -1])
+
+                grid = simulation.get_game().get_grid()
+                self.assertEqual(cells[game].tobytes(), grid.get_cells(),
+                                 where)
+                self.assertEqual({name: int(values[game])
+                                  for name, values in stats.items()},
+                                 simulation.get_game().stats(), where)
+        return env.get_results()
+
+    def test_random_actions(self):
+        wins, losses = self.assert_parity(4, GRID_SIZE, 1)
+        self.assertGreater(losses, 0)
+
+    def test_larger_grids(self):
+        self.assert_parity(3, 9, 2)
+
+    def test_won_games(self):
+        #Games this close to the target are won before they are lost
+        wins, losses = self.assert_parity(5, GRID_SIZE, 3, greedy=True,
+                                          collected=COLLECTION_TARGET - 2)
+        self.assertGreater(wins, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()